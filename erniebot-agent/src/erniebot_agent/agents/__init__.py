@@ -12,10 +12,34 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from erniebot_agent.agents.agent import Agent
-from erniebot_agent.agents.function_agent import FunctionAgent
-from erniebot_agent.agents.function_agent_with_retrieval import (
-    FunctionAgentWithRetrieval,
-    FunctionAgentWithRetrievalScoreTool,
-    FunctionAgentWithRetrievalTool,
+from typing import TYPE_CHECKING
+
+from erniebot_agent.utils.misc import attach_lazy_attrs
+
+if TYPE_CHECKING:
+    from erniebot_agent.agents.agent import Agent
+    from erniebot_agent.agents.function_agent import FunctionAgent
+    from erniebot_agent.agents.function_agent_with_retrieval import (
+        FunctionAgentWithRetrieval,
+        FunctionAgentWithRetrievalScoreTool,
+        FunctionAgentWithRetrievalTool,
+    )
+
+__all__ = [
+    "Agent",
+    "FunctionAgent",
+    "FunctionAgentWithRetrieval",
+    "FunctionAgentWithRetrievalScoreTool",
+    "FunctionAgentWithRetrievalTool",
+]
+
+__getattr__, __dir__ = attach_lazy_attrs(
+    __name__,
+    {
+        "Agent": "erniebot_agent.agents.agent",
+        "FunctionAgent": "erniebot_agent.agents.function_agent",
+        "FunctionAgentWithRetrieval": "erniebot_agent.agents.function_agent_with_retrieval",
+        "FunctionAgentWithRetrievalScoreTool": "erniebot_agent.agents.function_agent_with_retrieval",
+        "FunctionAgentWithRetrievalTool": "erniebot_agent.agents.function_agent_with_retrieval",
+    },
 )
@@ -33,6 +33,7 @@ from erniebot_agent.memory.messages import Message, SystemMessage
 from erniebot_agent.tools.base import BaseTool
 from erniebot_agent.tools.tool_manager import ToolManager
 from erniebot_agent.utils.exceptions import FileError
+from erniebot_agent.utils.json import JSONDecodeError, parse_json
 
 _PLUGINS_WO_FILE_IO: Final[Tuple[str]] = ("eChart",)
 
@@ -268,8 +269,8 @@ class Agent(GradioMixin, BaseAgent[BaseERNIEBot]):
 
     def _parse_tool_args(self, tool_args: str) -> Dict[str, Any]:
         try:
-            args_dict = json.loads(tool_args)
-        except json.JSONDecodeError:
+            args_dict = parse_json(tool_args)
+        except JSONDecodeError:
             raise ValueError(f"`tool_args` cannot be parsed as JSON. `tool_args`: {tool_args}")
 
         if not isinstance(args_dict, dict):
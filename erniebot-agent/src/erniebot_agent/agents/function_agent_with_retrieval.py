@@ -2,6 +2,7 @@ import json
 import logging
 from typing import Any, Dict, List, Optional, Sequence, Type
 
+from erniebot.utils.token_counter import count_tokens
 from pydantic import Field
 
 from erniebot_agent.agents.function_agent import FunctionAgent
@@ -165,7 +166,7 @@ class FunctionAgentWithRetrieval(FunctionAgent):
         docs = []
         token_count = 0
         for doc in results["documents"]:
-            num_tokens = len(doc["content"])
+            num_tokens = count_tokens(doc["content"])
             if token_count + num_tokens > self.token_limit:
                 _logger.warning(
                     "Retrieval results exceed token limit. Truncating retrieval results to "
@@ -12,6 +12,18 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from .erniebot import ERNIEBot
+from typing import TYPE_CHECKING
+
+from erniebot_agent.utils.misc import attach_lazy_attrs
+
+if TYPE_CHECKING:
+    from .erniebot import ERNIEBot
 
 __all__ = ["ERNIEBot"]
+
+__getattr__, __dir__ = attach_lazy_attrs(
+    __name__,
+    {
+        "ERNIEBot": ".erniebot",
+    },
+)
@@ -1,7 +1,18 @@
 from __future__ import annotations
 
-from typing import Any, AsyncIterator, Dict, Iterator, List, Mapping, Optional
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+)
 
+from erniebot import ChatCompletionStreamAccumulator
 from langchain.callbacks.manager import (
     AsyncCallbackManagerForLLMRun,
     CallbackManagerForLLMRun,
@@ -117,15 +128,13 @@ class ErnieBotChat(BaseChatModel):
         **kwargs: Any,
     ) -> ChatResult:
         if self.streaming:
-            chunks = self._stream(messages, stop=stop, run_manager=run_manager, **kwargs)
-            generation: Optional[ChatGenerationChunk] = None
-            for chunk in chunks:
-                if generation is None:
-                    generation = chunk
-                else:
-                    generation += chunk
-            assert generation is not None
-            return ChatResult(generations=[generation])
+            params = self._build_stream_params(messages, stop, kwargs)
+            # The accumulator merges the metadata (e.g. `usage`) that only the
+            # last chunk carries.
+            stream = ChatCompletionStreamAccumulator(self.client.create(**params))
+            for _ in self._iter_chunks(stream, run_manager):
+                pass
+            return self._build_chat_result_from_response(stream.get_response())
         else:
             params = self._invocation_params
             params.update(kwargs)
@@ -145,15 +154,11 @@ class ErnieBotChat(BaseChatModel):
         **kwargs: Any,
     ) -> ChatResult:
         if self.streaming:
-            chunks = self._astream(messages, stop=stop, run_manager=run_manager, **kwargs)
-            generation: Optional[ChatGenerationChunk] = None
-            async for chunk in chunks:
-                if generation is None:
-                    generation = chunk
-                else:
-                    generation += chunk
-            assert generation is not None
-            return ChatResult(generations=[generation])
+            params = self._build_stream_params(messages, stop, kwargs)
+            stream = ChatCompletionStreamAccumulator(await self.client.acreate(**params))
+            async for _ in self._aiter_chunks(stream, run_manager):
+                pass
+            return self._build_chat_result_from_response(stream.get_response())
         else:
             params = self._invocation_params
             params.update(kwargs)
@@ -172,20 +177,8 @@ class ErnieBotChat(BaseChatModel):
         run_manager: Optional[CallbackManagerForLLMRun] = None,
         **kwargs: Any,
     ) -> Iterator[ChatGenerationChunk]:
-        if stop is not None:
-            raise ValueError("Currently, `stop` is not supported when streaming is enabled.")
-        params = self._invocation_params
-        params.update(kwargs)
-        params["messages"] = self._convert_messages_to_dicts(messages)
-        system_prompt = self._build_system_prompt_from_messages(messages)
-        if system_prompt is not None:
-            params["system"] = system_prompt
-        params["stream"] = True
-        for resp in self.client.create(**params):
-            chunk = self._build_chunk_from_response(resp)
-            yield chunk
-            if run_manager:
-                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+        params = self._build_stream_params(messages, stop, kwargs)
+        yield from self._iter_chunks(self.client.create(**params), run_manager)
 
     async def _astream(
         self,
@@ -194,6 +187,31 @@ class ErnieBotChat(BaseChatModel):
         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
         **kwargs: Any,
     ) -> AsyncIterator[ChatGenerationChunk]:
+        params = self._build_stream_params(messages, stop, kwargs)
+        async for chunk in self._aiter_chunks(await self.client.acreate(**params), run_manager):
+            yield chunk
+
+    def _iter_chunks(
+        self, stream: Iterable[Mapping[str, Any]], run_manager: Optional[CallbackManagerForLLMRun]
+    ) -> Iterator[ChatGenerationChunk]:
+        for resp in stream:
+            chunk = self._build_chunk_from_response(resp)
+            yield chunk
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+
+    async def _aiter_chunks(
+        self, stream: AsyncIterable[Mapping[str, Any]], run_manager: Optional[AsyncCallbackManagerForLLMRun]
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        async for resp in stream:
+            chunk = self._build_chunk_from_response(resp)
+            yield chunk
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+
+    def _build_stream_params(
+        self, messages: List[BaseMessage], stop: Optional[List[str]], kwargs: Dict[str, Any]
+    ) -> Dict[str, Any]:
         if stop is not None:
             raise ValueError("Currently, `stop` is not supported when streaming is enabled.")
         params = self._invocation_params
@@ -203,11 +221,7 @@ class ErnieBotChat(BaseChatModel):
         if system_prompt is not None:
             params["system"] = system_prompt
         params["stream"] = True
-        async for resp in await self.client.acreate(**params):
-            chunk = self._build_chunk_from_response(resp)
-            yield chunk
-            if run_manager:
-                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+        return params
 
     def _build_chat_result_from_response(self, response: Mapping[str, Any]) -> ChatResult:
         message_dict = self._build_dict_from_response(response)
@@ -22,6 +22,8 @@ class ErnieEmbeddings(BaseModel, Embeddings):
     client: Any = None
     chunk_size: int = 16
     """Chunk size to use when the input is a list of texts."""
+    max_concurrency: int = 4
+    """Maximum number of chunks to embed concurrently."""
     aistudio_access_token: Optional[str] = None
     """AI Studio access token."""
     max_retries: int = 6
@@ -63,29 +65,28 @@ class ErnieEmbeddings(BaseModel, Embeddings):
         return embeddings[0]
 
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
-        text_in_chunks = [texts[i : i + self.chunk_size] for i in range(0, len(texts), self.chunk_size)]
-        lst = []
-        for chunk in text_in_chunks:
-            resp = self.client.create(
-                _config_={"max_retries": self.max_retries, **self._get_auth_config()},
-                input=chunk,
-                model=self.model,
-            )
-            lst.extend([res["embedding"] for res in resp["data"]])
-        return lst
+        embeddings = self.client.create_many(
+            self.model,
+            texts,
+            max_concurrency=self.max_concurrency,
+            batch_size=self.chunk_size,
+            # Keep the full precision of the embeddings.
+            as_array=False,
+            _config_={"max_retries": self.max_retries, **self._get_auth_config()},
+        )
+        return embeddings
 
     async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
-        text_in_chunks = [texts[i : i + self.chunk_size] for i in range(0, len(texts), self.chunk_size)]
-        lst = []
-        for chunk in text_in_chunks:
-            resp = await self.client.acreate(
-                _config_={"max_retries": self.max_retries, **self._get_auth_config()},
-                input=chunk,
-                model=self.model,
-            )
-            for res in resp["data"]:
-                lst.extend([res["embedding"]])
-        return lst
+        embeddings = await self.client.acreate_many(
+            self.model,
+            texts,
+            max_concurrency=self.max_concurrency,
+            batch_size=self.chunk_size,
+            # Keep the full precision of the embeddings.
+            as_array=False,
+            _config_={"max_retries": self.max_retries, **self._get_auth_config()},
+        )
+        return embeddings
 
     def _get_auth_config(self) -> dict:
         return {"api_type": "aistudio", "access_token": self.aistudio_access_token}
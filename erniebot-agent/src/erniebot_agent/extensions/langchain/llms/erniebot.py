@@ -1,7 +1,18 @@
 from __future__ import annotations
 
-from typing import Any, AsyncIterator, Dict, Iterator, List, Mapping, Optional
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+)
 
+from erniebot import ChatCompletionStreamAccumulator
 from langchain.callbacks.manager import (
     AsyncCallbackManagerForLLMRun,
     CallbackManagerForLLMRun,
@@ -103,10 +114,12 @@ class ErnieBot(LLM):
         **kwargs: Any,
     ) -> str:
         if self.streaming:
-            text = ""
-            for chunk in self._stream(prompt, stop, run_manager, **kwargs):
-                text += chunk.text
-            return text
+            params = self._build_stream_params(prompt, stop, kwargs)
+            # The accumulator joins the texts of the chunks in linear time.
+            stream = ChatCompletionStreamAccumulator(self.client.create(**params))
+            for _ in self._iter_chunks(stream, run_manager):
+                pass
+            return stream.text
         else:
             params = self._invocation_params
             params.update(kwargs)
@@ -126,10 +139,11 @@ class ErnieBot(LLM):
         **kwargs: Any,
     ) -> str:
         if self.streaming:
-            text = ""
-            async for chunk in self._astream(prompt, stop, run_manager, **kwargs):
-                text += chunk.text
-            return text
+            params = self._build_stream_params(prompt, stop, kwargs)
+            stream = ChatCompletionStreamAccumulator(await self.client.acreate(**params))
+            async for _ in self._aiter_chunks(stream, run_manager):
+                pass
+            return stream.text
         else:
             params = self._invocation_params
             params.update(kwargs)
@@ -148,17 +162,8 @@ class ErnieBot(LLM):
         run_manager: Optional[CallbackManagerForLLMRun] = None,
         **kwargs: Any,
     ) -> Iterator[GenerationChunk]:
-        if stop is not None:
-            raise ValueError("Currently, `stop` is not supported when streaming is enabled.")
-        params = self._invocation_params
-        params.update(kwargs)
-        params["messages"] = [self._build_user_message_from_prompt(prompt)]
-        params["stream"] = True
-        for resp in self.client.create(**params):
-            chunk = self._build_chunk_from_response(resp)
-            yield chunk
-            if run_manager:
-                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+        params = self._build_stream_params(prompt, stop, kwargs)
+        yield from self._iter_chunks(self.client.create(**params), run_manager)
 
     async def _astream(
         self,
@@ -167,17 +172,38 @@ class ErnieBot(LLM):
         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
         **kwargs: Any,
     ) -> AsyncIterator[GenerationChunk]:
+        params = self._build_stream_params(prompt, stop, kwargs)
+        async for chunk in self._aiter_chunks(await self.client.acreate(**params), run_manager):
+            yield chunk
+
+    def _iter_chunks(
+        self, stream: Iterable[Mapping[str, Any]], run_manager: Optional[CallbackManagerForLLMRun]
+    ) -> Iterator[GenerationChunk]:
+        for resp in stream:
+            chunk = self._build_chunk_from_response(resp)
+            yield chunk
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+
+    async def _aiter_chunks(
+        self, stream: AsyncIterable[Mapping[str, Any]], run_manager: Optional[AsyncCallbackManagerForLLMRun]
+    ) -> AsyncIterator[GenerationChunk]:
+        async for resp in stream:
+            chunk = self._build_chunk_from_response(resp)
+            yield chunk
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+
+    def _build_stream_params(
+        self, prompt: str, stop: Optional[List[str]], kwargs: Dict[str, Any]
+    ) -> Dict[str, Any]:
         if stop is not None:
-            raise TypeError("Currently, `stop` is not supported when streaming is enabled.")
+            raise ValueError("Currently, `stop` is not supported when streaming is enabled.")
         params = self._invocation_params
         params.update(kwargs)
         params["messages"] = [self._build_user_message_from_prompt(prompt)]
         params["stream"] = True
-        async for resp in await self.client.acreate(**params):
-            chunk = self._build_chunk_from_response(resp)
-            yield chunk
-            if run_manager:
-                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+        return params
 
     def _build_chunk_from_response(self, response: Mapping[str, Any]) -> GenerationChunk:
         return GenerationChunk(text=response["result"])
@@ -54,6 +54,34 @@ Examples:
     >>>     await local_file.write_contents_to('your_willing_path') # save to location you want
 """
 
-from erniebot_agent.file.file_manager import File, FileManager, get_default_file_manager
-from erniebot_agent.file.global_file_manager_handler import GlobalFileManagerHandler
-from erniebot_agent.file.remote_file import AIStudioFileClient
+from typing import TYPE_CHECKING
+
+from erniebot_agent.utils.misc import attach_lazy_attrs
+
+if TYPE_CHECKING:
+    from erniebot_agent.file.file_manager import (
+        File,
+        FileManager,
+        get_default_file_manager,
+    )
+    from erniebot_agent.file.global_file_manager_handler import GlobalFileManagerHandler
+    from erniebot_agent.file.remote_file import AIStudioFileClient
+
+__all__ = [
+    "File",
+    "FileManager",
+    "get_default_file_manager",
+    "GlobalFileManagerHandler",
+    "AIStudioFileClient",
+]
+
+__getattr__, __dir__ = attach_lazy_attrs(
+    __name__,
+    {
+        "File": "erniebot_agent.file.file_manager",
+        "FileManager": "erniebot_agent.file.file_manager",
+        "get_default_file_manager": "erniebot_agent.file.file_manager",
+        "GlobalFileManagerHandler": "erniebot_agent.file.global_file_manager_handler",
+        "AIStudioFileClient": "erniebot_agent.file.remote_file",
+    },
+)
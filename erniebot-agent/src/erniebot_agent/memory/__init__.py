@@ -12,15 +12,49 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from .base import Memory
-from .limit_tokens_memory import LimitTokensMemory
-from .messages import (
-    AIMessage,
-    AIMessageChunk,
-    FunctionMessage,
-    HumanMessage,
-    Message,
-    SystemMessage,
+from typing import TYPE_CHECKING
+
+from erniebot_agent.utils.misc import attach_lazy_attrs
+
+if TYPE_CHECKING:
+    from .base import Memory
+    from .limit_tokens_memory import LimitTokensMemory
+    from .messages import (
+        AIMessage,
+        AIMessageChunk,
+        FunctionMessage,
+        HumanMessage,
+        Message,
+        SystemMessage,
+    )
+    from .sliding_window_memory import SlidingWindowMemory
+    from .whole_memory import WholeMemory
+
+__all__ = [
+    "Memory",
+    "LimitTokensMemory",
+    "AIMessage",
+    "AIMessageChunk",
+    "FunctionMessage",
+    "HumanMessage",
+    "Message",
+    "SystemMessage",
+    "SlidingWindowMemory",
+    "WholeMemory",
+]
+
+__getattr__, __dir__ = attach_lazy_attrs(
+    __name__,
+    {
+        "Memory": ".base",
+        "LimitTokensMemory": ".limit_tokens_memory",
+        "AIMessage": ".messages",
+        "AIMessageChunk": ".messages",
+        "FunctionMessage": ".messages",
+        "HumanMessage": ".messages",
+        "Message": ".messages",
+        "SystemMessage": ".messages",
+        "SlidingWindowMemory": ".sliding_window_memory",
+        "WholeMemory": ".whole_memory",
+    },
 )
-from .sliding_window_memory import SlidingWindowMemory
-from .whole_memory import WholeMemory
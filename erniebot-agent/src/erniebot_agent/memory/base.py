@@ -15,6 +15,8 @@
 import logging
 from typing import List, Optional, Union
 
+from erniebot.utils.token_counter import count_tokens
+
 from erniebot_agent.memory.messages import AIMessage, Message, SystemMessage
 
 _logger = logging.getLogger(__name__)
@@ -64,7 +66,7 @@ class MessageManager:
 
     def update_last_message_token_count(self, token_count: int):
         if token_count == 0:
-            self.messages[-1].token_count = len(self.messages[-1].content)
+            self.messages[-1].token_count = count_tokens(self.messages[-1].content)
         else:
             self.messages[-1].token_count = token_count
 
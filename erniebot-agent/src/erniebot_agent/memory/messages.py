@@ -11,13 +11,16 @@
 # limitations under the License
 
 import logging
-from typing import Dict, List, Optional, Sequence, TypedDict
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, TypedDict
 
-import erniebot.utils.token_helper as token_helper
+from erniebot.utils.token_counter import count_tokens
 from typing_extensions import Self
 
-from erniebot_agent.file import File, protocol
-from erniebot_agent.file.remote_file import RemoteFile
+from erniebot_agent.file import protocol
+
+if TYPE_CHECKING:
+    # The file classes depend on aiohttp, which is slow to import.
+    from erniebot_agent.file import File
 
 _logger = logging.getLogger(__name__)
 
@@ -134,7 +137,7 @@ class SystemMessage(Message):
         >>> SystemMessage("you are an assistant useful for ocr.").to_dict()
         {'role': 'system', 'content': 'you are an assistant useful for ocr.'}
         >>> SystemMessage("you are an assistant useful for ocr.").token_count
-        2
+        9
         >>> SystemMessage("you are an assistant useful for ocr.").token_count = 3
         >>> SystemMessage("you are an assistant useful for ocr.").token_count
         3
@@ -142,7 +145,7 @@ class SystemMessage(Message):
     """
 
     def __init__(self, content: str):
-        super().__init__(role="system", content=content, token_count=len(content))
+        super().__init__(role="system", content=content, token_count=count_tokens(content))
 
 
 class HumanMessage(Message):
@@ -175,7 +178,7 @@ class HumanMessage(Message):
 
     @classmethod
     async def create_with_files(
-        cls, text: str, files: Sequence[File], *, include_file_urls: bool = False
+        cls, text: str, files: Sequence["File"], *, include_file_urls: bool = False
     ) -> Self:
         """
         create a Human Message with file input
@@ -192,13 +195,15 @@ class HumanMessage(Message):
             RuntimeError: Only `RemoteFile` objects can set include_file_urls as True.
         """
 
-        def _get_file_reprs(files: Sequence[File]) -> List[str]:
+        def _get_file_reprs(files: Sequence["File"]) -> List[str]:
             file_reprs: List[str] = []
             for file in files:
                 file_reprs.append(file.get_file_repr())
             return file_reprs
 
-        async def _create_file_reprs_with_urls(files: Sequence[File]) -> List[str]:
+        async def _create_file_reprs_with_urls(files: Sequence["File"]) -> List[str]:
+            from erniebot_agent.file.remote_file import RemoteFile
+
             file_reprs = []
             for file in files:
                 if not isinstance(file, RemoteFile):
@@ -273,7 +278,7 @@ class AIMessage(Message):
     ):
         if token_usage is None:
             prompt_tokens = 0
-            completion_tokens = token_helper.approx_num_tokens(content)
+            completion_tokens = count_tokens(content)
         else:
             prompt_tokens, completion_tokens = self._parse_token_count(token_usage)
         super().__init__(role="assistant", content=content, token_count=completion_tokens)
@@ -12,5 +12,20 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from .base import BasePromptTemplate
-from .prompt_template import PromptTemplate
+from typing import TYPE_CHECKING
+
+from erniebot_agent.utils.misc import attach_lazy_attrs
+
+if TYPE_CHECKING:
+    from .base import BasePromptTemplate
+    from .prompt_template import PromptTemplate
+
+__all__ = ["BasePromptTemplate", "PromptTemplate"]
+
+__getattr__, __dir__ = attach_lazy_attrs(
+    __name__,
+    {
+        "BasePromptTemplate": ".base",
+        "PromptTemplate": ".prompt_template",
+    },
+)
@@ -12,7 +12,24 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from .base import Tool
-from .chat_with_eb import ChatWithEB
-from .image_generation_tool import ImageGenerationTool
-from .remote_toolkit import RemoteToolkit
+from typing import TYPE_CHECKING
+
+from erniebot_agent.utils.misc import attach_lazy_attrs
+
+if TYPE_CHECKING:
+    from .base import Tool
+    from .chat_with_eb import ChatWithEB
+    from .image_generation_tool import ImageGenerationTool
+    from .remote_toolkit import RemoteToolkit
+
+__all__ = ["Tool", "ChatWithEB", "ImageGenerationTool", "RemoteToolkit"]
+
+__getattr__, __dir__ = attach_lazy_attrs(
+    __name__,
+    {
+        "Tool": ".base",
+        "ChatWithEB": ".chat_with_eb",
+        "ImageGenerationTool": ".image_generation_tool",
+        "RemoteToolkit": ".remote_toolkit",
+    },
+)
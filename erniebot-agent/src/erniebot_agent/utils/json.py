@@ -12,17 +12,24 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import json
-from typing import Any
+from typing import Any, Union
+
+from erniebot.utils import json_codec
+
+JSONDecodeError = json_codec.JSONDecodeError
+
+
+def parse_json(data: Union[str, bytes]) -> Any:
+    return json_codec.loads(data)
 
 
 def to_compact_json(obj: Any, *, from_json: bool = False) -> str:
     if from_json:
-        obj = json.loads(obj)
-    return json.dumps(obj, ensure_ascii=False, sort_keys=False, separators=(",", ":"))
+        obj = json_codec.loads(obj)
+    return json_codec.dumps(obj).decode("utf-8")
 
 
 def to_pretty_json(obj: Any, *, from_json: bool = False) -> str:
     if from_json:
-        obj = json.loads(obj)
-    return json.dumps(obj, ensure_ascii=False, sort_keys=False, indent=2)
+        obj = json_codec.loads(obj)
+    return json_codec.dumps(obj, indent=True).decode("utf-8")
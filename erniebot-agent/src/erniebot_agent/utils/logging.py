@@ -14,13 +14,15 @@
 
 import logging
 import re
-from typing import Dict, List, Optional, Union
+from typing import TYPE_CHECKING, Dict, List, Optional, Union
 
-from erniebot_agent.memory.messages import FunctionMessage, Message
 from erniebot_agent.utils import config_from_environ as C
 from erniebot_agent.utils.json import to_pretty_json
 from erniebot_agent.utils.output_style import ColoredContent
 
+if TYPE_CHECKING:
+    from erniebot_agent.memory.messages import Message
+
 __all__ = ["set_role_color", "setup_logging"]
 
 
@@ -98,8 +100,11 @@ class FileFormatter(logging.Formatter):
             log_message += to_pretty_json(output)
         return log_message
 
-    def extract_content(self, text: Union[Message, str], output: list) -> List[dict]:
+    def extract_content(self, text: Union["Message", str], output: list) -> List[dict]:
         """Extract the content from message and convert to json format."""
+        # Imported here to keep `setup_logging` cheap to import.
+        from erniebot_agent.memory.messages import Message
+
         if isinstance(text, Message):
             # Message type
             chat_res, func_res = self.handle_message(text)
@@ -112,6 +117,8 @@ class FileFormatter(logging.Formatter):
             return []
 
     def handle_message(self, message):
+        from erniebot_agent.memory.messages import FunctionMessage
+
         if isinstance(message, FunctionMessage):
             func_dict = {
                 "name": message.name,
@@ -13,6 +13,11 @@
 # limitations under the License.
 
 
+import importlib
+import sys
+from typing import Any, Callable, Dict, List, Tuple
+
+
 class SingletonMeta(type):
     _insts = {}  # type: ignore
 
@@ -25,3 +30,29 @@ class SingletonMeta(type):
             if cls not in cls._insts:
                 cls._insts[cls] = super().__call__(*args, **kwargs)
         return cls._insts[cls]
+
+
+def attach_lazy_attrs(
+    package_name: str, lazy_attrs: Dict[str, str]
+) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """Creates the module-level `__getattr__` and `__dir__` of a package.
+
+    The attributes in `lazy_attrs`, which maps attribute names to the
+    (relative) names of the modules that define them, are imported on first
+    access (PEP 562). This keeps importing the package cheap when only a part
+    of it is used.
+    """
+
+    def __getattr__(name: str) -> Any:
+        if name not in lazy_attrs:
+            raise AttributeError(f"module '{package_name}' has no attribute '{name}'")
+        module = importlib.import_module(lazy_attrs[name], package_name)
+        value = getattr(module, name)
+        # Cache the attribute, so that `__getattr__` is not called again.
+        setattr(sys.modules[package_name], name, value)
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(sys.modules[package_name])) | lazy_attrs.keys())
+
+    return __getattr__, __dir__
@@ -0,0 +1,75 @@
+import subprocess
+import sys
+import unittest
+from typing import Dict
+
+# Third-party modules that must only be imported when the features that need
+# them are used.
+HEAVY_MODULES = (
+    "aiohttp",
+    "anyio",
+    "jinja2",
+    "jsonschema",
+    "langchain",
+    "numpy",
+    "pydantic",
+    "requests",
+    "tenacity",
+    "yaml",
+)
+# Generous upper bound on the cumulative import time of a top-level package,
+# in microseconds. Eagerly importing all submodules takes several times as
+# long.
+IMPORT_TIME_BUDGET_US = 300_000
+
+
+def _measure_import(module: str) -> Dict[str, int]:
+    """Imports a module in a fresh interpreter and returns the cumulative
+    import time of every module that was loaded."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if not cumulative.strip().isdigit():
+            # Header line
+            continue
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+class TestImportTime(unittest.TestCase):
+    def _check_import(self, module: str) -> None:
+        times = _measure_import(module)
+        self.assertIn(module, times)
+        imported_heavy_modules = [name for name in HEAVY_MODULES if name in times]
+        self.assertEqual(
+            imported_heavy_modules, [], f"`import {module}` should not import {imported_heavy_modules}."
+        )
+        self.assertLess(times[module], IMPORT_TIME_BUDGET_US)
+
+    def test_import_erniebot(self):
+        self._check_import("erniebot")
+
+    def test_import_erniebot_agent(self):
+        self._check_import("erniebot_agent")
+
+    def test_lazy_attributes(self):
+        code = (
+            "import sys, erniebot, erniebot_agent.tools; "
+            "assert 'aiohttp' not in sys.modules; "
+            "erniebot.ChatCompletion; erniebot_agent.tools.Tool; "
+            "assert 'ChatCompletion' in dir(erniebot); "
+            "assert 'aiohttp' in sys.modules"
+        )
+        subprocess.run([sys.executable, "-c", code], check=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
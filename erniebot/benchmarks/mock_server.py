@@ -0,0 +1,376 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""A local stand-in for the ERNIE Bot services.
+
+The server speaks the wire protocols of the Qianfan, AI Studio, Yinian and
+custom backends of the SDK, so that the SDK can be exercised without network
+access or credentials. Each backend is served under the path prefix of its
+real base URL (see `BASE_PATHS`), and the SDK can be pointed at the server
+with `api_base_url`, e.g.:
+
+    erniebot.api_type = "qianfan"
+    erniebot.api_base_url = "http://127.0.0.1:8000/rpc/2.0/ai_custom/v1/wenxinworkshop"
+    erniebot.access_token = "mock-token"
+
+Responses are synthetic. Latencies, the number of chunks in streamed
+responses, and the rates of injected faults are configurable on the command
+line, and can be overridden for a single request with the `X-Mock-Latency`,
+`X-Mock-Chunks` and `X-Mock-Fault` headers.
+"""
+
+import argparse
+import asyncio
+import dataclasses
+import itertools
+import json
+import random
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+__all__ = ["BASE_PATHS", "FAULT_KINDS", "MockServerConfig", "MockServer"]
+
+BASE_PATHS = {
+    "qianfan": "/rpc/2.0/ai_custom/v1/wenxinworkshop",
+    "aistudio": "/llm/lmapi/v1",
+    "custom": "/custom",
+    "yinian": "/rpc/2.0/ernievilg/v1",
+}
+# The services report most errors in the response body with status 200. Rate
+# limiting (the equivalent of HTTP 429) and token expiration are reported that
+# way, while `server_error` produces a 5xx status.
+FAULT_KINDS = ("rate_limit", "token_expired", "server_error")
+
+_ERROR_CODES = {
+    "invalid_token": (110, "Access token invalid or no longer valid"),
+    "token_expired": (111, "Access token expired"),
+    "rate_limit": (18, "Open api qps request limit reached"),
+}
+_EMBEDDING_DIM = 384
+_FILLER_TEXT = "这是一段由模拟服务器生成的回复文本。"
+
+_HandlerType = Callable[[str, web.Request, Dict[str, Any], float], Awaitable[web.StreamResponse]]
+
+
+@dataclasses.dataclass
+class MockServerConfig(object):
+    # Time to wait before responding, in seconds. For streamed responses,
+    # this is the time to the first chunk.
+    latency: float = 0.0
+    # Time between consecutive chunks of streamed responses, in seconds
+    chunk_interval: float = 0.0
+    # Number of chunks in streamed responses
+    num_chunks: int = 8
+    # Number of characters in each chunk or non-streamed result
+    chunk_size: int = 16
+    # Time for an image generation task to complete, in seconds
+    task_duration: float = 1.0
+    # Probabilities of injecting each kind of fault into a request
+    fault_rates: Dict[str, float] = dataclasses.field(default_factory=dict)
+    seed: Optional[int] = None
+
+
+class MockServer(object):
+    """Serves synthetic responses in the formats of the ERNIE Bot services.
+
+    Args:
+        config: Behavior of the server.
+        host: Host to listen on.
+        port: Port to listen on. If 0, an unused port is chosen.
+    """
+
+    def __init__(self, config: Optional[MockServerConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        super().__init__()
+        self.config = config if config is not None else MockServerConfig()
+        for kind in self.config.fault_rates:
+            if kind not in FAULT_KINDS:
+                raise ValueError(f"Unknown kind of fault: {kind}")
+        self.host = host
+        self.port = port
+        self._rng = random.Random(self.config.seed)
+        self._ids = itertools.count(1)
+        self._tasks: Dict[int, float] = {}
+        self._embeddings: Dict[str, List[float]] = {}
+        self._stats: Dict[str, int] = {"requests": 0, "faults": 0}
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def base_url(self, api_type: str) -> str:
+        """Returns the URL to use as `api_base_url` for an API type."""
+        return self.url + BASE_PATHS[api_type]
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        for api_type in ("qianfan", "aistudio", "custom"):
+            prefix = BASE_PATHS[api_type]
+            app.router.add_post(prefix + "/chat/{model_id}", self._make_handler(api_type, self._chat))
+            app.router.add_post(
+                prefix + "/embeddings/{model_id}", self._make_handler(api_type, self._embedding)
+            )
+        prefix = BASE_PATHS["yinian"]
+        app.router.add_post(prefix + "/txt2imgv2", self._make_handler("yinian", self._paint))
+        app.router.add_post(prefix + "/getImgv2", self._make_handler("yinian", self._fetch_image))
+        app.router.add_get("/stats", self._get_stats)
+        return app
+
+    async def start(self) -> None:
+        self._runner = web.AppRunner(self.make_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        if self.port == 0:
+            self.port = self._runner.addresses[0][1]
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def _make_handler(
+        self, api_type: str, handler: _HandlerType
+    ) -> Callable[[web.Request], Awaitable[web.StreamResponse]]:
+        async def _handle(request: web.Request) -> web.StreamResponse:
+            self._stats["requests"] += 1
+            params = await request.json()
+            error = self._check_auth(api_type, request)
+            if error is None:
+                error = self._pick_fault(request)
+                if error is not None:
+                    self._stats["faults"] += 1
+            latency = float(request.headers.get("X-Mock-Latency", self.config.latency))
+            if error == "server_error":
+                await asyncio.sleep(latency)
+                status = self._rng.choice((500, 502, 503))
+                return web.json_response(
+                    {"error_code": 336000, "error_msg": "Internal error"}, status=status
+                )
+            elif error is not None:
+                await asyncio.sleep(latency)
+                return web.json_response(self._make_error_body(api_type, error))
+            return await handler(api_type, request, params, latency)
+
+        return _handle
+
+    def _check_auth(self, api_type: str, request: web.Request) -> Optional[str]:
+        if api_type in ("qianfan", "yinian"):
+            token = request.query.get("access_token", "")
+        elif api_type == "aistudio":
+            token = request.headers.get("Authorization", "").partition("token ")[2]
+        else:
+            # The custom backend does not authenticate.
+            return None
+        return None if token else "invalid_token"
+
+    def _pick_fault(self, request: web.Request) -> Optional[str]:
+        fault = request.headers.get("X-Mock-Fault", None)
+        if fault is not None:
+            if fault not in FAULT_KINDS:
+                raise web.HTTPBadRequest(text=f"Unknown kind of fault: {fault}")
+            return fault
+        for kind, rate in self.config.fault_rates.items():
+            if self._rng.random() < rate:
+                return kind
+        return None
+
+    async def _chat(
+        self, api_type: str, request: web.Request, params: Dict[str, Any], latency: float
+    ) -> web.StreamResponse:
+        prompt_tokens = sum(len(message.get("content", "")) for message in params.get("messages", []))
+        if not params.get("stream", False):
+            await asyncio.sleep(latency)
+            result = self._make_text(self.config.chunk_size)
+            body = self._make_chat_body(result, prompt_tokens, len(result))
+            body.update(is_truncated=False, need_clear_history=False)
+            return web.json_response(self._wrap(api_type, body))
+
+        num_chunks = int(request.headers.get("X-Mock-Chunks", self.config.num_chunks))
+        resp = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await resp.prepare(request)
+        await asyncio.sleep(latency)
+        completion_tokens = 0
+        for i in range(num_chunks):
+            if i > 0 and self.config.chunk_interval > 0:
+                await asyncio.sleep(self.config.chunk_interval)
+            result = self._make_text(self.config.chunk_size)
+            completion_tokens += len(result)
+            body = self._make_chat_body(result, prompt_tokens, completion_tokens)
+            body.update(sentence_id=i, is_end=i == num_chunks - 1, is_truncated=False)
+            data = json.dumps(self._wrap(api_type, body), ensure_ascii=False)
+            await resp.write(b"data: " + data.encode("utf-8") + b"\n\n")
+        await resp.write_eof()
+        return resp
+
+    async def _embedding(
+        self, api_type: str, request: web.Request, params: Dict[str, Any], latency: float
+    ) -> web.StreamResponse:
+        await asyncio.sleep(latency)
+        data = []
+        for i, text in enumerate(params["input"]):
+            embedding = self._embeddings.get(text, None)
+            if embedding is None:
+                rng = random.Random(text)
+                embedding = [rng.uniform(-1, 1) for _ in range(_EMBEDDING_DIM)]
+                # Generating embeddings is not what is being measured.
+                self._embeddings[text] = embedding
+            data.append({"object": "embedding", "embedding": embedding, "index": i})
+        num_tokens = sum(len(text) for text in params["input"])
+        body = {
+            "id": f"as-{next(self._ids)}",
+            "object": "embedding_list",
+            "created": int(time.time()),
+            "data": data,
+            "usage": {"prompt_tokens": num_tokens, "total_tokens": num_tokens},
+        }
+        return web.json_response(self._wrap(api_type, body))
+
+    async def _paint(
+        self, api_type: str, request: web.Request, params: Dict[str, Any], latency: float
+    ) -> web.StreamResponse:
+        await asyncio.sleep(latency)
+        task_id = next(self._ids)
+        self._tasks[task_id] = time.monotonic()
+        return web.json_response(
+            {"log_id": next(self._ids), "data": {"primary_task_id": task_id, "task_id": task_id}}
+        )
+
+    async def _fetch_image(
+        self, api_type: str, request: web.Request, params: Dict[str, Any], latency: float
+    ) -> web.StreamResponse:
+        await asyncio.sleep(latency)
+        task_id = int(params["task_id"])
+        if task_id not in self._tasks:
+            return web.json_response({"error_code": 282004, "error_msg": "invalid task_id"})
+        elapsed = time.monotonic() - self._tasks[task_id]
+        progress = min(elapsed / self.config.task_duration, 1.0) if self.config.task_duration > 0 else 1.0
+        done = progress >= 1.0
+        data: Dict[str, Any] = {
+            "task_id": task_id,
+            "task_status": "SUCCESS" if done else "RUNNING",
+            "task_progress": progress,
+            "sub_task_result_list": [],
+        }
+        if done:
+            image = {"img_approve_conclusion": "pass", "img_url": f"{self.url}/images/{task_id}.png"}
+            data["sub_task_result_list"].append(
+                {"sub_task_status": "SUCCESS", "sub_task_progress": 1, "final_image_list": [image]}
+            )
+        return web.json_response({"log_id": next(self._ids), "data": data})
+
+    async def _get_stats(self, request: web.Request) -> web.StreamResponse:
+        return web.json_response(self._stats)
+
+    def _make_text(self, length: int) -> str:
+        start = self._rng.randrange(len(_FILLER_TEXT))
+        return (_FILLER_TEXT[start:] + _FILLER_TEXT * (length // len(_FILLER_TEXT) + 1))[:length]
+
+    def _make_chat_body(self, result: str, prompt_tokens: int, completion_tokens: int) -> Dict[str, Any]:
+        return {
+            "id": f"as-{next(self._ids)}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "result": result,
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    @staticmethod
+    def _wrap(api_type: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        if api_type == "aistudio":
+            return {"errorCode": 0, "errorMsg": "success", "logId": body.get("id", ""), "result": body}
+        return body
+
+    @staticmethod
+    def _make_error_body(api_type: str, error: str) -> Dict[str, Any]:
+        ecode, emsg = _ERROR_CODES[error]
+        if api_type == "aistudio":
+            return {"errorCode": ecode, "errorMsg": emsg}
+        return {"error_code": ecode, "error_msg": emsg}
+
+
+def parse_fault_rate(arg: str) -> Tuple[str, float]:
+    kind, sep, rate = arg.partition("=")
+    if not sep or kind not in FAULT_KINDS:
+        raise argparse.ArgumentTypeError(f"Expected KIND=RATE with KIND in {FAULT_KINDS}, got {arg!r}.")
+    return kind, float(rate)
+
+
+def add_server_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency", type=float, default=0.0, help="Response latency, in seconds.")
+    parser.add_argument(
+        "--chunk-interval", type=float, default=0.0, help="Interval between streamed chunks, in seconds."
+    )
+    parser.add_argument("--num-chunks", type=int, default=8, help="Number of chunks in streamed responses.")
+    parser.add_argument("--chunk-size", type=int, default=16, help="Number of characters in each chunk.")
+    parser.add_argument(
+        "--task-duration", type=float, default=1.0, help="Duration of image generation tasks, in seconds."
+    )
+    parser.add_argument(
+        "--fault-rate",
+        type=parse_fault_rate,
+        action="append",
+        default=[],
+        metavar="KIND=RATE",
+        help=f"Probability of injecting a fault into a request. KIND is one of {', '.join(FAULT_KINDS)}.",
+    )
+    parser.add_argument("--seed", type=int, default=None, help="Seed of the random number generator.")
+
+
+def config_from_args(args: argparse.Namespace) -> MockServerConfig:
+    return MockServerConfig(
+        latency=args.latency,
+        chunk_interval=args.chunk_interval,
+        num_chunks=args.num_chunks,
+        chunk_size=args.chunk_size,
+        task_duration=args.task_duration,
+        fault_rates=dict(args.fault_rate),
+        seed=args.seed,
+    )
+
+
+async def _serve(server: MockServer) -> None:
+    await server.start()
+    # The benchmark runner reads the address from the first line of output.
+    print(f"Serving on {server.url}", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local stand-in for the ERNIE Bot services.")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Host to listen on.")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on. 0 picks an unused port.")
+    add_server_arguments(parser)
+    args = parser.parse_args()
+    server = MockServer(config_from_args(args), host=args.host, port=args.port)
+    try:
+        asyncio.run(_serve(server))
+    except KeyboardInterrupt:
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,434 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Measures the overhead of the SDK against the local mock server.
+
+The mock server runs in a subprocess, so that the CPU time and memory
+measured in this process are spent by the SDK alone. With the default zero
+server latency, the measured latencies are dominated by the SDK and the
+loopback network.
+
+Usage:
+
+    python run_benchmarks.py --output results.json
+    python run_benchmarks.py --baseline results.json --output new_results.json
+"""
+
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import datetime
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from mock_server import BASE_PATHS, add_server_arguments
+
+import erniebot
+from erniebot.session_pool import aclose_sessions
+
+SCENARIOS = ("chat", "chat_stream", "embedding")
+MODES = ("sync", "async")
+# Metrics that are compared against the baseline, and whether larger values
+# are better.
+TRACKED_METRICS = {
+    "requests_per_sec": True,
+    "cpu_secs_per_request": False,
+    "latency_p50_secs": False,
+    "latency_p99_secs": False,
+    "ttft_p50_secs": False,
+    "memory_bytes_per_stream": False,
+}
+
+_MESSAGES = [
+    {"role": "user", "content": "请问你是谁？"},
+    {"role": "assistant", "content": "我是文心一言，可以协助您完成范围广泛的任务并提供有关各种主题的信息。"},
+    {"role": "user", "content": "我在深圳，周末可以去哪里玩？"},
+]
+_EMBEDDING_INPUT = [f"第{i}段需要编码的文本，用于测试批量请求。" for i in range(16)]
+
+
+class _Sample(object):
+    __slots__ = ("latency", "ttft", "error")
+
+    def __init__(self, latency: float, ttft: Optional[float] = None, error: Optional[str] = None) -> None:
+        super().__init__()
+        self.latency = latency
+        self.ttft = ttft
+        self.error = error
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(int(round(q / 100 * (len(values) - 1))), len(values) - 1)
+    return values[index]
+
+
+def _run_once(scenario: str, config: Dict[str, Any]) -> _Sample:
+    start = time.perf_counter()
+    ttft = None
+    try:
+        if scenario == "chat":
+            erniebot.ChatCompletion.create(model="ernie-3.5", messages=_MESSAGES, _config_=config)
+        elif scenario == "chat_stream":
+            for _ in erniebot.ChatCompletion.create(
+                model="ernie-3.5", messages=_MESSAGES, stream=True, _config_=config
+            ):
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+        elif scenario == "embedding":
+            erniebot.Embedding.create(model="ernie-text-embedding", input=_EMBEDDING_INPUT, _config_=config)
+        else:
+            raise ValueError(f"Unknown scenario: {scenario}")
+    except erniebot.errors.EBError as e:
+        return _Sample(time.perf_counter() - start, error=type(e).__name__)
+    return _Sample(time.perf_counter() - start, ttft=ttft)
+
+
+async def _arun_once(scenario: str, config: Dict[str, Any]) -> _Sample:
+    start = time.perf_counter()
+    ttft = None
+    try:
+        if scenario == "chat":
+            await erniebot.ChatCompletion.acreate(model="ernie-3.5", messages=_MESSAGES, _config_=config)
+        elif scenario == "chat_stream":
+            stream = await erniebot.ChatCompletion.acreate(
+                model="ernie-3.5", messages=_MESSAGES, stream=True, _config_=config
+            )
+            async for _ in stream:
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+        elif scenario == "embedding":
+            await erniebot.Embedding.acreate(
+                model="ernie-text-embedding", input=_EMBEDDING_INPUT, _config_=config
+            )
+        else:
+            raise ValueError(f"Unknown scenario: {scenario}")
+    except erniebot.errors.EBError as e:
+        return _Sample(time.perf_counter() - start, error=type(e).__name__)
+    return _Sample(time.perf_counter() - start, ttft=ttft)
+
+
+def _run_sync(scenario: str, config: Dict[str, Any], num_requests: int, concurrency: int) -> List[_Sample]:
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(lambda _: _run_once(scenario, config), range(num_requests)))
+
+
+def _run_async(scenario: str, config: Dict[str, Any], num_requests: int, concurrency: int) -> List[_Sample]:
+    async def _run_all() -> List[_Sample]:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _run_one() -> _Sample:
+            async with semaphore:
+                return await _arun_once(scenario, config)
+
+        try:
+            return await asyncio.gather(*(_run_one() for _ in range(num_requests)))
+        finally:
+            await aclose_sessions()
+
+    return asyncio.run(_run_all())
+
+
+_RUNNERS: Dict[str, Callable[[str, Dict[str, Any], int, int], List[_Sample]]] = {
+    "sync": _run_sync,
+    "async": _run_async,
+}
+
+
+def _measure_stream_memory(mode: str, config: Dict[str, Any], concurrency: int) -> float:
+    """Returns the peak memory allocated by the SDK for a stream, when
+    `concurrency` streams are open at the same time."""
+    # Tracing slows down allocations considerably, so memory is measured in a
+    # separate pass. Only allocations made after tracing starts are counted.
+    tracemalloc.start()
+    try:
+        _RUNNERS[mode]("chat_stream", config, concurrency, concurrency)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return peak / concurrency
+
+
+def run_benchmark(
+    scenario: str, mode: str, config: Dict[str, Any], *, num_requests: int, concurrency: int, warmup: int
+) -> Dict[str, Any]:
+    runner = _RUNNERS[mode]
+    # Warm up connection pools, caches and lazily imported modules.
+    runner(scenario, config, warmup, concurrency)
+
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    samples = runner(scenario, config, num_requests, concurrency)
+    duration = time.perf_counter() - start
+    cpu_time = time.process_time() - cpu_start
+
+    latencies = [sample.latency for sample in samples if sample.error is None]
+    ttfts = [sample.ttft for sample in samples if sample.ttft is not None]
+    errors = collections.Counter(sample.error for sample in samples if sample.error is not None)
+    result: Dict[str, Any] = {
+        "scenario": scenario,
+        "mode": mode,
+        "num_requests": num_requests,
+        "concurrency": concurrency,
+        "num_errors": sum(errors.values()),
+        "errors": dict(errors),
+        "duration_secs": duration,
+        "requests_per_sec": num_requests / duration,
+        # CPU time of all threads in this process, which does not include the
+        # mock server.
+        "cpu_secs_per_request": cpu_time / num_requests,
+        "latency_p50_secs": _percentile(latencies, 50),
+        "latency_p90_secs": _percentile(latencies, 90),
+        "latency_p99_secs": _percentile(latencies, 99),
+    }
+    if scenario == "chat_stream":
+        result["ttft_p50_secs"] = _percentile(ttfts, 50)
+        result["ttft_p99_secs"] = _percentile(ttfts, 99)
+        result["memory_bytes_per_stream"] = _measure_stream_memory(mode, config, concurrency)
+    return result
+
+
+def compare_with_baseline(
+    results: List[Dict[str, Any]], baseline: List[Dict[str, Any]], tolerance: float
+) -> List[str]:
+    """Returns descriptions of the metrics that regressed by more than
+    `tolerance` (a fraction) relative to the baseline."""
+    baseline_by_key = {(result["scenario"], result["mode"]): result for result in baseline}
+    regressions = []
+    for result in results:
+        old = baseline_by_key.get((result["scenario"], result["mode"]), None)
+        if old is None:
+            continue
+        for metric, larger_is_better in TRACKED_METRICS.items():
+            new_value, old_value = result.get(metric, None), old.get(metric, None)
+            if new_value is None or not old_value:
+                continue
+            change = (new_value - old_value) / old_value
+            if (larger_is_better and change < -tolerance) or (not larger_is_better and change > tolerance):
+                regressions.append(
+                    f"{result['scenario']}/{result['mode']}: {metric} {old_value:.6g} -> {new_value:.6g}"
+                    f" ({change:+.1%})"
+                )
+    return regressions
+
+
+def _get_git_revision() -> Optional[str]:
+    try:
+        return (
+            subprocess.check_output(
+                ["git", "rev-parse", "HEAD"],
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+                stderr=subprocess.DEVNULL,
+            )
+            .decode("ascii")
+            .strip()
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _start_server(args: argparse.Namespace) -> Tuple[subprocess.Popen, str]:
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_server.py")
+    cmd = [
+        sys.executable,
+        script,
+        "--port=0",
+        f"--latency={args.latency}",
+        f"--chunk-interval={args.chunk_interval}",
+        f"--num-chunks={args.num_chunks}",
+        f"--chunk-size={args.chunk_size}",
+        f"--task-duration={args.task_duration}",
+    ]
+    cmd += [f"--fault-rate={kind}={rate}" for kind, rate in args.fault_rate]
+    if args.seed is not None:
+        cmd.append(f"--seed={args.seed}")
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True)
+    assert proc.stdout is not None
+    line = proc.stdout.readline()
+    if not line.startswith("Serving on "):
+        proc.kill()
+        raise RuntimeError("Failed to start the mock server.")
+    # Keep draining the output, so that the server never blocks on writing.
+    threading.Thread(target=proc.stdout.read, daemon=True).start()
+    return proc, line[len("Serving on ") :].strip()
+
+
+def _format_value(value: Any) -> str:
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:.6g}"
+    return str(value)
+
+
+def _print_results(results: List[Dict[str, Any]]) -> None:
+    columns = ["scenario", "mode", "requests_per_sec", "cpu_secs_per_request"]
+    columns += [
+        "latency_p50_secs",
+        "latency_p99_secs",
+        "ttft_p50_secs",
+        "memory_bytes_per_stream",
+        "num_errors",
+    ]
+    rows = [columns] + [
+        [_format_value(result.get(column, None)) for column in columns] for result in results
+    ]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(columns))]
+    for row in rows:
+        print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmarks of the overhead of the SDK.")
+    parser.add_argument(
+        "--api-type",
+        type=str,
+        default="qianfan",
+        choices=("qianfan", "aistudio", "custom"),
+        help="API type.",
+    )
+    parser.add_argument(
+        "--scenario",
+        type=str,
+        action="append",
+        choices=SCENARIOS,
+        help="Scenario to run. Can be given multiple times. Defaults to all scenarios.",
+    )
+    parser.add_argument(
+        "--mode",
+        type=str,
+        action="append",
+        choices=MODES,
+        help="Run the synchronous or the asynchronous API. Defaults to both.",
+    )
+    parser.add_argument("--num-requests", type=int, default=500, help="Number of requests per benchmark.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Number of requests in flight.")
+    parser.add_argument(
+        "--warmup", type=int, default=32, help="Number of unmeasured requests per benchmark."
+    )
+    parser.add_argument("--max-retries", type=int, default=0, help="Value of the `max_retries` setting.")
+    parser.add_argument(
+        "--transport",
+        type=str,
+        default="default",
+        choices=("default", "httpx"),
+        help="Transport to send requests with.",
+    )
+    parser.add_argument("--output", type=str, default=None, help="Path of the JSON file to save results to.")
+    parser.add_argument(
+        "--baseline", type=str, default=None, help="Path of the JSON file of earlier results."
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.1,
+        help="Relative change of a metric beyond which it is considered a regression.",
+    )
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    scenarios = args.scenario or list(SCENARIOS)
+    if args.api_type == "custom" and "embedding" in scenarios:
+        # The custom backend does not support embeddings.
+        scenarios.remove("embedding")
+    modes = args.mode or list(MODES)
+
+    server, server_url = _start_server(args)
+    try:
+        config: Dict[str, Any] = {
+            "api_type": args.api_type,
+            "api_base_url": server_url + BASE_PATHS[args.api_type],
+            "access_token": "mock-token",
+            "max_retries": args.max_retries,
+            "min_retry_delay": 0,
+            "max_retry_delay": 0,
+        }
+        if args.transport == "httpx":
+            from erniebot.httpx_transport import HTTPXTransport
+
+            # The mock server speaks plain HTTP/1.1, so HTTP/2 would not be
+            # negotiated anyway.
+            config["transport"] = HTTPXTransport(http2=False, max_connections=args.concurrency)
+        results = []
+        for scenario in scenarios:
+            for mode in modes:
+                print(f"Running {scenario}/{mode}...", file=sys.stderr)
+                results.append(
+                    run_benchmark(
+                        scenario,
+                        mode,
+                        config,
+                        num_requests=args.num_requests,
+                        concurrency=args.concurrency,
+                        warmup=args.warmup,
+                    )
+                )
+    finally:
+        server.terminate()
+        server.wait()
+
+    _print_results(results)
+    report = {
+        "metadata": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "erniebot_version": erniebot.__version__,
+            "git_revision": _get_git_revision(),
+            "python_version": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "api_type": args.api_type,
+            "transport": args.transport,
+            "server": {
+                "latency": args.latency,
+                "chunk_interval": args.chunk_interval,
+                "num_chunks": args.num_chunks,
+                "chunk_size": args.chunk_size,
+                "fault_rates": dict(args.fault_rate),
+            },
+        },
+        "results": results,
+    }
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+    if args.baseline is not None:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(results, baseline["results"], args.tolerance)
+        if regressions:
+            print("Regressions relative to the baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("No regressions relative to the baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,26 +12,37 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import importlib as _importlib
+import sys as _sys
+import types as _types
+from typing import TYPE_CHECKING
+
 from . import errors
 from .config import GlobalConfig
 from .config import init_global_config as _init_global_config
 from .errors import ConfigItemNotFoundError as _ConfigItemNotFoundError
-from .intro import Model
-from .resources import (
-    ChatCompletion,
-    ChatCompletionResponse,
-    ChatCompletionWithPlugins,
-    Embedding,
-    EmbeddingResponse,
-    Image,
-    ImageResponse,
-    ImageV1,
-    ImageV2,
-)
 from .response import EBResponse
 from .utils.logging import setup_logging as _setup_logging
 from .version import VERSION
 
+if TYPE_CHECKING:
+    from .intro import Model
+    from .resources import (
+        ChatCompletion,
+        ChatCompletionResponse,
+        ChatCompletionWithPlugins,
+        Embedding,
+        EmbeddingArrayResponse,
+        EmbeddingResponse,
+        FineTuningJob,
+        FineTuningTask,
+        Image,
+        ImageResponse,
+        ImageV1,
+        ImageV2,
+    )
+    from .streaming import ChatCompletionStreamAccumulator, StreamMetrics
+
 __version__ = VERSION
 
 __all__ = [
@@ -48,7 +59,10 @@ __all__ = [
     "EBResponse",
     "ChatCompletionResponse",
     "EmbeddingResponse",
+    "EmbeddingArrayResponse",
     "ImageResponse",
+    "ChatCompletionStreamAccumulator",
+    "StreamMetrics",
     "GlobalConfig",
     "__version__",
 ]
@@ -58,7 +72,54 @@ _init_global_config()
 _setup_logging()
 
 
+class _ErnieBotModule(_types.ModuleType):
+    # Global settings can be modified by assigning to module attributes (e.g.
+    # `erniebot.api_type = "aistudio"`). Such assignments must invalidate the
+    # cached configuration.
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        cfg = GlobalConfig()
+        if cfg.has_item(name):
+            cfg.notify_changed()
+
+    def __delattr__(self, name):
+        super().__delattr__(name)
+        cfg = GlobalConfig()
+        if cfg.has_item(name):
+            cfg.notify_changed()
+
+
+_sys.modules[__name__].__class__ = _ErnieBotModule
+
+
+# Resource classes pull in the HTTP stack (`requests`, `aiohttp`, etc.), so
+# they are imported on first access.
+_LAZY_ATTRS = {
+    "Model": ".intro",
+    "ChatCompletion": ".resources",
+    "ChatCompletionResponse": ".resources",
+    "ChatCompletionWithPlugins": ".resources",
+    "Embedding": ".resources",
+    "EmbeddingArrayResponse": ".resources",
+    "EmbeddingResponse": ".resources",
+    "FineTuningJob": ".resources",
+    "FineTuningTask": ".resources",
+    "Image": ".resources",
+    "ImageResponse": ".resources",
+    "ImageV1": ".resources",
+    "ImageV2": ".resources",
+    "ChatCompletionStreamAccumulator": ".streaming",
+    "StreamMetrics": ".streaming",
+}
+
+
 def __getattr__(name):
+    if name in _LAZY_ATTRS:
+        module = _importlib.import_module(_LAZY_ATTRS[name], __name__)
+        value = getattr(module, name)
+        # Cache the attribute, so that this function is not called again.
+        globals()[name] = value
+        return value
     # NOTE: We use a singleton to manage global configuration, which avoids some
     # of the pitfalls of setting global variables here (such as namespace
     # pollution and mutable global state) and further allows sanity checks.
@@ -68,3 +129,7 @@ def __getattr__(name):
         return GlobalConfig().get_value(name)
     except _ConfigItemNotFoundError:
         raise AttributeError(f"module '{__name__}' has no attribute '{name}'") from None
+
+
+def __dir__():
+    return sorted(set(globals()) | _LAZY_ATTRS.keys())
@@ -12,19 +12,35 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
 import functools
 import http
-import json
+import random
 import threading
 import time
+import weakref
 from dataclasses import dataclass
-from typing import Any, Callable, Dict, Final, Hashable, Optional, Tuple
-
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Final,
+    Hashable,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Tuple,
+)
+
+import aiohttp
 import requests
 
 from . import errors
 from .api_types import APIType
-from .utils import logging
+from .session_pool import SessionPool
+from .token_store import FileTokenStore
+from .utils import json_codec, logging
 from .utils.misc import SingletonMeta
 
 __all__ = ["build_auth_token_manager"]
@@ -37,19 +53,42 @@ def build_auth_token_manager(manager_type: str, api_type: APIType, **kwargs: Any
         raise ValueError(f"Unsupported manager type: {manager_type}")
 
 
+_TokenRequestResult = Tuple[str, Optional[float]]
+
+
 class _GlobalAuthTokenCache(metaclass=SingletonMeta):
     _MIN_UPDATE_INTERVAL_SECS: Final[float] = 3600
+    # Tokens are refreshed in the background when this fraction of their
+    # lifetime has elapsed. The actual refresh time is randomized (by up to
+    # `_REFRESH_JITTER_RATIO` of the lifetime) to avoid bursts of requests.
+    _REFRESH_AHEAD_RATIO: Final[float] = 0.9
+    _REFRESH_JITTER_RATIO: Final[float] = 0.05
+    _MIN_REFRESH_DELAY_SECS: Final[float] = 1
+    _REFRESH_RETRY_DELAY_SECS: Final[float] = 60
 
     @dataclass
     class _Record(object):
         updated_at: Optional[float]
         auth_token: Optional[str]
+        # Guards the fields of the record. It is only held while they are
+        # read or written, and never during a request, such that the event
+        # loop can take it without blocking.
         lock: threading.Lock
+        # Serializes synchronous requests for tokens (including background
+        # refreshes), such that concurrent threads share a single request.
+        # The asynchronous path never takes it.
+        update_lock: threading.Lock
+        expires_at: Optional[float] = None
+        refresh_timer: Optional[threading.Timer] = None
 
     def __init__(self) -> None:
         super().__init__()
         self._cache: Dict[Tuple[str, Hashable], _GlobalAuthTokenCache._Record] = dict()
         self._lock = threading.Lock()
+        # In-flight asynchronous updates, which are bound to event loops.
+        self._pending_updates: MutableMapping[
+            asyncio.AbstractEventLoop, Dict[Tuple[str, Hashable], "asyncio.Task[str]"]
+        ] = weakref.WeakKeyDictionary()
 
     def retrieve_auth_token(self, api_type: str, key: Hashable) -> Optional[str]:
         key_pair = self._constr_key_pair(api_type, key)
@@ -57,36 +96,35 @@ class _GlobalAuthTokenCache(metaclass=SingletonMeta):
         with self._lock:
             record = self._cache.get(key_pair, None)
 
-        if record is not None:
-            with record.lock:
-                auth_token = record.auth_token
+        if record is not None and not self._has_expired(record):
+            auth_token = record.auth_token
         else:
             auth_token = None
 
         return auth_token
 
     def upsert_auth_token(
-        self, api_type: str, key: Hashable, token_requestor: Callable[[], str]
+        self,
+        api_type: str,
+        key: Hashable,
+        token_requestor: Callable[[], _TokenRequestResult],
+        *,
+        refresher: Optional[Callable[[], _TokenRequestResult]] = None,
+        store: Optional[FileTokenStore] = None,
     ) -> Tuple[str, bool]:
         key_pair = self._constr_key_pair(api_type, key)
+        record = self._get_or_create_record(key_pair)
+        if refresher is not None:
+            refresher = functools.partial(self._request_token, record, key_pair, refresher, store)
 
-        with self._lock:
-            record = self._cache.get(key_pair, None)
-            if record is None:
-                self._cache[key_pair] = _GlobalAuthTokenCache._Record(
-                    auth_token=None, updated_at=None, lock=threading.Lock()
-                )
-                record = self._cache[key_pair]
-
-        with record.lock:
-            timestamp = time.monotonic()
-            if record.updated_at is None or timestamp - record.updated_at > self._MIN_UPDATE_INTERVAL_SECS:
+        with record.update_lock:
+            if self._should_update(record):
                 try:
-                    auth_token = token_requestor()
+                    auth_token, expires_in = self._request_token(record, key_pair, token_requestor, store)
                 except Exception as e:
                     raise errors.TokenUpdateFailedError from e
-                record.auth_token = auth_token
-                record.updated_at = time.monotonic()
+                with record.lock:
+                    self._set_token(record, auth_token, expires_in, refresher)
                 upserted = True
             else:
                 assert record.auth_token is not None
@@ -95,6 +133,194 @@ class _GlobalAuthTokenCache(metaclass=SingletonMeta):
 
         return auth_token, upserted
 
+    async def aupsert_auth_token(
+        self,
+        api_type: str,
+        key: Hashable,
+        token_requestor: Callable[[], Awaitable[_TokenRequestResult]],
+        *,
+        refresher: Optional[Callable[[], _TokenRequestResult]] = None,
+        store: Optional[FileTokenStore] = None,
+    ) -> Tuple[str, bool]:
+        key_pair = self._constr_key_pair(api_type, key)
+        record = self._get_or_create_record(key_pair)
+        loop = asyncio.get_running_loop()
+        if refresher is not None:
+            refresher = functools.partial(self._request_token, record, key_pair, refresher, store)
+
+        # Concurrent updates of the same record within an event loop are
+        # coalesced into a single request. Note that `record.update_lock` is
+        # not acquired, since it may be held by a thread that is waiting for a
+        # synchronous update, which would block the event loop.
+        with self._lock:
+            pending_updates = self._pending_updates.setdefault(loop, {})
+            task = pending_updates.get(key_pair, None)
+            if task is None:
+                if not self._should_update(record):
+                    assert record.auth_token is not None
+                    return record.auth_token, False
+                task = loop.create_task(
+                    self._aupdate_record(record, key_pair, token_requestor, refresher, store)
+                )
+                pending_updates[key_pair] = task
+                task.add_done_callback(lambda _: pending_updates.pop(key_pair, None))
+                upserted = True
+            else:
+                upserted = False
+
+        # Cancellation of a single waiter should not abort the shared update.
+        auth_token = await asyncio.shield(task)
+        return auth_token, upserted
+
+    async def _aupdate_record(
+        self,
+        record: "_GlobalAuthTokenCache._Record",
+        key_pair: Tuple[str, Hashable],
+        token_requestor: Callable[[], Awaitable[_TokenRequestResult]],
+        refresher: Optional[Callable[[], _TokenRequestResult]],
+        store: Optional[FileTokenStore],
+    ) -> str:
+        try:
+            auth_token, expires_in = await self._arequest_token(record, key_pair, token_requestor, store)
+        except Exception as e:
+            raise errors.TokenUpdateFailedError from e
+        # The record is shared with synchronous updates and with the refresh
+        # timer, so it is updated under its lock, which is never held during a
+        # request.
+        with record.lock:
+            self._set_token(record, auth_token, expires_in, refresher)
+        return auth_token
+
+    @staticmethod
+    def _request_token(
+        record: "_GlobalAuthTokenCache._Record",
+        key_pair: Tuple[str, Hashable],
+        token_requestor: Callable[[], _TokenRequestResult],
+        store: Optional[FileTokenStore],
+    ) -> _TokenRequestResult:
+        if store is None:
+            return token_requestor()
+        # Hold the lock of the store while requesting the token, such that
+        # other processes can wait for and reuse the new token.
+        with store.lock():
+            stored = store.load(key_pair)
+            # A stored token is reused unless it is the one being replaced.
+            if stored is not None and stored[0] != record.auth_token:
+                logging.debug("Security token loaded from %s", store.path)
+                return stored
+            result = token_requestor()
+            store.save(key_pair, *result)
+            return result
+
+    @staticmethod
+    async def _arequest_token(
+        record: "_GlobalAuthTokenCache._Record",
+        key_pair: Tuple[str, Hashable],
+        token_requestor: Callable[[], Awaitable[_TokenRequestResult]],
+        store: Optional[FileTokenStore],
+    ) -> _TokenRequestResult:
+        if store is None:
+            return await token_requestor()
+        # Unlike the synchronous path, the lock of the store is not held
+        # while requesting the token, because it would block other processes
+        # for a network round trip. The lock is taken and released in an
+        # executor thread along with the file I/O, so that it is released
+        # even if the awaiting task gets cancelled.
+        loop = asyncio.get_running_loop()
+        stored = await loop.run_in_executor(None, _GlobalAuthTokenCache._load_locked, store, key_pair)
+        if stored is not None and stored[0] != record.auth_token:
+            logging.debug("Security token loaded from %s", store.path)
+            return stored
+        result = await token_requestor()
+        await loop.run_in_executor(None, _GlobalAuthTokenCache._save_locked, store, key_pair, result)
+        return result
+
+    @staticmethod
+    def _load_locked(store: FileTokenStore, key_pair: Tuple[str, Hashable]) -> Optional[_TokenRequestResult]:
+        with store.lock():
+            return store.load(key_pair)
+
+    @staticmethod
+    def _save_locked(
+        store: FileTokenStore, key_pair: Tuple[str, Hashable], result: _TokenRequestResult
+    ) -> None:
+        with store.lock():
+            store.save(key_pair, *result)
+
+    def _set_token(
+        self,
+        record: "_GlobalAuthTokenCache._Record",
+        auth_token: str,
+        expires_in: Optional[float],
+        refresher: Optional[Callable[[], _TokenRequestResult]],
+    ) -> None:
+        now = time.monotonic()
+        record.auth_token = auth_token
+        record.updated_at = now
+        record.expires_at = now + expires_in if expires_in is not None else None
+        if expires_in is not None and refresher is not None:
+            delay = expires_in * self._REFRESH_AHEAD_RATIO - random.uniform(
+                0, expires_in * self._REFRESH_JITTER_RATIO
+            )
+            self._schedule_refresh(record, refresher, delay)
+
+    def _schedule_refresh(
+        self,
+        record: "_GlobalAuthTokenCache._Record",
+        refresher: Callable[[], _TokenRequestResult],
+        delay: float,
+    ) -> None:
+        if record.refresh_timer is not None:
+            record.refresh_timer.cancel()
+        timer = threading.Timer(
+            max(delay, self._MIN_REFRESH_DELAY_SECS), self._refresh_in_background, args=(record, refresher)
+        )
+        timer.daemon = True
+        record.refresh_timer = timer
+        timer.start()
+
+    def _refresh_in_background(
+        self, record: "_GlobalAuthTokenCache._Record", refresher: Callable[[], _TokenRequestResult]
+    ) -> None:
+        with record.update_lock:
+            try:
+                auth_token, expires_in = refresher()
+            except Exception as e:
+                logging.warning("Failed to refresh the security token in the background: %r", e)
+                with record.lock:
+                    if record.expires_at is not None:
+                        remaining = record.expires_at - time.monotonic()
+                        if remaining > 0:
+                            self._schedule_refresh(
+                                record, refresher, min(self._REFRESH_RETRY_DELAY_SECS, remaining / 2)
+                            )
+            else:
+                with record.lock:
+                    self._set_token(record, auth_token, expires_in, refresher)
+                logging.debug("Security token refreshed in the background.")
+
+    def _get_or_create_record(self, key_pair: Tuple[str, Hashable]) -> "_GlobalAuthTokenCache._Record":
+        with self._lock:
+            record = self._cache.get(key_pair, None)
+            if record is None:
+                record = _GlobalAuthTokenCache._Record(
+                    auth_token=None, updated_at=None, lock=threading.Lock(), update_lock=threading.Lock()
+                )
+                self._cache[key_pair] = record
+        return record
+
+    def _should_update(self, record: "_GlobalAuthTokenCache._Record") -> bool:
+        timestamp = time.monotonic()
+        return (
+            record.updated_at is None
+            or self._has_expired(record)
+            or timestamp - record.updated_at > self._MIN_UPDATE_INTERVAL_SECS
+        )
+
+    @staticmethod
+    def _has_expired(record: "_GlobalAuthTokenCache._Record") -> bool:
+        return record.expires_at is not None and time.monotonic() >= record.expires_at
+
     def _constr_key_pair(self, key1: str, key2: Hashable) -> Tuple[str, Hashable]:
         return (key1, key2)
 
@@ -106,37 +332,66 @@ class AuthTokenManager(object):
         self._cfg = dict(**kwargs)
         self._cache = _GlobalAuthTokenCache()
         self._cache_key = self._get_cache_key()
+        token_cache_path = self._cfg.get("token_cache_path", None)
+        self._store = FileTokenStore(token_cache_path) if token_cache_path else None
+        # A token given by the user is used as is until it gets rejected.
+        # Afterwards, tokens are always looked up in the global cache, where
+        # they may have been refreshed in the background.
         self._token = auth_token
 
     def get_auth_token(self) -> str:
-        if self._token is None:
-            self._token = self._init_auth_token()
-        return self._token
+        if self._token is not None:
+            return self._token
+        token = self._retrieve_from_cache()
+        if token is None:
+            logging.info(
+                "Security token is not set. It will be retrieved or generated based on other parameters."
+            )
+            token = self._update_cache(init=True)
+        return token
 
     def update_auth_token(self) -> str:
         new_token = self._update_cache(init=False)
-        self._token = new_token
+        self._token = None
+        logging.info("Security token has been updated.")
+        return new_token
+
+    async def aget_auth_token(self) -> str:
+        """Asynchronous version of `get_auth_token`."""
+        if self._token is not None:
+            return self._token
+        token = self._retrieve_from_cache()
+        if token is None:
+            logging.info(
+                "Security token is not set. It will be retrieved or generated based on other parameters."
+            )
+            token = await self._aupdate_cache(init=True)
+        return token
+
+    async def aupdate_auth_token(self) -> str:
+        """Asynchronous version of `update_auth_token`."""
+        new_token = await self._aupdate_cache(init=False)
+        self._token = None
         logging.info("Security token has been updated.")
-        return self._token
+        return new_token
+
+    def _request_auth_token(self, init: bool) -> _TokenRequestResult:
+        """Requests a new token.
 
-    def _request_auth_token(self, init: bool) -> str:
+        Returns:
+            A tuple of the token and its lifetime in seconds (None if unknown).
+        """
         raise NotImplementedError
 
+    async def _arequest_auth_token(self, init: bool) -> _TokenRequestResult:
+        # Subclasses should override this method to provide a native
+        # implementation. By default we fall back to the synchronous version.
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(self._request_auth_token, init=init))
+
     def _get_cache_key(self) -> Hashable:
         raise NotImplementedError
 
-    def _init_auth_token(self) -> str:
-        cached_token = self._retrieve_from_cache()
-        if cached_token is not None:
-            logging.info("Cached security token will be used.")
-            token = cached_token
-        else:
-            logging.info(
-                "Security token is not set. It will be retrieved or generated based on other parameters."
-            )
-            token = self._update_cache(init=True)
-        return token
-
     def _retrieve_from_cache(self) -> Optional[str]:
         return self._cache.retrieve_auth_token(self.api_type.name, self._cache_key)
 
@@ -145,6 +400,20 @@ class AuthTokenManager(object):
             self.api_type.name,
             self._cache_key,
             functools.partial(self._request_auth_token, init=init),
+            refresher=functools.partial(self._request_auth_token, init=False),
+            store=self._store,
+        )
+        if upserted:
+            logging.debug("Cache updated")
+        return token
+
+    async def _aupdate_cache(self, init: bool) -> str:
+        token, upserted = await self._cache.aupsert_auth_token(
+            self.api_type.name,
+            self._cache_key,
+            functools.partial(self._arequest_auth_token, init=init),
+            refresher=functools.partial(self._request_auth_token, init=False),
+            store=self._store,
         )
         if upserted:
             logging.debug("Cache updated")
@@ -152,6 +421,9 @@ class AuthTokenManager(object):
 
 
 class BCEAuthTokenManager(AuthTokenManager):
+    _AUTH_URL: Final[str] = "https://aip.baidubce.com/oauth/2.0/token"
+    _AUTH_REQUEST_TIMEOUT_SECS: Final[float] = 3
+
     def __init__(
         self,
         api_type: APIType,
@@ -163,33 +435,54 @@ class BCEAuthTokenManager(AuthTokenManager):
     ) -> None:
         super().__init__(api_type, auth_token=auth_token, ak=ak, sk=sk, **kwargs)
 
-    def _request_auth_token(self, init: bool) -> str:
+    def _request_auth_token(self, init: bool) -> _TokenRequestResult:
         # `init` not used
-        url = "https://aip.baidubce.com/oauth/2.0/token"
+        params = self._get_auth_params()
+        result = requests.request(
+            method="GET", url=self._AUTH_URL, params=params, timeout=self._AUTH_REQUEST_TIMEOUT_SECS
+        )
+        return self._parse_auth_response(result.status_code, result.content, result.headers)
+
+    async def _arequest_auth_token(self, init: bool) -> _TokenRequestResult:
+        # `init` not used
+        params = self._get_auth_params()
+        timeout = aiohttp.ClientTimeout(total=self._AUTH_REQUEST_TIMEOUT_SECS)
+        async with SessionPool().asession(self._AUTH_URL) as session:
+            async with session.get(self._AUTH_URL, params=params, timeout=timeout) as result:
+                content = await result.read()
+                return self._parse_auth_response(result.status, content, result.headers)
+
+    def _get_auth_params(self) -> Dict[str, str]:
         ak = self._cfg["ak"]
         sk = self._cfg["sk"]
         if ak is None or sk is None:
             raise RuntimeError("Invalid API key or secret key")
-        params = {
+        return {
             "grant_type": "client_credentials",
             "client_id": ak,
             "client_secret": sk,
         }
-        result = requests.request(method="GET", url=url, params=params, timeout=3)
-        if result.status_code != http.HTTPStatus.OK:
+
+    @staticmethod
+    def _parse_auth_response(
+        status_code: int, content: bytes, headers: Mapping[str, Any]
+    ) -> _TokenRequestResult:
+        if status_code != http.HTTPStatus.OK:
             raise errors.HTTPRequestError(
                 f"Status code is not {http.HTTPStatus.OK}.",
-                rcode=result.status_code,
-                rbody=result.content.decode("utf-8"),
-                rheaders=result.headers,
+                rcode=status_code,
+                rbody=content.decode("utf-8"),
+                rheaders=headers,
             )
         else:
-            rbody = result.content.decode("utf-8")
-            rbody = json.loads(rbody)
+            rbody = json_codec.loads(content)
             if not isinstance(rbody, dict):
                 raise errors.HTTPRequestError("The response body cannot be deserialized to a dict.")
             token = rbody["access_token"]
-            return token
+            expires_in = rbody.get("expires_in", None)
+            if expires_in is not None:
+                expires_in = float(expires_in)
+            return token, expires_in
 
     def _get_cache_key(self) -> Hashable:
         return (self._cfg["ak"], self._cfg["sk"])
@@ -12,17 +12,20 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Any, Union
+import collections
+import threading
+from typing import Any, Final, Hashable, Optional, Union
 
 from erniebot.api_types import APIType, convert_str_to_api_type
 from erniebot.types import ConfigDictType
+from erniebot.utils.misc import SingletonMeta
 
 from .aistudio import AIStudioBackend
 from .base import EBBackend
 from .bce import QianfanBackend, QianfanLegacyBackend, YinianBackend
 from .custom import CustomBackend
 
-__all__ = ["build_backend"]
+__all__ = ["build_backend", "get_backend"]
 
 
 def build_backend(api_type: Union[str, APIType], config_dict: ConfigDictType, **opts: Any) -> EBBackend:
@@ -40,3 +43,62 @@ def build_backend(api_type: Union[str, APIType], config_dict: ConfigDictType, **
         return CustomBackend(config_dict, **opts)
     else:
         raise ValueError(f"Unrecoginzed API type: {api_type.name}")
+
+
+def get_backend(api_type: Union[str, APIType], config_dict: ConfigDictType) -> EBBackend:
+    """Returns a cached backend for the given settings, or builds a new one."""
+    if isinstance(api_type, str):
+        api_type = convert_str_to_api_type(api_type)
+    return _BackendCache().get_or_build(api_type, config_dict)
+
+
+class _BackendCache(metaclass=SingletonMeta):
+    _MAX_SIZE: Final[int] = 64
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._cache: "collections.OrderedDict[Hashable, EBBackend]" = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, api_type: APIType, config_dict: ConfigDictType) -> EBBackend:
+        key = self._make_key(api_type, config_dict)
+        if key is None:
+            return build_backend(api_type, config_dict)
+        with self._lock:
+            backend = self._cache.get(key, None)
+            if backend is not None:
+                self._cache.move_to_end(key)
+                return backend
+        # Build the backend outside the lock, as it may involve some work
+        # (e.g. creating an auth token manager).
+        backend = build_backend(api_type, config_dict)
+        with self._lock:
+            backend = self._cache.setdefault(key, backend)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._MAX_SIZE:
+                self._cache.popitem(last=False)
+        return backend
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    @classmethod
+    def _make_key(cls, api_type: APIType, config_dict: ConfigDictType) -> Optional[Hashable]:
+        try:
+            key = (api_type, _freeze(config_dict))
+            hash(key)
+        except TypeError:
+            # Settings that cannot be hashed (e.g. objects that define `__eq__`
+            # but not `__hash__`) disable caching.
+            return None
+        return key
+
+
+def _freeze(obj: Any) -> Hashable:
+    if isinstance(obj, dict):
+        return tuple(sorted(((k, _freeze(v)) for k, v in obj.items()), key=lambda item: repr(item[0])))
+    elif isinstance(obj, (list, tuple)):
+        return tuple(_freeze(item) for item in obj)
+    else:
+        return obj
@@ -34,6 +34,10 @@ class EBBackend(object):
             asession=self._cfg.get("aiohttp_session", None),
             response_handler=self.handle_response,
             proxy=self._cfg.get("proxy", None),
+            max_connections_per_host=self._cfg.get("max_connections_per_host", None),
+            keepalive_timeout=self._cfg.get("keepalive_timeout", None),
+            session_idle_timeout=self._cfg.get("session_idle_timeout", None),
+            transport=self._cfg.get("transport", None),
         )
 
     def request(
@@ -12,7 +12,6 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import asyncio
 import datetime
 import hashlib
 import hmac
@@ -49,6 +48,7 @@ class _BCELegacyBackend(EBBackend):
             auth_token=self._cfg["access_token"],
             ak=self._cfg["ak"],
             sk=self._cfg["sk"],
+            token_cache_path=self._cfg["token_cache_path"],
         )
 
     def request(
@@ -112,9 +112,7 @@ class _BCELegacyBackend(EBBackend):
             params=params,
         )
 
-        loop = asyncio.get_running_loop()
-        # XXX: The default executor is used.
-        access_token = await loop.run_in_executor(None, self._auth_manager.get_auth_token)
+        access_token = await self._auth_manager.aget_auth_token()
         url_with_token = add_query_params(url, [("access_token", access_token)])
         try:
             return await self._client.asend_request(
@@ -130,8 +128,7 @@ class _BCELegacyBackend(EBBackend):
                 "The access token provided is invalid or has expired."
                 " An automatic update will be performed before retrying."
             )
-            # XXX: The default executor is used.
-            access_token = await loop.run_in_executor(None, self._auth_manager.update_auth_token)
+            access_token = await self._auth_manager.aupdate_auth_token()
             url_with_token = add_query_params(url, [("access_token", access_token)])
             return await self._client.asend_request(
                 method,
@@ -0,0 +1,290 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import array
+import hashlib
+import mmap
+import os
+import pathlib
+import sqlite3
+import threading
+import time
+from typing import Dict, Final, List, Optional, Sequence, Tuple, Union
+
+from erniebot.utils import logging
+
+__all__ = ["EmbeddingCache"]
+
+
+class _VectorFile(object):
+    """Fixed-size float32 vectors stored in a memory-mapped file."""
+
+    _GROWTH_NUM_SLOTS: Final[int] = 1024
+
+    def __init__(self, path: pathlib.Path, dim: int) -> None:
+        super().__init__()
+        self.path = path
+        self.dim = dim
+        self._row_size = dim * 4
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._file = os.fdopen(fd, "r+b")
+        self._mmap: Optional[mmap.mmap] = None
+        self._remap()
+
+    def read(self, slot: int) -> List[float]:
+        offset = slot * self._row_size
+        if self._mmap is None or offset + self._row_size > len(self._mmap):
+            # The file may have been extended by another process.
+            self._remap()
+        assert self._mmap is not None
+        vec = array.array("f")
+        vec.frombytes(self._mmap[offset : offset + self._row_size])
+        return vec.tolist()
+
+    def write(self, slot: int, vector: Sequence[float]) -> None:
+        if len(vector) != self.dim:
+            raise ValueError(f"Expected a vector of dimension {self.dim}, but got {len(vector)}.")
+        offset = slot * self._row_size
+        if self._mmap is None or offset + self._row_size > len(self._mmap):
+            size = os.fstat(self._file.fileno()).st_size
+            if offset + self._row_size > size:
+                self._file.truncate((slot + self._GROWTH_NUM_SLOTS) * self._row_size)
+            self._remap()
+        assert self._mmap is not None
+        self._mmap[offset : offset + self._row_size] = array.array("f", vector).tobytes()
+
+    def flush(self) -> None:
+        if self._mmap is not None:
+            self._mmap.flush()
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    def _remap(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        size = os.fstat(self._file.fileno()).st_size
+        if size > 0:
+            self._mmap = mmap.mmap(self._file.fileno(), size)
+
+
+class EmbeddingCache(object):
+    """A persistent cache of embeddings keyed by model and text digest.
+
+    Vectors are stored as float32 in a memory-mapped file per model, and an
+    SQLite database maps `(model, sha256(text))` to the slot of the vector in
+    the file. Each text is stored at most once per model. When the number of
+    entries exceeds `max_entries`, the least recently used entries are evicted
+    and their slots are reused.
+
+    A vector is always written before its index entry is committed, so readers
+    (including other processes) never see an entry without its vector. Freed
+    slots are only reused after a grace period, such that readers that looked
+    up a slot right before the eviction still read the right vector.
+
+    The access time of an entry, by which entries are evicted, is updated on
+    lookup only if it is older than `ACCESS_TIME_RESOLUTION_SECS`, so that
+    repeated lookups of the same texts do not write to the database.
+    """
+
+    SLOT_REUSE_DELAY_SECS: Final[float] = 60
+    ACCESS_TIME_RESOLUTION_SECS: Final[float] = 60
+
+    def __init__(self, directory: Union[str, os.PathLike], max_entries: Optional[int] = None) -> None:
+        super().__init__()
+        self.directory = pathlib.Path(directory).expanduser()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._vector_files: Dict[str, _VectorFile] = {}
+        self._conn = sqlite3.connect(
+            self.directory / "index.sqlite", check_same_thread=False, isolation_level=None, timeout=30
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS models (
+                model TEXT PRIMARY KEY,
+                file_id INTEGER NOT NULL,
+                dim INTEGER NOT NULL,
+                num_slots INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS entries (
+                model TEXT NOT NULL, digest TEXT NOT NULL, slot INTEGER NOT NULL, accessed_at REAL NOT NULL,
+                PRIMARY KEY (model, digest)
+            );
+            CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at);
+            CREATE TABLE IF NOT EXISTS free_slots (
+                model TEXT NOT NULL, slot INTEGER NOT NULL, freed_at REAL NOT NULL, PRIMARY KEY (model, slot)
+            );
+            """
+        )
+
+    def get_many(self, model: str, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """Looks up the embeddings of texts.
+
+        Returns:
+            A list that contains the embedding of each text, or None if the
+            embedding is not cached.
+        """
+        digests = [self._digest(text) for text in texts]
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        with self._lock:
+            model_info = self._get_model_info(model)
+            if model_info is None:
+                return results
+            entries = self._lookup_entries(model, digests)
+            if not entries:
+                return results
+            vector_file = self._get_vector_file(model, *model_info)
+            for i, digest in enumerate(digests):
+                entry = entries.get(digest, None)
+                if entry is not None:
+                    results[i] = vector_file.read(entry[0])
+            now = time.time()
+            stale_digests = [
+                digest
+                for digest, (_, accessed_at) in entries.items()
+                if accessed_at < now - self.ACCESS_TIME_RESOLUTION_SECS
+            ]
+            if stale_digests:
+                self._touch(model, stale_digests, now)
+        return results
+
+    def put_many(self, model: str, texts: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        """Stores the embeddings of texts."""
+        if len(texts) != len(vectors):
+            raise ValueError("The numbers of texts and vectors do not match.")
+        if len(texts) == 0:
+            return
+        # Drop duplicates in the input.
+        items = {self._digest(text): vector for text, vector in zip(texts, vectors)}
+        dim = len(next(iter(items.values())))
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                model_info = self._get_model_info(model)
+                if model_info is None:
+                    file_id = self._conn.execute("SELECT COUNT(*) FROM models").fetchone()[0]
+                    self._conn.execute(
+                        "INSERT INTO models (model, file_id, dim, num_slots) VALUES (?, ?, ?, 0)",
+                        (model, file_id, dim),
+                    )
+                    model_info = (file_id, dim)
+                vector_file = self._get_vector_file(model, *model_info)
+                existing = self._lookup_entries(model, list(items))
+                now = time.time()
+                for digest, vector in items.items():
+                    if digest in existing:
+                        continue
+                    slot = self._allocate_slot(model, now)
+                    vector_file.write(slot, vector)
+                    self._conn.execute(
+                        "INSERT INTO entries (model, digest, slot, accessed_at) VALUES (?, ?, ?, ?)",
+                        (model, digest, slot, now),
+                    )
+                vector_file.flush()
+                self._evict(now)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            for vector_file in self._vector_files.values():
+                vector_file.close()
+            self._vector_files.clear()
+            self._conn.close()
+
+    def _get_model_info(self, model: str) -> Optional[Tuple[int, int]]:
+        row = self._conn.execute("SELECT file_id, dim FROM models WHERE model = ?", (model,)).fetchone()
+        return None if row is None else (row[0], row[1])
+
+    def _get_vector_file(self, model: str, file_id: int, dim: int) -> _VectorFile:
+        vector_file = self._vector_files.get(model, None)
+        if vector_file is None:
+            vector_file = _VectorFile(self.directory / f"vectors-{file_id}.f32", dim)
+            self._vector_files[model] = vector_file
+        return vector_file
+
+    def _lookup_entries(self, model: str, digests: List[str]) -> Dict[str, Tuple[int, float]]:
+        entries: Dict[str, Tuple[int, float]] = {}
+        # Stay below SQLite's limit on the number of host parameters.
+        batch_size = 500
+        for i in range(0, len(digests), batch_size):
+            batch = digests[i : i + batch_size]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._conn.execute(
+                "SELECT digest, slot, accessed_at FROM entries"
+                f" WHERE model = ? AND digest IN ({placeholders})",
+                (model, *batch),
+            ).fetchall()
+            entries.update((digest, (slot, accessed_at)) for digest, slot, accessed_at in rows)
+        return entries
+
+    def _touch(self, model: str, digests: List[str], now: float) -> None:
+        # The connection is in autocommit mode, so the updates are grouped
+        # into one transaction rather than committed one by one.
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.executemany(
+                "UPDATE entries SET accessed_at = ? WHERE model = ? AND digest = ?",
+                [(now, model, digest) for digest in digests],
+            )
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _allocate_slot(self, model: str, now: float) -> int:
+        row = self._conn.execute(
+            "SELECT slot FROM free_slots WHERE model = ? AND freed_at <= ? LIMIT 1",
+            (model, now - self.SLOT_REUSE_DELAY_SECS),
+        ).fetchone()
+        if row is not None:
+            self._conn.execute("DELETE FROM free_slots WHERE model = ? AND slot = ?", (model, row[0]))
+            return row[0]
+        slot = self._conn.execute("SELECT num_slots FROM models WHERE model = ?", (model,)).fetchone()[0]
+        self._conn.execute("UPDATE models SET num_slots = ? WHERE model = ?", (slot + 1, model))
+        return slot
+
+    def _evict(self, now: float) -> None:
+        if self.max_entries is None:
+            return
+        num_entries = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        num_to_evict = num_entries - self.max_entries
+        if num_to_evict <= 0:
+            return
+        rows = self._conn.execute(
+            "SELECT model, digest, slot FROM entries ORDER BY accessed_at LIMIT ?", (num_to_evict,)
+        ).fetchall()
+        self._conn.executemany("DELETE FROM entries WHERE model = ? AND digest = ?", [r[:2] for r in rows])
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO free_slots (model, slot, freed_at) VALUES (?, ?, ?)",
+            [(r[0], r[2], now) for r in rows],
+        )
+        logging.debug("%d embedding(s) evicted from the cache", len(rows))
+
+    @staticmethod
+    def _digest(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
@@ -0,0 +1,253 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import abc
+import collections
+import copy
+import hashlib
+import json
+import os
+import pathlib
+import sqlite3
+import threading
+import time
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    OrderedDict,
+    Tuple,
+    Union,
+)
+
+from erniebot.response import EBResponse
+from erniebot.utils import json_codec, logging
+
+__all__ = [
+    "ResponseCache",
+    "InMemoryResponseCache",
+    "SQLiteResponseCache",
+    "make_cache_key",
+]
+
+# A cached response is stored as a list of (rcode, rbody, rheaders) triples,
+# which contains exactly one element for a non-streaming response.
+_CachedValue = List[Tuple[int, Any, Dict[str, Any]]]
+
+
+def make_cache_key(*parts: Any) -> str:
+    """Computes a canonical hash of JSON-serializable objects."""
+    # The standard library is always used here, so that keys stay the same
+    # regardless of the JSON codec in use.
+    canonical = json.dumps(parts, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=repr)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache(abc.ABC):
+    """Base class of caches of API responses.
+
+    Subclasses only need to implement storage through `_get`, `_set`, and
+    `clear`. Entries older than `ttl` seconds are treated as missing, and at
+    most `max_size` entries are kept.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None) -> None:
+        super().__init__()
+        self.max_size = max_size
+        self.ttl = ttl
+        self._stats_lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    def get(self, key: str) -> Optional[_CachedValue]:
+        value = self._get(key)
+        self._record_lookup(value is not None)
+        return value
+
+    def set(self, key: str, value: _CachedValue) -> None:
+        self._set(key, value)
+
+    def get_response(self, key: str) -> Optional[EBResponse]:
+        value = self._get(key)
+        if value is not None and len(value) != 1:
+            # A stream is cached under the key.
+            value = None
+        self._record_lookup(value is not None)
+        if value is None:
+            return None
+        return EBResponse(*value[0])
+
+    def set_response(self, key: str, resp: EBResponse) -> None:
+        self.set(key, [(resp.rcode, resp.rbody, resp.rheaders)])
+
+    def get_stream(self, key: str) -> Optional[List[EBResponse]]:
+        value = self.get(key)
+        if value is None:
+            return None
+        return [EBResponse(*item) for item in value]
+
+    def cache_stream(self, key: str, stream: Iterator[EBResponse]) -> Iterator[EBResponse]:
+        """Passes through a stream and caches it once it is exhausted."""
+        chunks = []
+        for chunk in stream:
+            # The chunk is copied before the caller gets a chance to modify it.
+            chunks.append((chunk.rcode, copy.deepcopy(chunk.rbody), dict(chunk.rheaders)))
+            yield chunk
+        self.set(key, chunks)
+
+    async def acache_stream(self, key: str, stream: AsyncIterator[EBResponse]) -> AsyncIterator[EBResponse]:
+        """Asynchronous version of `cache_stream`."""
+        chunks = []
+        async for chunk in stream:
+            # The chunk is copied before the caller gets a chance to modify it.
+            chunks.append((chunk.rcode, copy.deepcopy(chunk.rbody), dict(chunk.rheaders)))
+            yield chunk
+        self.set(key, chunks)
+
+    def _record_lookup(self, hit: bool) -> None:
+        with self._stats_lock:
+            if hit:
+                self._hits += 1
+            else:
+                self._misses += 1
+
+    @abc.abstractmethod
+    def clear(self) -> None:
+        ...
+
+    @abc.abstractmethod
+    def _get(self, key: str) -> Optional[_CachedValue]:
+        ...
+
+    @abc.abstractmethod
+    def _set(self, key: str, value: _CachedValue) -> None:
+        ...
+
+    def _is_expired(self, created_at: float) -> bool:
+        return self.ttl is not None and time.time() - created_at > self.ttl
+
+    @staticmethod
+    def _serialize(value: _CachedValue) -> bytes:
+        return json_codec.dumps(value)
+
+    @staticmethod
+    def _deserialize(serialized: Union[str, bytes]) -> _CachedValue:
+        return [tuple(item) for item in json_codec.loads(serialized)]  # type: ignore[misc]
+
+
+class InMemoryResponseCache(ResponseCache):
+    """An LRU cache of responses that lives in memory.
+
+    Responses are stored serialized, so that neither the caller that cached
+    a response nor those that get it can modify the cached copy.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None) -> None:
+        super().__init__(max_size=max_size, ttl=ttl)
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, Tuple[float, bytes]] = collections.OrderedDict()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _get(self, key: str) -> Optional[_CachedValue]:
+        with self._lock:
+            entry = self._entries.get(key, None)
+            if entry is None:
+                return None
+            created_at, value = entry
+            if self._is_expired(created_at):
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return self._deserialize(value)
+
+    def _set(self, key: str, value: _CachedValue) -> None:
+        serialized = self._serialize(value)
+        with self._lock:
+            self._entries[key] = (time.time(), serialized)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+class SQLiteResponseCache(ResponseCache):
+    """An LRU cache of responses that is persisted in an SQLite database."""
+
+    def __init__(
+        self, path: Union[str, os.PathLike], max_size: int = 100000, ttl: Optional[float] = None
+    ) -> None:
+        super().__init__(max_size=max_size, ttl=ttl)
+        self.path = pathlib.Path(path).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _get(self, key: str) -> Optional[_CachedValue]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if self._is_expired(created_at):
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        try:
+            return self._deserialize(value)
+        except ValueError:
+            logging.warning("Corrupted cache entry: %s", key)
+            return None
+
+    def _set(self, key: str, value: _CachedValue) -> None:
+        serialized = self._serialize(value).decode("utf-8")
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, serialized, now, now),
+            )
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN"
+                " (SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_size,),
+            )
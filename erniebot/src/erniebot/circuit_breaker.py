@@ -0,0 +1,202 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import enum
+import threading
+import time
+from typing import Deque, Dict, Final, Hashable, List, Optional, Tuple
+
+from . import errors
+from .utils import logging
+from .utils.misc import SingletonMeta
+
+__all__ = ["CircuitState", "CircuitBreaker", "RetryBudget", "get_circuit_breaker", "get_retry_budget"]
+
+
+class CircuitState(enum.Enum):
+    CLOSED = 1
+    OPEN = 2
+    HALF_OPEN = 3
+
+
+class CircuitBreaker(object):
+    """Stops sending requests to a backend that keeps failing.
+
+    The breaker opens after `failure_threshold` consecutive failures, and
+    rejects all requests with `errors.CircuitOpenError` for `reset_timeout`
+    seconds. Afterwards it becomes half-open and lets a single probe request
+    through: the breaker closes if the probe succeeds and opens again
+    otherwise.
+
+    Only errors indicating that the backend is unavailable count as failures.
+    Other errors mean that the backend is responsive. In particular, rate
+    limiting errors are left to retries and to client-side rate limiting, as
+    opening the breaker would reject requests long after the limit resets.
+    """
+
+    FAILURE_ERRORS: Final = (
+        errors.ConnectionError,
+        errors.TimeoutError,
+        errors.TryAgain,
+    )
+
+    def __init__(self, failure_threshold: int, reset_timeout: float) -> None:
+        super().__init__()
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = CircuitState.CLOSED
+        self._num_failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            if self._state is CircuitState.OPEN and self._is_reset_due():
+                return CircuitState.HALF_OPEN
+            return self._state
+
+    def before_request(self) -> None:
+        """Raises `errors.CircuitOpenError` if the request is not allowed."""
+        with self._lock:
+            if self._state is CircuitState.OPEN:
+                if not self._is_reset_due():
+                    raise errors.CircuitOpenError(
+                        f"The circuit breaker is open. Requests are rejected for"
+                        f" {self._opened_at + self.reset_timeout - time.monotonic():.1f} more seconds."
+                    )
+                self._state = CircuitState.HALF_OPEN
+                logging.info("The circuit breaker is half-open.")
+            if self._state is CircuitState.HALF_OPEN:
+                if self._probing:
+                    raise errors.CircuitOpenError(
+                        "The circuit breaker is half-open and a probe request is in progress."
+                    )
+                self._probing = True
+
+    def record(self, error: Optional[BaseException] = None) -> None:
+        """Records the outcome of a request admitted by `before_request`."""
+        with self._lock:
+            if self._state is CircuitState.HALF_OPEN:
+                self._probing = False
+            if error is not None and not isinstance(error, Exception):
+                # The request was interrupted (e.g. cancelled) without any
+                # outcome.
+                return
+            if isinstance(error, self.FAILURE_ERRORS):
+                self._num_failures += 1
+                if self._state is CircuitState.HALF_OPEN or self._num_failures >= self.failure_threshold:
+                    if self._state is not CircuitState.OPEN:
+                        logging.warning(
+                            "The circuit breaker is open after %d consecutive failure(s).",
+                            self._num_failures,
+                        )
+                    self._state = CircuitState.OPEN
+                    self._opened_at = time.monotonic()
+            else:
+                if self._state is CircuitState.HALF_OPEN:
+                    logging.info("The circuit breaker is closed.")
+                self._state = CircuitState.CLOSED
+                self._num_failures = 0
+
+    def _is_reset_due(self) -> bool:
+        return time.monotonic() - self._opened_at >= self.reset_timeout
+
+
+class RetryBudget(object):
+    """Caps retries at a fraction of recent requests.
+
+    Within a sliding window of `window` seconds, retries are allowed as long
+    as their number does not exceed `min_retries_per_sec * window` plus
+    `ratio` times the number of requests. This keeps retries from multiplying
+    the load on a backend that is already struggling.
+    """
+
+    def __init__(self, ratio: float, min_retries_per_sec: float = 1, window: int = 10) -> None:
+        super().__init__()
+        self.ratio = ratio
+        self.min_retries_per_sec = min_retries_per_sec
+        self.window = window
+        self._lock = threading.Lock()
+        # Each bucket holds the second, the number of requests, and the number
+        # of retries.
+        self._buckets: Deque[List[int]] = collections.deque()
+
+    def record_request(self) -> None:
+        with self._lock:
+            self._current_bucket()[1] += 1
+
+    def try_withdraw(self) -> bool:
+        """Tries to spend the budget on a retry."""
+        with self._lock:
+            bucket = self._current_bucket()
+            num_requests = sum(b[1] for b in self._buckets)
+            num_retries = sum(b[2] for b in self._buckets)
+            if num_retries >= self.min_retries_per_sec * self.window + self.ratio * num_requests:
+                return False
+            bucket[2] += 1
+            return True
+
+    def _current_bucket(self) -> List[int]:
+        now = int(time.monotonic())
+        while self._buckets and self._buckets[0][0] <= now - self.window:
+            self._buckets.popleft()
+        if not self._buckets or self._buckets[-1][0] != now:
+            self._buckets.append([now, 0, 0])
+        return self._buckets[-1]
+
+
+class _Registry(metaclass=SingletonMeta):
+    def __init__(self) -> None:
+        super().__init__()
+        self._lock = threading.Lock()
+        self._breakers: Dict[Tuple[Hashable, ...], CircuitBreaker] = {}
+        self._budgets: Dict[Tuple[Hashable, ...], RetryBudget] = {}
+
+    def get_breaker(
+        self, key: Tuple[Hashable, ...], failure_threshold: int, reset_timeout: float
+    ) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(key, None)
+            if breaker is None:
+                breaker = CircuitBreaker(failure_threshold, reset_timeout)
+                self._breakers[key] = breaker
+            else:
+                breaker.failure_threshold = failure_threshold
+                breaker.reset_timeout = reset_timeout
+        return breaker
+
+    def get_budget(self, key: Tuple[Hashable, ...], ratio: float) -> RetryBudget:
+        with self._lock:
+            budget = self._budgets.get(key, None)
+            if budget is None:
+                budget = RetryBudget(ratio)
+                self._budgets[key] = budget
+            else:
+                budget.ratio = ratio
+        return budget
+
+
+def get_circuit_breaker(
+    api_type: str, base_url: Optional[str], *, failure_threshold: int, reset_timeout: float
+) -> CircuitBreaker:
+    """Returns the circuit breaker shared by all requests to a backend."""
+    return _Registry().get_breaker((api_type, base_url), failure_threshold, reset_timeout)
+
+
+def get_retry_budget(api_type: str, base_url: Optional[str], *, ratio: float) -> RetryBudget:
+    """Returns the retry budget shared by all requests to a backend."""
+    return _Registry().get_budget((api_type, base_url), ratio)
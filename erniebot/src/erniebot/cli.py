@@ -13,13 +13,20 @@
 # limitations under the License.
 
 import argparse
+import asyncio
+import collections
 import logging
+import math
+import os
+import time
 
 import erniebot
 
 from .config import GlobalConfig
 from .errors import EBError
 from .response import EBResponse
+from .session_pool import aclose_sessions
+from .utils import json_codec
 from .utils.logging import setup_logging
 
 __all__ = ["console_main", "parse_args"]
@@ -91,6 +98,10 @@ def parse_args(*args, **kwargs):
     _register_resource(api_parsers, ImageV2Helper, "image")
     _register_resource(api_parsers, ModelHelper, "model")
 
+    subparser_batch = subparsers.add_parser("batch", help="Batch processing of requests in a JSONL file.")
+    BatchHelper.add_arguments(subparser_batch)
+    subparser_batch.set_defaults(api_invoker=BatchHelper.run)
+
     return parser.parse_args(*args, **kwargs)
 
 
@@ -392,3 +403,226 @@ class ModelHelper(_ResourceCLIHelper):
         for model_name, model_desc in model_info_list:
             # XXX: Hard-code max name length
             print("%-24s %s", model_name, model_desc)
+
+
+class BatchHelper(object):
+    """Sends the requests in a JSONL file concurrently.
+
+    Each line of the input file is a JSON object that holds the keyword
+    arguments of `acreate`, and an optional `id` that is copied to the
+    output. Each line of the output file is a record with the `index` of the
+    input line (counting non-blank lines from 0), the `id`, and either the
+    `response` body or an `error`.
+
+    Records are flushed one by one, so the output file doubles as a
+    checkpoint: with `--resume`, items that have succeeded are skipped, and
+    failed or unfinished items are sent again.
+    """
+
+    RESOURCES = {"chat_completion": "ChatCompletion", "embedding": "Embedding", "image": "ImageV2"}
+    # In ordered mode, at most this many times `--concurrency` results wait
+    # for earlier ones to be written.
+    ORDERED_WINDOW_FACTOR = 4
+
+    @classmethod
+    def add_arguments(cls, parser):
+        parser.add_argument("resource", choices=list(cls.RESOURCES), help="Resource to create.")
+        parser.add_argument("--input", type=str, required=True, help="Path of the input JSONL file.")
+        parser.add_argument("--output", type=str, required=True, help="Path of the output JSONL file.")
+        parser.add_argument("--model", type=str, help="Model to use for the lines that do not specify one.")
+        parser.add_argument(
+            "--concurrency", type=int, default=8, help="Maximum number of requests in flight."
+        )
+        parser.add_argument(
+            "--max-requests-per-second", type=float, help="Maximum number of requests per second."
+        )
+        parser.add_argument(
+            "--max-tokens-per-minute",
+            type=float,
+            help="Maximum number of (estimated) input tokens per minute.",
+        )
+        parser.add_argument(
+            "--ordered",
+            action="store_true",
+            help="Whether to write results in input order. By default, results are written as they complete.",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Whether to resume from an existing output file instead of overwriting it.",
+        )
+        return parser
+
+    @classmethod
+    def run(cls, args):
+        if args.concurrency <= 0:
+            raise ValueError("`--concurrency` should be a positive integer.")
+        cfg = GlobalConfig()
+        if args.max_requests_per_second:
+            cfg.set_value("max_requests_per_second", args.max_requests_per_second)
+        if args.max_tokens_per_minute:
+            cfg.set_value("max_tokens_per_minute", args.max_tokens_per_minute)
+        resource_cls = getattr(erniebot, cls.RESOURCES[args.resource])
+
+        completed = cls._load_checkpoint(args.output) if args.resume else set()
+        stats = _BatchStats()
+        interrupted = False
+        with open(args.input, "r", encoding="utf-8") as fin, open(
+            args.output, "a" if args.resume else "w", encoding="utf-8"
+        ) as fout:
+            try:
+                asyncio.run(cls._run(resource_cls, fin, fout, completed, stats, args))
+            except KeyboardInterrupt:
+                interrupted = True
+        stats.report()
+        if interrupted:
+            print("Interrupted. Run again with `--resume` to continue.")
+
+    @classmethod
+    def _load_checkpoint(cls, path):
+        """Keeps the successful records in the output file and returns their indices."""
+        if not os.path.exists(path):
+            return set()
+        completed = set()
+        lines = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    # The last record was not completely written.
+                    break
+                try:
+                    record = json_codec.loads(line)
+                except json_codec.JSONDecodeError:
+                    continue
+                if (
+                    isinstance(record, dict)
+                    and "response" in record
+                    and record.get("index") not in completed
+                ):
+                    completed.add(record["index"])
+                    lines.append(line)
+        # Failed items are sent again, so their records are dropped.
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+        os.replace(tmp_path, path)
+        return completed
+
+    @classmethod
+    async def _run(cls, resource_cls, fin, fout, completed, stats, args):
+        semaphore = asyncio.Semaphore(args.concurrency)
+        window_size = args.concurrency * cls.ORDERED_WINDOW_FACTOR if args.ordered else args.concurrency
+        window = asyncio.Semaphore(window_size)
+        # Tasks whose results have not been written, in input order
+        unwritten = collections.deque()
+
+        def _write(record):
+            fout.write(json_codec.dumps(record).decode("utf-8") + "\n")
+            fout.flush()
+            window.release()
+
+        def _on_done(task):
+            if task.cancelled():
+                return
+            if not args.ordered:
+                _write(task.result())
+            else:
+                while unwritten and unwritten[0].done() and not unwritten[0].cancelled():
+                    _write(unwritten.popleft().result())
+
+        tasks = set()
+        stats.start()
+        try:
+            index = 0
+            for line in fin:
+                if not line.strip():
+                    continue
+                if index in completed:
+                    stats.num_skipped += 1
+                else:
+                    await window.acquire()
+                    task = asyncio.ensure_future(
+                        cls._process_item(resource_cls, index, line, args.model, semaphore, stats)
+                    )
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                    if args.ordered:
+                        unwritten.append(task)
+                    task.add_done_callback(_on_done)
+                index += 1
+            if tasks:
+                await asyncio.wait(tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            stats.stop()
+            await aclose_sessions()
+
+    @classmethod
+    async def _process_item(cls, resource_cls, index, line, default_model, semaphore, stats):
+        item_id = index
+        try:
+            kwargs = json_codec.loads(line)
+            if not isinstance(kwargs, dict):
+                raise ValueError("Each line should be a JSON object.")
+            item_id = kwargs.pop("id", index)
+            if kwargs.get("stream", False):
+                raise ValueError("Streaming is not supported in batch processing.")
+            if default_model is not None:
+                kwargs.setdefault("model", default_model)
+            async with semaphore:
+                start_time = time.monotonic()
+                resp = await resource_cls.acreate(**kwargs)
+                latency = time.monotonic() - start_time
+        except Exception as e:
+            # A bad item should not stop the whole batch.
+            logging.warning("Item %d (ID: %r) failed: %s", index, item_id, e)
+            stats.num_failed += 1
+            return {"index": index, "id": item_id, "error": {"type": type(e).__name__, "message": str(e)}}
+        stats.record(latency)
+        return {"index": index, "id": item_id, "response": resp.rbody}
+
+
+class _BatchStats(object):
+    def __init__(self):
+        super().__init__()
+        self.num_failed = 0
+        self.num_skipped = 0
+        self.latencies = []
+        self._start_time = None
+        self._stop_time = None
+
+    @property
+    def num_succeeded(self):
+        return len(self.latencies)
+
+    def start(self):
+        self._start_time = time.monotonic()
+
+    def stop(self):
+        self._stop_time = time.monotonic()
+
+    def record(self, latency):
+        self.latencies.append(latency)
+
+    def report(self):
+        num_processed = self.num_succeeded + self.num_failed
+        elapsed = 0.0
+        if self._start_time is not None and self._stop_time is not None:
+            elapsed = self._stop_time - self._start_time
+        print(
+            f"Processed {num_processed} items in {elapsed:.2f} seconds "
+            f"({self.num_succeeded} succeeded, {self.num_failed} failed, {self.num_skipped} skipped)."
+        )
+        if elapsed > 0:
+            print(f"Throughput: {num_processed / elapsed:.2f} items/s")
+        if self.latencies:
+            latencies = sorted(self.latencies)
+
+            def _percentile(q):
+                return latencies[max(math.ceil(q / 100 * len(latencies)) - 1, 0)]
+
+            print(
+                f"Latency (s): mean {sum(latencies) / len(latencies):.3f}, p50 {_percentile(50):.3f}, "
+                f"p90 {_percentile(90):.3f}, p99 {_percentile(99):.3f}, max {latencies[-1]:.3f}"
+            )
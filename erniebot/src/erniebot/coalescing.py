@@ -0,0 +1,185 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import concurrent.futures
+import threading
+import weakref
+from typing import (
+    Awaitable,
+    Callable,
+    Dict,
+    MutableMapping,
+    Optional,
+    TypeVar,
+    Union,
+    cast,
+)
+
+from .utils.misc import SingletonMeta
+
+__all__ = ["RequestCoalescer", "get_request_coalescer"]
+
+_T = TypeVar("_T")
+
+
+class _InFlightCall(object):
+    """A call in flight, which may be shared by several callers."""
+
+    __slots__ = ("future", "num_waiters", "shared")
+
+    def __init__(self, future: Union[concurrent.futures.Future, asyncio.Future]) -> None:
+        super().__init__()
+        self.future = future
+        self.num_waiters = 1
+        # Whether any caller joined the call
+        self.shared = False
+
+
+class RequestCoalescer(object):
+    """Lets identical in-flight calls share a single execution.
+
+    The first caller with a given key (the leader) executes the call, and
+    callers that arrive with the same key before it completes wait for its
+    outcome instead of executing the call again. Results are not kept after
+    the call completes, so this is not a cache.
+
+    If `copy_result` is given, each caller of a shared call gets its own copy
+    of the result, such that callers can modify their results independently.
+
+    In asynchronous code, the call runs in a task that is shared by all
+    waiters. Cancelling a waiter, including the one that started the call,
+    does not affect the others. The shared task is cancelled only when all
+    of its waiters are gone.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _InFlightCall] = {}
+        # Shared tasks, for each event loop
+        self._tasks: MutableMapping[
+            asyncio.AbstractEventLoop, Dict[str, _InFlightCall]
+        ] = weakref.WeakKeyDictionary()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def hits(self) -> int:
+        """The number of calls that joined a call already in flight."""
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        """The number of calls that were actually executed."""
+        return self._misses
+
+    @property
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls) + sum(len(tasks) for tasks in self._tasks.values())
+
+    def call(self, key: str, func: Callable[[], _T], copy_result: Optional[Callable[[_T], _T]] = None) -> _T:
+        """Calls `func`, or waits for the call in flight with the same key."""
+        with self._lock:
+            call = self._calls.get(key, None)
+            is_leader = call is None
+            if call is None:
+                call = _InFlightCall(concurrent.futures.Future())
+                self._calls[key] = call
+                self._misses += 1
+            else:
+                call.shared = True
+                self._hits += 1
+        if not is_leader:
+            return self._get_result(call, call.future.result(), copy_result)
+
+        try:
+            result = func()
+        except BaseException as e:
+            with self._lock:
+                del self._calls[key]
+            call.future.set_exception(e)
+            raise
+        # No caller can join the call once it is forgotten.
+        with self._lock:
+            del self._calls[key]
+        call.future.set_result(result)
+        return self._get_result(call, result, copy_result)
+
+    async def acall(
+        self,
+        key: str,
+        func: Callable[[], Awaitable[_T]],
+        copy_result: Optional[Callable[[_T], _T]] = None,
+    ) -> _T:
+        """Awaits `func()`, or waits for the call in flight with the same key."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            tasks = self._tasks.setdefault(loop, {})
+            existing_call = tasks.get(key, None)
+            if existing_call is not None:
+                call = existing_call
+                call.num_waiters += 1
+                call.shared = True
+                self._hits += 1
+            else:
+                call = _InFlightCall(asyncio.ensure_future(func()))
+                tasks[key] = call
+                self._misses += 1
+                # This callback runs before any waiter is resumed.
+                call.future.add_done_callback(lambda _: self._forget_task(tasks, key, call))
+
+        task = cast(asyncio.Future, call.future)
+        try:
+            # The shared task must survive the cancellation of a waiter.
+            result = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.done():
+                with self._lock:
+                    call.num_waiters -= 1
+                    if call.num_waiters == 0:
+                        # Nobody is interested in the result anymore.
+                        task.cancel()
+            raise
+        return self._get_result(call, result, copy_result)
+
+    @staticmethod
+    def _get_result(call: _InFlightCall, result: _T, copy_result: Optional[Callable[[_T], _T]]) -> _T:
+        # When the call is shared, nobody gets the original result, so that
+        # it stays intact while the copies are made.
+        if call.shared and copy_result is not None:
+            return copy_result(result)
+        return result
+
+    def _forget_task(self, tasks: Dict[str, _InFlightCall], key: str, call: _InFlightCall) -> None:
+        with self._lock:
+            if tasks.get(key, None) is call:
+                del tasks[key]
+        task = call.future
+        if not task.cancelled():
+            # Prevent warnings about exceptions that are never retrieved when
+            # all waiters have been cancelled.
+            task.exception()
+
+
+class _RequestCoalescerHolder(metaclass=SingletonMeta):
+    def __init__(self) -> None:
+        super().__init__()
+        self.coalescer = RequestCoalescer()
+
+
+def get_request_coalescer() -> RequestCoalescer:
+    """Returns the coalescer shared by all resources."""
+    return _RequestCoalescerHolder().coalescer
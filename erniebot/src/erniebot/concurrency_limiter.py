@@ -0,0 +1,196 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import collections
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Deque, Dict, Final, Hashable, MutableMapping, Optional
+
+from . import constants, errors
+from .utils import logging
+from .utils.misc import SingletonMeta
+
+__all__ = ["AdaptiveConcurrencyLimiter", "Permit", "get_concurrency_limiter"]
+
+
+@dataclass
+class Permit(object):
+    acquired_at: float
+    released: bool = False
+
+
+class AdaptiveConcurrencyLimiter(object):
+    """Limits the number of in-flight requests using AIMD.
+
+    The limit grows additively (by about one per round trip) while requests
+    succeed with healthy latencies and a low error rate, and is cut
+    multiplicatively when the server signals overload (i.e. a rate limit
+    error, a request to try again, or a timeout). Requests that exceed the
+    limit wait in a FIFO queue.
+
+    Instances are bound to an event loop and must not be shared across loops.
+    """
+
+    OVERLOAD_ERRORS: Final = (errors.RateLimitError, errors.TryAgain, errors.TimeoutError)
+
+    # Factor by which the limit is multiplied on overload.
+    BACKOFF_RATIO: Final[float] = 0.5
+    # Latencies beyond this multiple of the baseline latency are considered
+    # unhealthy and stop the limit from growing.
+    LATENCY_TOLERANCE: Final[float] = 2.0
+    # The limit stops growing when the smoothed error rate exceeds this value.
+    MAX_ERROR_RATE: Final[float] = 0.1
+    _EWMA_ALPHA: Final[float] = 0.1
+
+    def __init__(self, initial_limit: int, max_limit: int, min_limit: int = 1) -> None:
+        super().__init__()
+        if not 1 <= min_limit <= max_limit:
+            raise ValueError("Expected 1 <= `min_limit` <= `max_limit`.")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self._limit = float(min(max(initial_limit, min_limit), max_limit))
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = collections.deque()
+        self._baseline_latency: Optional[float] = None
+        self._error_rate = 0.0
+        self._last_backoff_at = float("-inf")
+
+    @property
+    def limit(self) -> int:
+        """The current maximum number of in-flight requests."""
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        """The number of requests waiting for a permit."""
+        return len(self._waiters)
+
+    async def acquire(self) -> Permit:
+        if self._in_flight < self.limit and not self._waiters:
+            self._in_flight += 1
+        else:
+            fut = asyncio.get_running_loop().create_future()
+            self._waiters.append(fut)
+            try:
+                await fut
+            except asyncio.CancelledError:
+                if fut.done() and not fut.cancelled():
+                    # The permit was handed over to us, so pass it on.
+                    self._in_flight -= 1
+                    self._wake_up_waiters()
+                else:
+                    self._waiters.remove(fut)
+                raise
+        return Permit(acquired_at=time.monotonic())
+
+    def release(
+        self, permit: Permit, *, latency: Optional[float] = None, error: Optional[BaseException] = None
+    ) -> None:
+        """Returns a permit and updates the limit according to the outcome.
+
+        Args:
+            permit: The permit obtained from `acquire`.
+            latency: Time taken for the server to respond. If not given, the
+                time elapsed since the permit was acquired is used.
+            error: The exception raised by the request, if any.
+        """
+        if permit.released:
+            return
+        permit.released = True
+        self._in_flight -= 1
+        if error is not None and isinstance(error, self.OVERLOAD_ERRORS):
+            self._on_overload(permit)
+        elif error is None or isinstance(error, Exception):
+            if latency is None:
+                latency = time.monotonic() - permit.acquired_at
+            self._on_completion(latency, failed=error is not None)
+        self._wake_up_waiters()
+
+    def _on_overload(self, permit: Permit) -> None:
+        # Requests that were sent before the last backoff took place reflect
+        # the old limit, so they should not trigger another cut.
+        if permit.acquired_at < self._last_backoff_at:
+            return
+        old_limit = self.limit
+        self._limit = max(self._limit * self.BACKOFF_RATIO, float(self.min_limit))
+        self._last_backoff_at = time.monotonic()
+        logging.debug("Concurrency limit decreased from %d to %d.", old_limit, self.limit)
+
+    def _on_completion(self, latency: float, *, failed: bool) -> None:
+        alpha = self._EWMA_ALPHA
+        self._error_rate = (1 - alpha) * self._error_rate + alpha * float(failed)
+        if failed:
+            return
+        if self._baseline_latency is None:
+            self._baseline_latency = latency
+        else:
+            self._baseline_latency = (1 - alpha) * self._baseline_latency + alpha * latency
+        healthy = (
+            latency <= self._baseline_latency * self.LATENCY_TOLERANCE
+            and self._error_rate <= self.MAX_ERROR_RATE
+        )
+        # Only grow the limit when it is actually being used.
+        if healthy and self._in_flight + 1 >= self.limit:
+            self._limit = min(self._limit + 1 / self._limit, float(self.max_limit))
+
+    def _wake_up_waiters(self) -> None:
+        while self._waiters and self._in_flight < self.limit:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                self._in_flight += 1
+                fut.set_result(None)
+
+
+class _ConcurrencyLimiterRegistry(metaclass=SingletonMeta):
+    def __init__(self) -> None:
+        super().__init__()
+        self._lock = threading.Lock()
+        self._limiters: MutableMapping[
+            asyncio.AbstractEventLoop, Dict[Hashable, AdaptiveConcurrencyLimiter]
+        ] = weakref.WeakKeyDictionary()
+
+    def get(self, key: Hashable, initial_limit: int, max_limit: int) -> AdaptiveConcurrencyLimiter:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            limiters = self._limiters.setdefault(loop, {})
+            limiter = limiters.get(key, None)
+            if limiter is None:
+                limiter = AdaptiveConcurrencyLimiter(initial_limit=initial_limit, max_limit=max_limit)
+                limiters[key] = limiter
+        return limiter
+
+
+def get_concurrency_limiter(
+    api_type: str,
+    base_url: Optional[str],
+    *,
+    initial_limit: Optional[int] = None,
+    max_limit: Optional[int] = None,
+) -> AdaptiveConcurrencyLimiter:
+    """Returns the limiter shared by requests to a backend in the running loop.
+
+    The limits only take effect when the limiter is created.
+    """
+    if initial_limit is None:
+        initial_limit = constants.DEFAULT_INITIAL_CONCURRENCY
+    if max_limit is None:
+        max_limit = constants.DEFAULT_MAX_CONCURRENCY
+    return _ConcurrencyLimiterRegistry().get((api_type, base_url), initial_limit, max_limit)
@@ -17,9 +17,11 @@ import os
 import pathlib
 import re
 import sys
+import threading
 import types
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
+from . import constants
 from .errors import ConfigItemNotFoundError
 from .types import ConfigDictType
 from .utils.misc import SingletonMeta
@@ -41,6 +43,8 @@ def init_global_config() -> None:
     cfg.add_item(StringItem(key="ak", env_key="EB_AK"))
     # Secret key or secret access key
     cfg.add_item(StringItem(key="sk", env_key="EB_SK"))
+    # Path of the file that is used to share access tokens among processes
+    cfg.add_item(StringItem(key="token_cache_path", env_key="EB_TOKEN_CACHE_PATH"))
 
     # Retrying settings
     # Maximum number of retries
@@ -52,6 +56,71 @@ def init_global_config() -> None:
     # Maximum retry delay (not taking account of jitter)
     cfg.add_item(PositiveNumberItem(key="max_retry_delay", env_key="EB_MAX_RETRY_DELAY", default=10))
 
+    # Ratio of retries to requests allowed for each backend (beyond a small
+    # number of retries per second). The budget is enabled by default; 0 (or
+    # None) disables it.
+    cfg.add_item(
+        PositiveNumberItem(
+            key="retry_budget_ratio",
+            env_key="EB_RETRY_BUDGET_RATIO",
+            default=constants.DEFAULT_RETRY_BUDGET_RATIO,
+        )
+    )
+
+    # Circuit breaker settings
+    # Number of consecutive failures that opens the circuit breaker (0 to
+    # disable, which is the default)
+    cfg.add_item(
+        PositiveNumberItem(
+            key="circuit_breaker_threshold",
+            env_key="EB_CIRCUIT_BREAKER_THRESHOLD",
+            default=0,
+            ensure_integer=True,
+        )
+    )
+    # Time after which an open circuit breaker allows a probe request
+    cfg.add_item(
+        PositiveNumberItem(
+            key="circuit_breaker_reset_timeout",
+            env_key="EB_CIRCUIT_BREAKER_RESET_TIMEOUT",
+            default=constants.DEFAULT_CIRCUIT_BREAKER_RESET_TIMEOUT_SECS,
+        )
+    )
+
+    # Hedging settings (only applicable to asynchronous requests)
+    # Percentile of recent latencies after which a duplicate request is sent
+    cfg.add_item(PositiveNumberItem(key="hedging_percentile", env_key="EB_HEDGING_PERCENTILE"))
+
+    # Rate limiting settings
+    # Maximum number of requests per second
+    cfg.add_item(PositiveNumberItem(key="max_requests_per_second", env_key="EB_MAX_REQUESTS_PER_SECOND"))
+    # Maximum number of (estimated) input tokens per minute
+    cfg.add_item(PositiveNumberItem(key="max_tokens_per_minute", env_key="EB_MAX_TOKENS_PER_MINUTE"))
+    # Rate limits for specific API types or models
+    cfg.add_item(AnyObjectItem(key="rate_limits"))
+
+    # Adaptive concurrency settings (only applicable to asynchronous requests)
+    # Whether to adjust the number of in-flight requests automatically
+    cfg.add_item(BoolItem(key="adaptive_concurrency", env_key="EB_ADAPTIVE_CONCURRENCY", default=False))
+    # Initial number of in-flight requests
+    cfg.add_item(
+        PositiveNumberItem(
+            key="initial_concurrency",
+            env_key="EB_INITIAL_CONCURRENCY",
+            default=constants.DEFAULT_INITIAL_CONCURRENCY,
+            ensure_integer=True,
+        )
+    )
+    # Maximum number of in-flight requests
+    cfg.add_item(
+        PositiveNumberItem(
+            key="max_concurrency",
+            env_key="EB_MAX_CONCURRENCY",
+            default=constants.DEFAULT_MAX_CONCURRENCY,
+            ensure_integer=True,
+        )
+    )
+
     # Miscellaneous settings
     # Proxy to use
     cfg.add_item(URLItem(key="proxy", env_key="EB_PROXY"))
@@ -59,17 +128,69 @@ def init_global_config() -> None:
     cfg.add_item(AnyObjectItem(key="requests_session"))
     # aiohttp session
     cfg.add_item(AnyObjectItem(key="aiohttp_session"))
+    # Transport that sends HTTP requests (an `erniebot.http_client.Transport`
+    # object). If set, the session, proxy, and connection pooling settings are
+    # ignored.
+    cfg.add_item(AnyObjectItem(key="transport"))
+    # Cache of responses (an `erniebot.caching.ResponseCache` object)
+    cfg.add_item(AnyObjectItem(key="response_cache"))
+    # Cache of embeddings (an `erniebot.caching.EmbeddingCache` object)
+    cfg.add_item(AnyObjectItem(key="embedding_cache"))
+    # Whether identical non-streaming requests in flight share a single
+    # response
+    cfg.add_item(BoolItem(key="coalesce_requests", env_key="EB_COALESCE_REQUESTS", default=False))
+    # Hooks called at each stage of requests (a list of
+    # `erniebot.instrumentation.RequestHooks` objects)
+    cfg.add_item(AnyObjectItem(key="request_hooks"))
+
+    # Connection pooling settings
+    # Maximum number of pooled connections per host
+    cfg.add_item(
+        PositiveNumberItem(
+            key="max_connections_per_host",
+            env_key="EB_MAX_CONNECTIONS_PER_HOST",
+            default=constants.DEFAULT_MAX_CONNECTIONS_PER_HOST,
+            ensure_integer=True,
+        )
+    )
+    # Keep-alive timeout of idle connections (only applicable to aiohttp)
+    cfg.add_item(
+        PositiveNumberItem(
+            key="keepalive_timeout",
+            env_key="EB_KEEPALIVE_TIMEOUT",
+            default=constants.DEFAULT_KEEPALIVE_TIMEOUT_SECS,
+        )
+    )
+    # Idle time after which a pooled session gets closed
+    cfg.add_item(
+        PositiveNumberItem(
+            key="session_idle_timeout",
+            env_key="EB_SESSION_IDLE_TIMEOUT",
+            default=constants.DEFAULT_SESSION_IDLE_TIMEOUT_SECS,
+        )
+    )
 
 
 class _Config(object):
     def __init__(self, cfg_dict: Optional[Dict[str, "_ConfigItem"]] = None) -> None:
         super().__init__()
         self._cfg_dict: Dict[str, "_ConfigItem"] = cfg_dict if cfg_dict is not None else dict()
+        self._version = 0
+        self._version_lock = threading.Lock()
+
+    @property
+    def version(self) -> int:
+        """Counter that gets increased every time the configuration changes."""
+        return self._version
 
     def add_item(self, cfg: "_ConfigItem") -> None:
         if not isinstance(cfg, _ConfigItem):
             raise TypeError
         self._cfg_dict[cfg.key] = cfg
+        self.notify_changed()
+
+    def has_item(self, key: str) -> bool:
+        return key in self._cfg_dict
 
     def get_value(self, key: str) -> Any:
         try:
@@ -84,20 +205,41 @@ class _Config(object):
         except KeyError as e:
             raise ConfigItemNotFoundError from e
         cfg.value = value
+        self.notify_changed()
+
+    def notify_changed(self) -> None:
+        """Invalidates everything derived from the current configuration."""
+        with self._version_lock:
+            self._version += 1
 
 
 class GlobalConfig(_Config, metaclass=SingletonMeta):
+    def __init__(self, cfg_dict: Optional[Dict[str, "_ConfigItem"]] = None) -> None:
+        super().__init__(cfg_dict)
+        self._snapshot: Optional[Tuple[int, ConfigDictType]] = None
+
     def create_dict(self, **overrides: Any) -> ConfigDictType:
-        dict_: ConfigDictType = {}
-        for key, cfg in self._cfg_dict.items():
-            if key in overrides:
-                val = overrides.pop(key)
-                cfg.validate(val)
-            else:
-                val = cfg.value
+        dict_ = self._get_snapshot().copy()
+        for key, val in overrides.items():
+            try:
+                cfg = self._cfg_dict[key]
+            except KeyError:
+                raise TypeError(
+                    f"Unexpected keys: {list(overrides.keys() - self._cfg_dict.keys())}"
+                ) from None
+            cfg.validate(val)
             dict_[key] = val
-        if len(overrides) != 0:
-            raise TypeError(f"Unexpected keys: {list(overrides.keys())}")
+        return dict_
+
+    def _get_snapshot(self) -> ConfigDictType:
+        # Resolving the values of all items is relatively expensive, so the
+        # result is cached until the configuration changes.
+        snapshot = self._snapshot
+        version = self._version
+        if snapshot is not None and snapshot[0] == version:
+            return snapshot[1]
+        dict_: ConfigDictType = {key: cfg.value for key, cfg in self._cfg_dict.items()}
+        self._snapshot = (version, dict_)
         return dict_
 
 
@@ -179,6 +321,21 @@ class PositiveNumberItem(NumberItem):
             raise ValueError(f"Invalid value ({val}) for {self.key}, which should be a positive value.")
 
 
+class BoolItem(_ConfigItem):
+    def factory(self, env_val: str) -> Any:
+        s = env_val.strip().lower()
+        if s in ("1", "true", "yes", "on"):
+            return True
+        elif s in ("0", "false", "no", "off", ""):
+            return False
+        else:
+            raise ValueError(f"{repr(env_val)} cannot be interpreted as a boolean value.")
+
+    def _validate(self, val: Any) -> None:
+        if not isinstance(val, bool):
+            raise TypeError
+
+
 class StringItem(_ConfigItem):
     def factory(self, env_val: str) -> Any:
         return str(env_val)
@@ -16,9 +16,19 @@ from typing import Final
 
 LOGGER_NAME: Final[str] = "erniebot"
 
-STREAM_RESPONSE_PREFIX: Final[bytes] = b"data: "
-
 DEFAULT_REQUEST_TIMEOUT_SECS: Final[float] = 600
 
+DEFAULT_MAX_CONNECTIONS_PER_HOST: Final[int] = 10
+DEFAULT_KEEPALIVE_TIMEOUT_SECS: Final[float] = 15
+DEFAULT_SESSION_IDLE_TIMEOUT_SECS: Final[float] = 300
+
+DEFAULT_CIRCUIT_BREAKER_RESET_TIMEOUT_SECS: Final[float] = 30
+DEFAULT_RETRY_BUDGET_RATIO: Final[float] = 0.1
+
+DEFAULT_INITIAL_CONCURRENCY: Final[int] = 4
+DEFAULT_MAX_CONCURRENCY: Final[int] = 64
+
 POLLING_INTERVAL_SECS: Final[float] = 5
 POLLING_TIMEOUT_SECS: Final[float] = 20
+POLLING_MIN_INTERVAL_SECS: Final[float] = 1
+POLLING_MAX_INTERVAL_SECS: Final[float] = 30
@@ -19,6 +19,7 @@ __all__ = [
     "InvalidArgumentError",
     "TokenUpdateFailedError",
     "UnsupportedAPITypeError",
+    "CircuitOpenError",
     "HTTPRequestError",
     "ConnectionError",
     "TimeoutError",
@@ -59,6 +60,10 @@ class UnsupportedAPITypeError(EBError):
     """An unsupported API type was used."""
 
 
+class CircuitOpenError(EBError):
+    """The request was rejected because the circuit breaker is open."""
+
+
 class HTTPRequestError(EBError):
     """An HTTP request failed."""
 
@@ -0,0 +1,158 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import collections
+import math
+import threading
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Final,
+    Hashable,
+    List,
+    Optional,
+    Set,
+    TypeVar,
+)
+
+from .utils import logging
+from .utils.misc import SingletonMeta
+
+__all__ = ["LatencyTracker", "get_latency_tracker", "hedge"]
+
+_T = TypeVar("_T")
+
+
+class LatencyTracker(object):
+    """Keeps recent latencies and computes percentiles of them."""
+
+    MAX_SAMPLES: Final[int] = 1000
+    # No percentile is reported before this number of samples is collected.
+    MIN_SAMPLES: Final[int] = 20
+    # Percentiles are recomputed after this number of new samples.
+    _REFRESH_INTERVAL: Final[int] = 16
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._lock = threading.Lock()
+        self._samples: Deque[float] = collections.deque(maxlen=self.MAX_SAMPLES)
+        self._sorted_samples: List[float] = []
+        self._num_new_samples = 0
+
+    def record(self, latency: float) -> None:
+        with self._lock:
+            self._samples.append(latency)
+            self._num_new_samples += 1
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Returns the `q`-th percentile (0 < q <= 100) of recent latencies."""
+        with self._lock:
+            if len(self._samples) < self.MIN_SAMPLES:
+                return None
+            if self._num_new_samples >= self._REFRESH_INTERVAL or not self._sorted_samples:
+                self._sorted_samples = sorted(self._samples)
+                self._num_new_samples = 0
+            samples = self._sorted_samples
+        idx = min(max(math.ceil(q / 100 * len(samples)) - 1, 0), len(samples) - 1)
+        return samples[idx]
+
+
+class _LatencyTrackerRegistry(metaclass=SingletonMeta):
+    def __init__(self) -> None:
+        super().__init__()
+        self._lock = threading.Lock()
+        self._trackers: Dict[Hashable, LatencyTracker] = {}
+
+    def get(self, key: Hashable) -> LatencyTracker:
+        with self._lock:
+            tracker = self._trackers.get(key, None)
+            if tracker is None:
+                tracker = LatencyTracker()
+                self._trackers[key] = tracker
+        return tracker
+
+
+def get_latency_tracker(key: Hashable) -> LatencyTracker:
+    """Returns the latency tracker shared by requests with the same key."""
+    return _LatencyTrackerRegistry().get(key)
+
+
+async def hedge(
+    make_attempt: Callable[[], Awaitable[_T]],
+    delay: Optional[float],
+    *,
+    may_hedge: Callable[[], bool],
+    discard: Optional[Callable[[_T], Awaitable[Any]]] = None,
+) -> _T:
+    """Runs `make_attempt` and sends a duplicate if it takes too long.
+
+    Args:
+        make_attempt: Function that creates an awaitable for an attempt.
+        delay: Time to wait before sending a duplicate attempt. If None, no
+            duplicate will be sent.
+        may_hedge: Function called before sending a duplicate attempt. The
+            duplicate is not sent if it returns False.
+        discard: Function used to release the result of an attempt that lost
+            the race.
+
+    Returns:
+        The result of the attempt that completed successfully first. Other
+        attempts are cancelled. If all attempts fail, the error of the first
+        attempt is raised.
+    """
+    primary = asyncio.ensure_future(make_attempt())
+    tasks: Set[asyncio.Future] = {primary}
+    try:
+        if delay is not None:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done and may_hedge():
+                logging.debug("No response within %.3f seconds. Sending a hedged request.", delay)
+                tasks.add(asyncio.ensure_future(make_attempt()))
+
+        error: Optional[BaseException] = None
+        while tasks:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            winner = None
+            for task in done:
+                if task.cancelled():
+                    continue
+                if task.exception() is None:
+                    if winner is None:
+                        winner = task
+                    elif discard is not None:
+                        await discard(task.result())
+                elif task is primary or error is None:
+                    error = task.exception()
+            if winner is not None:
+                return winner.result()
+        assert error is not None
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
+        if len(tasks) > 0:
+            await asyncio.gather(*tasks, return_exceptions=True)
+            # An attempt may have completed before it could be cancelled, in
+            # which case its result (e.g. an open stream) must be released.
+            if discard is not None:
+                for task in tasks:
+                    if task.done() and not task.cancelled() and task.exception() is None:
+                        try:
+                            await discard(task.result())
+                        except Exception as e:
+                            logging.debug("Failed to discard the result of a hedged attempt: %r", e)
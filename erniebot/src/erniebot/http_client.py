@@ -39,16 +39,17 @@
 
 from __future__ import annotations
 
+import abc
 import asyncio
 import http
-import json
-from contextlib import asynccontextmanager, contextmanager
-from json import JSONDecodeError
+from contextlib import AsyncExitStack, ExitStack, asynccontextmanager, contextmanager
 from typing import (
     Any,
     AsyncGenerator,
     AsyncIterator,
+    Awaitable,
     Callable,
+    Dict,
     Final,
     Generator,
     Iterator,
@@ -64,21 +65,294 @@ import requests
 import erniebot
 
 from . import constants, errors
+from .instrumentation.hooks import RequestContext, get_current_request_context
 from .response import EBResponse
+from .session_pool import SessionPool
 from .types import HeadersType, ParamsType
-from .utils import logging
+from .utils import json_codec, logging
+from .utils.sse import SSEDecoder, SSEEvent
 from .utils.url import add_query_params
 
-__all__ = ["EBClient"]
+__all__ = [
+    "EBClient",
+    "Transport",
+    "TransportResponse",
+    "AsyncTransportResponse",
+    "DefaultTransport",
+]
+
+
+class TransportResponse(abc.ABC):
+    """A response returned by `Transport.send`.
+
+    `status_code` and `headers` are available once the response is returned.
+    The body is then consumed with either `read` or `iter_bytes`, and `close`
+    releases the underlying connection. Lookups in `headers` must be
+    case-insensitive.
+    """
+
+    status_code: int
+    headers: Mapping[str, Any]
+
+    @abc.abstractmethod
+    def read(self) -> bytes:
+        """Reads the whole body."""
+
+    @abc.abstractmethod
+    def iter_bytes(self) -> Iterator[bytes]:
+        """Yields the body in chunks as they arrive."""
+
+    @abc.abstractmethod
+    def close(self) -> None:
+        """Releases the connection of the response."""
+
+
+class AsyncTransportResponse(abc.ABC):
+    """A response returned by `Transport.asend`.
+
+    This is the asynchronous counterpart of `TransportResponse`.
+    """
+
+    status_code: int
+    headers: Mapping[str, Any]
+
+    @abc.abstractmethod
+    async def read(self) -> bytes:
+        """Reads the whole body."""
+
+    @abc.abstractmethod
+    def aiter_bytes(self) -> AsyncIterator[bytes]:
+        """Yields the body in chunks as they arrive."""
+
+    @abc.abstractmethod
+    async def aclose(self) -> None:
+        """Releases the connection of the response."""
+
+
+class Transport(abc.ABC):
+    """Sends HTTP requests on behalf of `EBClient`.
+
+    A transport is only responsible for moving bytes: `EBClient` builds the
+    requests and interprets the responses, including streamed ones. A custom
+    transport can be set with the `transport` setting, e.g. to serve recorded
+    responses in tests.
+
+    Implementations should raise `erniebot.errors.TimeoutError` when a request
+    times out and `erniebot.errors.ConnectionError` on other failures to
+    communicate with the server, so that such errors are retried.
+    """
+
+    @abc.abstractmethod
+    def send(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: Optional[HeadersType],
+        data: Optional[bytes],
+        stream: bool,
+        timeout: float,
+    ) -> TransportResponse:
+        """Sends a request and returns the response once its headers arrive."""
+
+    @abc.abstractmethod
+    async def asend(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: Optional[HeadersType],
+        data: Optional[bytes],
+        stream: bool,
+        timeout: float,
+    ) -> AsyncTransportResponse:
+        """Sends a request and returns the response once its headers arrive."""
+
+    def close(self) -> None:
+        """Releases the resources used for synchronous requests."""
+
+    async def aclose(self) -> None:
+        """Releases the resources used for asynchronous requests in the
+        running event loop."""
+
+
+class _RequestsResponse(TransportResponse):
+    def __init__(self, response: requests.Response, release: Callable[[], None]) -> None:
+        super().__init__()
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self._response = response
+        self._release = release
+
+    def read(self) -> bytes:
+        return self._response.content
+
+    def iter_bytes(self) -> Iterator[bytes]:
+        # With `chunk_size=None`, data is yielded as it arrives, in chunks of
+        # whatever size the server sends.
+        return self._response.iter_content(chunk_size=None)
+
+    def close(self) -> None:
+        self._response.close()
+        self._release()
+
+
+class _AiohttpResponse(AsyncTransportResponse):
+    def __init__(self, response: aiohttp.ClientResponse, release: Callable[[], Awaitable[Any]]) -> None:
+        super().__init__()
+        self.status_code = response.status
+        self.headers = response.headers
+        self._response = response
+        self._release = release
+
+    async def read(self) -> bytes:
+        try:
+            return await self._response.read()
+        except (aiohttp.ServerTimeoutError, asyncio.TimeoutError) as e:
+            raise errors.TimeoutError(f"Request timed out: {str(e)}") from e
+
+    def aiter_bytes(self) -> AsyncIterator[bytes]:
+        return self._response.content.iter_any()
+
+    async def aclose(self) -> None:
+        self._response.release()
+        await self._release()
+
+
+class DefaultTransport(Transport):
+    """Transport that sends synchronous requests with `requests` and
+    asynchronous requests with `aiohttp`.
+
+    Sessions are borrowed from the process-wide `SessionPool`, unless a
+    session is given.
+    """
+
+    def __init__(
+        self,
+        *,
+        session: Optional[requests.Session] = None,
+        asession: Optional[aiohttp.ClientSession] = None,
+        proxy: Optional[str] = None,
+        max_connections_per_host: Optional[int] = None,
+        keepalive_timeout: Optional[float] = None,
+        session_idle_timeout: Optional[float] = None,
+    ) -> None:
+        super().__init__()
+        self._session = session
+        self._asession = asession
+        self._proxy = proxy
+        self._max_connections_per_host = max_connections_per_host
+        self._keepalive_timeout = keepalive_timeout
+        self._session_idle_timeout = session_idle_timeout
+
+    def send(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: Optional[HeadersType],
+        data: Optional[bytes],
+        stream: bool,
+        timeout: float,
+    ) -> TransportResponse:
+        # The session is held until the response is closed.
+        stack = ExitStack()
+        session = stack.enter_context(self._make_requests_session_context_manager(url))
+        try:
+            try:
+                response = session.request(
+                    method,
+                    url,
+                    headers=headers,
+                    data=data,
+                    stream=stream,
+                    timeout=timeout,
+                    proxies=session.proxies,
+                )
+            except requests.exceptions.Timeout as e:
+                raise errors.TimeoutError(f"Request timed out: {e}") from e
+            except requests.exceptions.RequestException as e:
+                raise errors.ConnectionError(f"Error communicating with server: {e}") from e
+        except BaseException:
+            stack.close()
+            raise
+        return _RequestsResponse(response, stack.close)
+
+    async def asend(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: Optional[HeadersType],
+        data: Optional[bytes],
+        stream: bool,
+        timeout: float,
+    ) -> AsyncTransportResponse:
+        stack = AsyncExitStack()
+        session = await stack.enter_async_context(self._make_aiohttp_session_context_manager(url))
+        try:
+            try:
+                response = await session.request(
+                    method=method,
+                    url=url,
+                    headers=headers,
+                    data=data,
+                    timeout=aiohttp.ClientTimeout(total=timeout),
+                )
+            except (aiohttp.ServerTimeoutError, asyncio.TimeoutError) as e:
+                raise errors.TimeoutError(f"Request timed out: {e}") from e
+            except aiohttp.ClientError as e:
+                raise errors.ConnectionError(f"Error communicating with server: {e}") from e
+        except BaseException:
+            await stack.aclose()
+            raise
+        return _AiohttpResponse(response, stack.aclose)
+
+    @contextmanager
+    def _make_requests_session_context_manager(self, url: str) -> Generator[requests.Session, None, None]:
+        if self._session is not None:
+            session = self._session
+            if self._proxy is not None:
+                proxies = {"http": self._proxy, "https": self._proxy}
+                session.proxies = proxies
+            yield session
+        else:
+            # Borrow a session from the process-wide pool, so that connections
+            # are kept alive and reused across requests.
+            with SessionPool().session(
+                url,
+                proxy=self._proxy,
+                max_connections_per_host=self._max_connections_per_host,
+                idle_timeout=self._session_idle_timeout,
+            ) as session:
+                yield session
+
+    @asynccontextmanager
+    async def _make_aiohttp_session_context_manager(
+        self, url: str
+    ) -> AsyncGenerator[aiohttp.ClientSession, None]:
+        # TODO: Support proxies
+        if self._asession is not None:
+            yield self._asession
+        else:
+            async with SessionPool().asession(
+                url,
+                max_connections_per_host=self._max_connections_per_host,
+                keepalive_timeout=self._keepalive_timeout,
+                idle_timeout=self._session_idle_timeout,
+            ) as session:
+                yield session
 
 
 class EBClient(object):
-    """Provides low-level APIs to send HTTP requests and handle responses."""
+    """Provides low-level APIs to send HTTP requests and handle responses.
 
-    DEFAULT_REQUEST_TIMEOUT_SECS: Final[float] = constants.DEFAULT_REQUEST_TIMEOUT_SECS
+    The requests are sent through a `Transport`. If no transport is given, a
+    `DefaultTransport` is created from the session and connection pooling
+    arguments.
+    """
 
-    _session: Optional[requests.Session]
-    _asession: Optional[aiohttp.ClientSession]
+    DEFAULT_REQUEST_TIMEOUT_SECS: Final[float] = constants.DEFAULT_REQUEST_TIMEOUT_SECS
 
     def __init__(
         self,
@@ -88,13 +362,24 @@ class EBClient(object):
         asession: Optional[aiohttp.ClientSession] = None,
         response_handler: Optional[Callable[[EBResponse], EBResponse]] = None,
         proxy: Optional[str] = None,
+        max_connections_per_host: Optional[int] = None,
+        keepalive_timeout: Optional[float] = None,
+        session_idle_timeout: Optional[float] = None,
+        transport: Optional[Transport] = None,
     ) -> None:
         super().__init__()
         self._base_url = base_url
-        self._session = session
-        self._asession = asession
         self._resp_handler = response_handler
-        self._proxy = proxy
+        if transport is None:
+            transport = DefaultTransport(
+                session=session,
+                asession=asession,
+                proxy=proxy,
+                max_connections_per_host=max_connections_per_host,
+                keepalive_timeout=keepalive_timeout,
+                session_idle_timeout=session_idle_timeout,
+            )
+        self._transport = transport
 
     def prepare_request(
         self,
@@ -112,7 +397,7 @@ class EBClient(object):
                 url = add_query_params(url, [(str(k), str(v)) for k, v in params.items() if v is not None])
         elif method == "POST" or method == "PUT":
             if params:
-                data = json.dumps(params).encode()
+                data = json_codec.dumps(params)
         else:
             raise errors.ConnectionError(f"Unrecognized HTTP method: {repr(method)}")
 
@@ -133,52 +418,32 @@ class EBClient(object):
         headers: Optional[HeadersType] = None,
         request_timeout: Optional[float] = None,
     ) -> Union[EBResponse, Iterator[EBResponse]]:
-        ctx = self._make_requests_session_context_manager()
-        session = ctx.__enter__()
-        should_clean_up_ctx = True
-
+        req_ctx = get_current_request_context()
+        if req_ctx is not None and data is not None:
+            req_ctx.record_sent(len(data))
+        result = self._transport.send(
+            method.upper(),
+            url,
+            headers=headers,
+            data=data,
+            stream=stream,
+            timeout=request_timeout if request_timeout else self.DEFAULT_REQUEST_TIMEOUT_SECS,
+        )
+        should_close_result = True
         try:
-            result = self.send_request_raw(
-                session,
-                method.upper(),
-                url,
-                data=data,
-                headers=headers,
-                stream=stream,
-                request_timeout=request_timeout,
-            )
-            should_clean_up_result = True
-            try:
-                resp, got_stream = self._interpret_response(result)
-                if stream != got_stream:
-                    logging.warning("Unexpected response: %s", resp)
-                    logging.warning(
-                        f"A {'streamed' if stream else 'non-streamed'} response was expected, "
-                        f"but got a {'streamed' if got_stream else 'non-streamed'} response. "
-                    )
-                if got_stream:
-
-                    def wrap_resp(resp: Iterator) -> Iterator[EBResponse]:
-                        try:
-                            for r in resp:
-                                yield r
-                        finally:
-                            result.close()
-                            ctx.__exit__(None, None, None)
-
-                    assert isinstance(resp, Iterator)
-                    resp = wrap_resp(resp)
-
-                    should_clean_up_result = False
-                    should_clean_up_ctx = False
-            finally:
-                if should_clean_up_result:
-                    result.close()
+            if req_ctx is not None:
+                req_ctx.record_headers(result.status_code, result.headers)
+            resp: Union[EBResponse, Iterator[EBResponse]]
+            if self._is_stream_response(result.headers):
+                # The result is closed when the stream is exhausted or closed.
+                resp = self._interpret_stream_response(result, req_ctx)
+                should_close_result = False
+            else:
+                resp = self._interpret_body(result.read(), result.status_code, result.headers, req_ctx)
+            self._check_stream(stream, resp)
         finally:
-            if should_clean_up_ctx:
-                # We don't care about the exception type and the stack trace.
-                ctx.__exit__(None, None, None)
-
+            if should_close_result:
+                result.close()
         return resp
 
     async def asend_request(
@@ -191,107 +456,34 @@ class EBClient(object):
         headers: Optional[HeadersType] = None,
         request_timeout: Optional[float] = None,
     ) -> Union[EBResponse, AsyncIterator[EBResponse]]:
-        ctx = self._make_aiohttp_session_context_manager()
-        session = await ctx.__aenter__()
-        should_clean_up_ctx = True
-
+        req_ctx = get_current_request_context()
+        if req_ctx is not None and data is not None:
+            req_ctx.record_sent(len(data))
+        result = await self._transport.asend(
+            method.upper(),
+            url,
+            headers=headers,
+            data=data,
+            stream=stream,
+            timeout=request_timeout if request_timeout else self.DEFAULT_REQUEST_TIMEOUT_SECS,
+        )
+        should_close_result = True
         try:
-            result = await self.asend_request_raw(
-                session,
-                method.upper(),
-                url,
-                data=data,
-                headers=headers,
-                request_timeout=request_timeout,
-            )
-            should_clean_up_result = True
-            try:
-                resp, got_stream = await self._interpret_async_response(result)
-                if stream != got_stream:
-                    logging.warning("Unexpected response: %s", resp)
-                    logging.warning(
-                        f"A {'streamed' if stream else 'non-streamed'} response was expected, "
-                        f"but got a {'streamed' if got_stream else 'non-streamed'} response. "
-                    )
-                if got_stream:
-
-                    async def wrap_resp(resp: AsyncIterator) -> AsyncIterator[EBResponse]:
-                        try:
-                            async for r in resp:
-                                yield r
-                        finally:
-                            result.release()
-                            await ctx.__aexit__(None, None, None)
-
-                    assert isinstance(resp, AsyncIterator)
-                    resp = wrap_resp(resp)
-
-                    should_clean_up_result = False
-                    should_clean_up_ctx = False
-            finally:
-                if should_clean_up_result:
-                    result.release()
+            if req_ctx is not None:
+                req_ctx.record_headers(result.status_code, result.headers)
+            resp: Union[EBResponse, AsyncIterator[EBResponse]]
+            if self._is_stream_response(result.headers):
+                resp = self._interpret_async_stream_response(result, req_ctx)
+                should_close_result = False
+            else:
+                rbody = await result.read()
+                resp = self._interpret_body(rbody, result.status_code, result.headers, req_ctx)
+            self._check_stream(stream, resp)
         finally:
-            if should_clean_up_ctx:
-                await ctx.__aexit__(None, None, None)
-
+            if should_close_result:
+                await result.aclose()
         return resp
 
-    def send_request_raw(
-        self,
-        session: requests.Session,
-        method: str,
-        url: str,
-        data: Optional[bytes],
-        headers: Optional[HeadersType],
-        stream: bool,
-        request_timeout: Optional[float],
-    ) -> requests.Response:
-        try:
-            result = session.request(
-                method,
-                url,
-                headers=headers,
-                data=data,
-                stream=stream,
-                timeout=request_timeout if request_timeout else self.DEFAULT_REQUEST_TIMEOUT_SECS,
-                proxies=session.proxies,
-            )
-        except requests.exceptions.Timeout as e:
-            raise errors.TimeoutError(f"Request timed out: {e}") from e
-        except requests.exceptions.RequestException as e:
-            raise errors.ConnectionError(f"Error communicating with server: {e}") from e
-
-        return result
-
-    async def asend_request_raw(
-        self,
-        session: aiohttp.ClientSession,
-        method: str,
-        url: str,
-        data: Optional[bytes],
-        headers: Optional[HeadersType],
-        request_timeout: Optional[float],
-    ) -> aiohttp.ClientResponse:
-        timeout = aiohttp.ClientTimeout(
-            total=request_timeout if request_timeout else self.DEFAULT_REQUEST_TIMEOUT_SECS
-        )
-
-        request_kwargs: dict = {
-            "headers": headers,
-            "data": data,
-            "timeout": timeout,
-        }
-
-        try:
-            result = await session.request(method=method, url=url, **request_kwargs)
-        except (aiohttp.ServerTimeoutError, asyncio.TimeoutError) as e:
-            raise errors.TimeoutError(f"Request timed out: {e}") from e
-        except aiohttp.ClientError as e:
-            raise errors.ConnectionError(f"Error communicating with server: {e}") from e
-
-        return result
-
     def _get_request_headers(self, method: str, supplied_headers: Optional[HeadersType]) -> HeadersType:
         headers = {}
 
@@ -314,103 +506,122 @@ class EBClient(object):
             if not isinstance(v, str):
                 raise TypeError("Header values must be strings.")
 
-    def _interpret_response(
-        self, response: requests.Response
-    ) -> Tuple[Union[EBResponse, Iterator[EBResponse]], bool]:
-        if "Content-Type" in response.headers and response.headers["Content-Type"].startswith(
-            "text/event-stream"
-        ):
-            return (
-                self._interpret_stream_response(response),
-                True,
-            )
-        else:
-            return (
-                self._interpret_response_line(
-                    response.content.decode("utf-8"),
-                    response.status_code,
-                    response.headers,
-                    stream=False,
-                ),
-                False,
+    @staticmethod
+    def _is_stream_response(rheaders: Mapping[str, Any]) -> bool:
+        return rheaders.get("Content-Type", "").startswith("text/event-stream")
+
+    @staticmethod
+    def _check_stream(stream: bool, resp: Union[EBResponse, Iterator, AsyncIterator]) -> None:
+        got_stream = not isinstance(resp, EBResponse)
+        if stream != got_stream:
+            logging.warning("Unexpected response: %s", resp)
+            logging.warning(
+                f"A {'streamed' if stream else 'non-streamed'} response was expected, "
+                f"but got a {'streamed' if got_stream else 'non-streamed'} response. "
             )
 
-    async def _interpret_async_response(
-        self, response: aiohttp.ClientResponse
-    ) -> Tuple[Union[EBResponse, AsyncIterator[EBResponse]], bool]:
-        if "Content-Type" in response.headers and response.headers["Content-Type"].startswith(
-            "text/event-stream"
-        ):
-            return (
-                self._interpret_async_stream_response(response),
-                True,
-            )
-        else:
-            try:
-                rbody = await response.read()
-            except (aiohttp.ServerTimeoutError, asyncio.TimeoutError) as e:
-                raise errors.TimeoutError(f"Request timed out: {str(e)}") from e
-            else:
-                return (
-                    self._interpret_response_line(
-                        rbody.decode("utf-8"),
-                        response.status,
-                        response.headers,
-                        stream=False,
-                    ),
-                    False,
-                )
+    def _interpret_body(
+        self,
+        rbody: bytes,
+        rcode: int,
+        rheaders: Mapping[str, Any],
+        req_ctx: Optional[RequestContext] = None,
+    ) -> EBResponse:
+        if req_ctx is not None:
+            req_ctx.record_body(len(rbody))
+        return self._interpret_response_line(rbody, rcode, rheaders)
 
-    def _interpret_stream_response(self, response: requests.Response) -> Iterator[EBResponse]:
-        for line in self._parse_stream(response.iter_lines()):
-            resp = self._interpret_response_line(line, response.status_code, response.headers, stream=True)
-            yield resp
+    def _interpret_stream_response(
+        self, result: TransportResponse, req_ctx: Optional[RequestContext] = None
+    ) -> Iterator[EBResponse]:
+        try:
+            decoder = SSEDecoder()
+            rheaders = dict(result.headers)
+            for chunk in result.iter_bytes():
+                for event in decoder.feed(chunk):
+                    yield self._interpret_stream_event(event, result.status_code, rheaders, req_ctx)
+            for event in decoder.flush():
+                yield self._interpret_stream_event(event, result.status_code, rheaders, req_ctx)
+        finally:
+            result.close()
 
     async def _interpret_async_stream_response(
-        self, response: aiohttp.ClientResponse
+        self, result: AsyncTransportResponse, req_ctx: Optional[RequestContext] = None
     ) -> AsyncIterator[EBResponse]:
-        async for line in self._parse_async_stream(response.content):
-            resp = self._interpret_response_line(line, response.status, response.headers, stream=True)
-            yield resp
+        try:
+            decoder = SSEDecoder()
+            rheaders = dict(result.headers)
+            async for chunk in result.aiter_bytes():
+                for event in decoder.feed(chunk):
+                    yield self._interpret_stream_event(event, result.status_code, rheaders, req_ctx)
+            for event in decoder.flush():
+                yield self._interpret_stream_event(event, result.status_code, rheaders, req_ctx)
+        finally:
+            await result.aclose()
 
     def _interpret_response_line(
         self,
-        rbody: str,
+        rbody: bytes,
         rcode: int,
         rheaders: Mapping[str, Any],
-        stream: bool,
     ) -> EBResponse:
         content_type = rheaders.get("Content-Type", "")
+        decoded_rbody: Union[str, Dict[str, Any]]
         if content_type.startswith("text/plain"):
-            decoded_rbody = rbody
+            decoded_rbody = rbody.decode("utf-8")
         elif content_type.startswith("application/json") or content_type.startswith("text/event-stream"):
-            try:
-                decoded_rbody = json.loads(rbody)
-            except (JSONDecodeError, UnicodeDecodeError) as e:
-                raise errors.HTTPRequestError(
-                    "Could not decode the response body.",
-                    rcode=rcode,
-                    rbody=rbody,
-                    rheaders=rheaders,
-                ) from e
-            if not isinstance(decoded_rbody, (str, dict)):
-                raise errors.HTTPRequestError(
-                    f"The decoded response body has an unsupported type: {type(decoded_rbody)}",
-                    rcode=rcode,
-                    rbody=rbody,
-                    rheaders=rheaders,
-                )
+            decoded_rbody = self._decode_json(rbody, rcode, rheaders)
         else:
             raise errors.HTTPRequestError(
                 f"Unexpected content type: {content_type}",
                 rcode=rcode,
-                rbody=rbody,
+                rbody=rbody.decode("utf-8", errors="replace"),
+                rheaders=rheaders,
+            )
+        return self._make_response(decoded_rbody, rcode, dict(rheaders))
+
+    def _interpret_stream_event(
+        self,
+        event: SSEEvent,
+        rcode: int,
+        rheaders: Dict[str, Any],
+        req_ctx: Optional[RequestContext] = None,
+    ) -> EBResponse:
+        # The content type has been checked for the whole stream, so the data
+        # is known to be JSON.
+        resp = self._make_response(self._decode_json(event.data, rcode, rheaders), rcode, rheaders)
+        if req_ctx is not None:
+            req_ctx.record_chunk(resp, len(event.data))
+        return resp
+
+    def _decode_json(
+        self, rbody: Union[bytes, memoryview], rcode: int, rheaders: Mapping[str, Any]
+    ) -> Union[str, Dict[str, Any]]:
+        try:
+            # The body is decoded directly from bytes.
+            decoded_rbody = json_codec.loads(rbody)
+        except (json_codec.JSONDecodeError, UnicodeDecodeError) as e:
+            raise errors.HTTPRequestError(
+                "Could not decode the response body.",
+                rcode=rcode,
+                rbody=bytes(rbody).decode("utf-8", errors="replace"),
+                rheaders=rheaders,
+            ) from e
+        if not isinstance(decoded_rbody, (str, dict)):
+            raise errors.HTTPRequestError(
+                f"The decoded response body has an unsupported type: {type(decoded_rbody)}",
+                rcode=rcode,
+                rbody=bytes(rbody).decode("utf-8", errors="replace"),
                 rheaders=rheaders,
             )
+        return decoded_rbody
 
+    def _make_response(
+        self, decoded_rbody: Union[str, Dict[str, Any]], rcode: int, rheaders: Dict[str, Any]
+    ) -> EBResponse:
         logging.debug("Decoded response body: %r", decoded_rbody)
 
-        response = EBResponse(rcode=rcode, rbody=decoded_rbody, rheaders=dict(rheaders))
+        response = EBResponse(rcode=rcode, rbody=decoded_rbody, rheaders=rheaders)
 
         if rcode != http.HTTPStatus.OK:
             raise errors.HTTPRequestError(
@@ -423,59 +634,3 @@ class EBClient(object):
         if self._resp_handler is not None:
             response = self._resp_handler(response)
         return response
-
-    def _parse_stream(self, rbody: Iterator[bytes]) -> Iterator[str]:
-        for line in rbody:
-            _line = self._parse_line(line)
-            if _line is not None:
-                yield _line
-
-    async def _parse_async_stream(self, rbody: aiohttp.StreamReader) -> AsyncIterator[str]:
-        async for line in rbody:
-            _line = self._parse_line(line)
-            if _line is not None:
-                yield _line
-
-    def _parse_line(self, line: bytes) -> Optional[str]:
-        if line:
-            if line.startswith(constants.STREAM_RESPONSE_PREFIX):
-                line = line[len(constants.STREAM_RESPONSE_PREFIX) :]
-                return line.decode("utf-8")
-            else:
-                # Filter out other lines
-                return None
-        return None
-
-    @contextmanager
-    def _make_requests_session_context_manager(self) -> Generator[requests.Session, None, None]:
-        if self._session is not None:
-            session = self._session
-            should_close_session = False
-        else:
-            session = requests.Session()
-            should_close_session = True
-        try:
-            if self._proxy is not None:
-                proxies = {"http": self._proxy, "https": self._proxy}
-                session.proxies = proxies
-            yield session
-        finally:
-            if should_close_session:
-                session.close()
-
-    @asynccontextmanager
-    async def _make_aiohttp_session_context_manager(
-        self,
-    ) -> AsyncGenerator[aiohttp.ClientSession, None]:
-        # TODO: Support proxies
-        if self._asession is not None:
-            session = self._asession
-            should_close_session = False
-        else:
-            session = aiohttp.ClientSession()
-            should_close_session = True
-        try:
-            yield session
-        finally:
-            if should_close_session:
-                await session.close()
@@ -0,0 +1,214 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import threading
+import weakref
+from contextlib import contextmanager
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Dict,
+    Generator,
+    Iterator,
+    MutableMapping,
+    Optional,
+)
+
+from . import constants, errors
+from .http_client import AsyncTransportResponse, Transport, TransportResponse
+from .types import HeadersType
+
+if TYPE_CHECKING:
+    import httpx
+
+__all__ = ["HTTPXTransport"]
+
+
+class HTTPXTransport(Transport):
+    """Transport that sends requests with `httpx`, over HTTP/2 by default.
+
+    With HTTP/2, concurrent requests to the same host are multiplexed as
+    streams over a few connections, rather than each holding a connection of
+    its own, which suits many concurrent streamed chat completions. Servers
+    that do not support HTTP/2 are spoken to over HTTP/1.1.
+
+    Synchronous requests from all threads share one connection pool.
+    Connections cannot be shared between blocking code and event loops, so
+    asynchronous requests share one connection pool per event loop. Call
+    `close`, and `aclose` in every event loop, to close the connections.
+
+    This requires the `httpx` package, and the `h2` package for HTTP/2. Both
+    can be installed with `pip install httpx[http2]`.
+
+    Args:
+        http2: Whether to enable HTTP/2.
+        proxy: URL of the proxy to use.
+        max_connections: Maximum number of connections in each pool.
+        keepalive_expiry: Time after which idle connections are closed, in
+            seconds.
+    """
+
+    def __init__(
+        self,
+        *,
+        http2: bool = True,
+        proxy: Optional[str] = None,
+        max_connections: int = constants.DEFAULT_MAX_CONNECTIONS_PER_HOST,
+        keepalive_expiry: float = constants.DEFAULT_KEEPALIVE_TIMEOUT_SECS,
+    ) -> None:
+        super().__init__()
+        try:
+            import httpx
+        except ImportError as e:
+            raise ImportError(
+                "`HTTPXTransport` requires the `httpx` package."
+                " Please install it with `pip install httpx[http2]`."
+            ) from e
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError as e:
+                raise ImportError(
+                    "HTTP/2 requires the `h2` package. Please install it with"
+                    " `pip install httpx[http2]`, or set `http2` to False."
+                ) from e
+        self._httpx = httpx
+        self._client_kwargs: Dict[str, Any] = {
+            "http2": http2,
+            "proxy": proxy,
+            "limits": httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+        }
+        self._lock = threading.Lock()
+        self._client: Optional["httpx.Client"] = None
+        self._aclients: MutableMapping[
+            asyncio.AbstractEventLoop, "httpx.AsyncClient"
+        ] = weakref.WeakKeyDictionary()
+
+    def send(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: Optional[HeadersType],
+        data: Optional[bytes],
+        stream: bool,
+        timeout: float,
+    ) -> TransportResponse:
+        client = self._get_client()
+        request = client.build_request(method, url, headers=headers, content=data, timeout=timeout)
+        with self._translate_errors():
+            response = client.send(request, stream=True)
+        return _HTTPXResponse(self, response)
+
+    async def asend(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: Optional[HeadersType],
+        data: Optional[bytes],
+        stream: bool,
+        timeout: float,
+    ) -> AsyncTransportResponse:
+        client = self._get_aclient()
+        request = client.build_request(method, url, headers=headers, content=data, timeout=timeout)
+        with self._translate_errors():
+            response = await client.send(request, stream=True)
+        return _AsyncHTTPXResponse(self, response)
+
+    def close(self) -> None:
+        with self._lock:
+            client, self._client = self._client, None
+        if client is not None:
+            client.close()
+
+    async def aclose(self) -> None:
+        with self._lock:
+            client = self._aclients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    def _get_client(self) -> "httpx.Client":
+        client = self._client
+        if client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._httpx.Client(**self._client_kwargs)
+                client = self._client
+        return client
+
+    def _get_aclient(self) -> "httpx.AsyncClient":
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._aclients.get(loop, None)
+            if client is None:
+                client = self._httpx.AsyncClient(**self._client_kwargs)
+                self._aclients[loop] = client
+        return client
+
+    @contextmanager
+    def _translate_errors(self) -> Generator[None, None, None]:
+        try:
+            yield
+        except self._httpx.TimeoutException as e:
+            raise errors.TimeoutError(f"Request timed out: {e}") from e
+        except self._httpx.HTTPError as e:
+            raise errors.ConnectionError(f"Error communicating with server: {e}") from e
+
+
+class _HTTPXResponse(TransportResponse):
+    def __init__(self, transport: HTTPXTransport, response: "httpx.Response") -> None:
+        super().__init__()
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self._transport = transport
+        self._response = response
+
+    def read(self) -> bytes:
+        with self._transport._translate_errors():
+            return self._response.read()
+
+    def iter_bytes(self) -> Iterator[bytes]:
+        with self._transport._translate_errors():
+            yield from self._response.iter_bytes()
+
+    def close(self) -> None:
+        self._response.close()
+
+
+class _AsyncHTTPXResponse(AsyncTransportResponse):
+    def __init__(self, transport: HTTPXTransport, response: "httpx.Response") -> None:
+        super().__init__()
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self._transport = transport
+        self._response = response
+
+    async def read(self) -> bytes:
+        with self._transport._translate_errors():
+            return await self._response.aread()
+
+    async def aiter_bytes(self) -> AsyncIterator[bytes]:
+        with self._transport._translate_errors():
+            async for chunk in self._response.aiter_bytes():
+                yield chunk
+
+    async def aclose(self) -> None:
+        await self._response.aclose()
@@ -0,0 +1,28 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from .hooks import RequestContext, RequestHooks, get_current_request_context
+from .metrics import Counter, Histogram, MetricsCollector, start_prometheus_server
+from .tracing import SpanEmitter
+
+__all__ = [
+    "RequestHooks",
+    "RequestContext",
+    "get_current_request_context",
+    "Counter",
+    "Histogram",
+    "MetricsCollector",
+    "start_prometheus_server",
+    "SpanEmitter",
+]
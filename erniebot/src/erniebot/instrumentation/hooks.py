@@ -0,0 +1,279 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import contextvars
+import itertools
+import time
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from erniebot.response import EBResponse
+from erniebot.utils import logging
+
+__all__ = ["RequestHooks", "RequestContext", "get_current_request_context"]
+
+
+class RequestHooks(object):
+    """Callbacks that are invoked at each stage of a request.
+
+    Subclasses override the methods of interest. Hooks are registered with
+    the `request_hooks` setting, e.g.
+    `erniebot.request_hooks = [MetricsCollector()]`, and are invoked in the
+    thread or task that sends the request, so they should return quickly.
+    Exceptions raised by hooks are logged and otherwise ignored.
+
+    All methods receive the `RequestContext` of the request, which carries
+    the timings and byte counts measured so far.
+    """
+
+    def on_request_start(self, ctx: "RequestContext") -> None:
+        """Called before the first attempt of a request is sent."""
+
+    def on_headers(self, ctx: "RequestContext", status_code: int, headers: Mapping[str, Any]) -> None:
+        """Called when the status line and headers of a response arrive.
+
+        This is called once for every attempt.
+        """
+
+    def on_first_chunk(self, ctx: "RequestContext", chunk: EBResponse) -> None:
+        """Called when the first chunk of a streamed response arrives."""
+
+    def on_chunk(self, ctx: "RequestContext", chunk: EBResponse, num_bytes: int) -> None:
+        """Called for every chunk of a streamed response, including the first
+        one."""
+
+    def on_retry(self, ctx: "RequestContext", error: BaseException, delay: float) -> None:
+        """Called when an attempt has failed and is about to be retried.
+
+        `ctx.attempt` is the number of the failed attempt, and `delay` is the
+        time to wait before the next one.
+        """
+
+    def on_request_end(
+        self, ctx: "RequestContext", response: Optional[EBResponse], error: Optional[BaseException]
+    ) -> None:
+        """Called when a request has completed or failed.
+
+        For streamed requests, this is called when the stream is exhausted or
+        closed, and `response` is None.
+        """
+
+
+class RequestContext(object):
+    """State of a request that is shared by the hooks.
+
+    Times are measured with `time.perf_counter`. `attributes` is free for
+    hooks to store their own per-request state in.
+
+    Attempts that run concurrently, such as hedged requests, record into
+    contexts created with `fork`, so that only the attempt whose response is
+    used is accounted for.
+    """
+
+    __slots__ = (
+        "hooks",
+        "request_id",
+        "api_type",
+        "method",
+        "path",
+        "model",
+        "stream",
+        "attempt",
+        "start_time",
+        "start_time_ns",
+        "headers_time",
+        "first_chunk_time",
+        "end_time",
+        "status_code",
+        "bytes_sent",
+        "bytes_received",
+        "num_chunks",
+        "usage",
+        "error",
+        "attributes",
+        "_parent",
+        "_pending_events",
+    )
+
+    _ids = itertools.count(1)
+
+    def __init__(
+        self,
+        hooks: Sequence[RequestHooks],
+        *,
+        api_type: str,
+        method: str,
+        path: str,
+        model: Optional[str],
+        stream: bool,
+    ) -> None:
+        super().__init__()
+        self.hooks: Tuple[RequestHooks, ...] = tuple(hooks)
+        self.request_id = next(self._ids)
+        self.api_type = api_type
+        self.method = method
+        self.path = path
+        self.model = model
+        self.stream = stream
+        self.attempt = 1
+        self.start_time = time.perf_counter()
+        # Wall-clock time, for exporters that need timestamps
+        self.start_time_ns = time.time_ns()
+        self.headers_time: Optional[float] = None
+        self.first_chunk_time: Optional[float] = None
+        self.end_time: Optional[float] = None
+        self.status_code: Optional[int] = None
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.num_chunks = 0
+        # Token usage reported by the server
+        self.usage: Optional[Dict[str, Any]] = None
+        self.error: Optional[BaseException] = None
+        self.attributes: Dict[str, Any] = {}
+        self._parent: Optional[RequestContext] = None
+        self._pending_events: Optional[List[Callable[[RequestContext], None]]] = None
+
+    @property
+    def time_to_headers(self) -> Optional[float]:
+        """Time from the start of the request to the headers of the last
+        attempt, in seconds."""
+        return None if self.headers_time is None else self.headers_time - self.start_time
+
+    @property
+    def time_to_first_chunk(self) -> Optional[float]:
+        """Time from the start of the request to the first chunk of a
+        streamed response, in seconds."""
+        return None if self.first_chunk_time is None else self.first_chunk_time - self.start_time
+
+    @property
+    def duration(self) -> Optional[float]:
+        """Time from the start to the end of the request, in seconds."""
+        return None if self.end_time is None else self.end_time - self.start_time
+
+    def start(self) -> None:
+        self._emit("on_request_start", self)
+
+    def fork(self) -> "RequestContext":
+        """Creates a context for one of several concurrent attempts of the
+        request.
+
+        What is recorded in the returned context is passed on to this context
+        only after `commit` is called on the returned context. The records of
+        attempts that are never committed (e.g. hedged attempts that lost the
+        race) are dropped.
+        """
+        ctx = RequestContext(
+            (),
+            api_type=self.api_type,
+            method=self.method,
+            path=self.path,
+            model=self.model,
+            stream=self.stream,
+        )
+        ctx.request_id = self.request_id
+        ctx.attempt = self.attempt
+        ctx._parent = self
+        ctx._pending_events = []
+        return ctx
+
+    def commit(self) -> None:
+        """Passes what has been recorded in a context created with `fork` on
+        to the context of the request, as well as everything recorded
+        afterwards."""
+        if self._parent is None:
+            raise RuntimeError("Only contexts created with `fork` can be committed.")
+        events, self._pending_events = self._pending_events, None
+        for event in events or ():
+            event(self._parent)
+
+    def record_sent(self, num_bytes: int) -> None:
+        self.bytes_sent += num_bytes
+        if self._parent is not None:
+            self._forward(lambda ctx: ctx.record_sent(num_bytes))
+
+    def record_headers(
+        self, status_code: int, headers: Mapping[str, Any], *, timestamp: Optional[float] = None
+    ) -> None:
+        self.headers_time = time.perf_counter() if timestamp is None else timestamp
+        self.status_code = status_code
+        self._emit("on_headers", self, status_code, headers)
+        if self._parent is not None:
+            headers_time = self.headers_time
+            self._forward(lambda ctx: ctx.record_headers(status_code, headers, timestamp=headers_time))
+
+    def record_body(self, num_bytes: int) -> None:
+        self.bytes_received += num_bytes
+        if self._parent is not None:
+            self._forward(lambda ctx: ctx.record_body(num_bytes))
+
+    def record_chunk(self, chunk: EBResponse, num_bytes: int, *, timestamp: Optional[float] = None) -> None:
+        self.num_chunks += 1
+        self.bytes_received += num_bytes
+        usage = chunk.get("usage", None)
+        if usage:
+            self.usage = usage
+        if self.first_chunk_time is None:
+            self.first_chunk_time = time.perf_counter() if timestamp is None else timestamp
+            self._emit("on_first_chunk", self, chunk)
+        self._emit("on_chunk", self, chunk, num_bytes)
+        if self._parent is not None:
+            first_chunk_time = self.first_chunk_time
+            self._forward(lambda ctx: ctx.record_chunk(chunk, num_bytes, timestamp=first_chunk_time))
+
+    def record_retry(self, error: BaseException, delay: float) -> None:
+        self._emit("on_retry", self, error, delay)
+        self.attempt += 1
+
+    def end(self, response: Optional[EBResponse], error: Optional[BaseException]) -> None:
+        if self.end_time is not None:
+            return
+        self.end_time = time.perf_counter()
+        self.error = error
+        if response is not None:
+            usage = response.get("usage", None)
+            if usage:
+                self.usage = usage
+        self._emit("on_request_end", self, response, error)
+
+    def _forward(self, event: Callable[["RequestContext"], None]) -> None:
+        assert self._parent is not None
+        if self._pending_events is not None:
+            self._pending_events.append(event)
+        else:
+            event(self._parent)
+
+    def _emit(self, event: str, *args: Any) -> None:
+        for hooks in self.hooks:
+            try:
+                getattr(hooks, event)(*args)
+            except Exception:
+                logging.error("Error in request hook %r", event, exc_info=True)
+
+
+_current_context: "contextvars.ContextVar[Optional[RequestContext]]" = contextvars.ContextVar(
+    "erniebot_request_context", default=None
+)
+
+
+def get_current_request_context() -> Optional[RequestContext]:
+    """Returns the context of the request being sent in the current thread or
+    task, or None if no hooks are registered."""
+    return _current_context.get()
+
+
+def set_current_request_context(ctx: Optional[RequestContext]) -> contextvars.Token:
+    return _current_context.set(ctx)
+
+
+def reset_current_request_context(token: contextvars.Token) -> None:
+    _current_context.reset(token)
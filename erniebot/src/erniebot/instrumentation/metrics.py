@@ -0,0 +1,319 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import bisect
+import math
+import threading
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Final,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import erniebot.errors as errors
+from erniebot.response import EBResponse
+
+from .hooks import RequestContext, RequestHooks
+
+if TYPE_CHECKING:
+    import http.server
+
+__all__ = ["Counter", "Histogram", "MetricsCollector", "start_prometheus_server"]
+
+_LabelValues = Tuple[str, ...]
+
+# Buckets of latency histograms, in seconds
+DEFAULT_LATENCY_BUCKETS: Final[Tuple[float, ...]] = (
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    30,
+    60,
+    120,
+)
+
+
+class Counter(object):
+    """A monotonically increasing value for each combination of labels."""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> None:
+        super().__init__()
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: Dict[_LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def get(self, *label_values: str) -> float:
+        with self._lock:
+            return self._values.get(label_values, 0)
+
+    def collect(self) -> List[Tuple[_LabelValues, float]]:
+        with self._lock:
+            return sorted(self._values.items())
+
+    def to_prometheus(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for label_values, value in self.collect():
+            labels = _format_labels(self.label_names, label_values)
+            lines.append(f"{self.name}{labels} {_format_value(value)}")
+        return lines
+
+
+class Histogram(object):
+    """Counts of observations in cumulative buckets, for each combination of
+    labels."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__()
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        # Per labels: the counts of observations in each bucket (the last one
+        # is +Inf, and the counts are not cumulative), and their sum.
+        self._values: Dict[_LabelValues, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(label_values, None)
+            if entry is None:
+                entry = ([0] * (len(self.buckets) + 1), [0.0])
+                self._values[label_values] = entry
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    def get_count(self, *label_values: str) -> int:
+        with self._lock:
+            entry = self._values.get(label_values, None)
+            return 0 if entry is None else sum(entry[0])
+
+    def get_sum(self, *label_values: str) -> float:
+        with self._lock:
+            entry = self._values.get(label_values, None)
+            return 0.0 if entry is None else entry[1][0]
+
+    def collect(self) -> List[Tuple[_LabelValues, List[int], float]]:
+        """Returns the cumulative bucket counts and the sum for each
+        combination of labels."""
+        with self._lock:
+            items = sorted((k, list(v[0]), v[1][0]) for k, v in self._values.items())
+        result = []
+        for label_values, counts, total in items:
+            cumulative = []
+            running = 0
+            for count in counts:
+                running += count
+                cumulative.append(running)
+            result.append((label_values, cumulative, total))
+        return result
+
+    def to_prometheus(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        bounds = [_format_value(bound) for bound in self.buckets] + ["+Inf"]
+        for label_values, cumulative, total in self.collect():
+            for bound, count in zip(bounds, cumulative):
+                labels = _format_labels(self.label_names + ("le",), label_values + (bound,))
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.label_names, label_values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative[-1]}")
+        return lines
+
+
+class MetricsCollector(RequestHooks):
+    """Request hooks that aggregate metrics of the requests sent by the SDK.
+
+    The metrics are labeled with the API type and the model (or the request
+    path, for resources that do not select a model), and can be exported in
+    the Prometheus text format with `to_prometheus`, or served over HTTP with
+    `start_prometheus_server`.
+
+    Args:
+        namespace: Prefix of the names of the metrics.
+        latency_buckets: Upper bounds of the buckets of latency histograms, in
+            seconds.
+    """
+
+    def __init__(
+        self, *, namespace: str = "erniebot", latency_buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS
+    ) -> None:
+        super().__init__()
+        labels = ("api_type", "model")
+        self.requests = Counter(
+            f"{namespace}_requests_total", "Number of completed requests.", labels + ("outcome",)
+        )
+        self.request_duration = Histogram(
+            f"{namespace}_request_duration_seconds",
+            "Time from the start to the end of requests, including retries and streaming.",
+            labels + ("stream",),
+            latency_buckets,
+        )
+        self.time_to_first_token = Histogram(
+            f"{namespace}_time_to_first_token_seconds",
+            "Time from the start of streamed requests to their first chunks.",
+            labels,
+            latency_buckets,
+        )
+        self.retries = Counter(
+            f"{namespace}_retries_total", "Number of retried attempts.", labels + ("reason",)
+        )
+        self.rate_limit_hits = Counter(
+            f"{namespace}_rate_limit_hits_total", "Number of attempts rejected by rate limiting.", labels
+        )
+        self.tokens = Counter(
+            f"{namespace}_tokens_total", "Number of tokens reported by the server.", labels + ("kind",)
+        )
+        self.bytes_sent = Counter(f"{namespace}_request_bytes_total", "Number of bytes sent.", labels)
+        self.bytes_received = Counter(
+            f"{namespace}_response_bytes_total", "Number of bytes received.", labels
+        )
+        self.in_flight = 0
+        self._in_flight_lock = threading.Lock()
+
+    @property
+    def metrics(self) -> List[Any]:
+        return [
+            self.requests,
+            self.request_duration,
+            self.time_to_first_token,
+            self.retries,
+            self.rate_limit_hits,
+            self.tokens,
+            self.bytes_sent,
+            self.bytes_received,
+        ]
+
+    def on_request_start(self, ctx: RequestContext) -> None:
+        with self._in_flight_lock:
+            self.in_flight += 1
+
+    def on_retry(self, ctx: RequestContext, error: BaseException, delay: float) -> None:
+        labels = _get_labels(ctx)
+        self.retries.inc(*labels, type(error).__name__)
+        if _is_rate_limit_error(error):
+            self.rate_limit_hits.inc(*labels)
+
+    def on_request_end(
+        self, ctx: RequestContext, response: Optional[EBResponse], error: Optional[BaseException]
+    ) -> None:
+        with self._in_flight_lock:
+            self.in_flight -= 1
+        labels = _get_labels(ctx)
+        self.requests.inc(*labels, "success" if error is None else type(error).__name__)
+        if error is not None and _is_rate_limit_error(error):
+            self.rate_limit_hits.inc(*labels)
+        if ctx.duration is not None:
+            self.request_duration.observe(ctx.duration, *labels, "true" if ctx.stream else "false")
+        if ctx.time_to_first_chunk is not None:
+            self.time_to_first_token.observe(ctx.time_to_first_chunk, *labels)
+        if isinstance(ctx.usage, Mapping):
+            for kind in ("prompt_tokens", "completion_tokens"):
+                num_tokens = ctx.usage.get(kind, None)
+                if isinstance(num_tokens, (int, float)) and num_tokens > 0:
+                    self.tokens.inc(*labels, kind[: -len("_tokens")], amount=num_tokens)
+        if ctx.bytes_sent:
+            self.bytes_sent.inc(*labels, amount=ctx.bytes_sent)
+        if ctx.bytes_received:
+            self.bytes_received.inc(*labels, amount=ctx.bytes_received)
+
+    def to_prometheus(self) -> str:
+        """Returns the metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.to_prometheus())
+        name = self.requests.name[: -len("_requests_total")] + "_requests_in_flight"
+        lines.append(f"# HELP {name} Number of requests in flight.")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {self.in_flight}")
+        return "\n".join(lines) + "\n"
+
+
+def start_prometheus_server(
+    collector: MetricsCollector, port: int, host: str = "127.0.0.1"
+) -> "http.server.ThreadingHTTPServer":
+    """Serves the metrics of a collector for Prometheus to scrape.
+
+    The server runs in a daemon thread and responds to every GET request with
+    the metrics. Call `shutdown` on the returned server to stop it.
+
+    By default, the server only listens on the loopback interface. Pass
+    `host="0.0.0.0"` to expose the metrics to other hosts.
+    """
+    import http.server
+
+    class _Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            body = collector.to_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    server = http.server.ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(target=server.serve_forever, name="erniebot-prometheus", daemon=True).start()
+    return server
+
+
+def _get_labels(ctx: RequestContext) -> Tuple[str, str]:
+    return (ctx.api_type, ctx.model if ctx.model is not None else ctx.path)
+
+
+def _is_rate_limit_error(error: BaseException) -> bool:
+    return isinstance(error, (errors.RateLimitError, errors.RequestLimitError))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        value = value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
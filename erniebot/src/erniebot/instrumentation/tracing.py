@@ -0,0 +1,125 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Any, Mapping, Optional
+
+from erniebot.response import EBResponse
+from erniebot.version import VERSION
+
+from .hooks import RequestContext, RequestHooks
+
+__all__ = ["SpanEmitter"]
+
+
+class SpanEmitter(RequestHooks):
+    """Request hooks that emit an OpenTelemetry span for every request.
+
+    A span covers a request from its start to its end, including retries and
+    the consumption of streamed responses. The arrival of headers and of the
+    first chunk and retries are recorded as span events, and token usage and
+    byte counts as span attributes.
+
+    This requires the `opentelemetry-api` package. The spans are exported by
+    whatever SDK and exporters are configured for OpenTelemetry.
+
+    Args:
+        tracer: Tracer to create spans with. Defaults to the tracer named
+            `erniebot` of the global tracer provider.
+    """
+
+    def __init__(self, tracer: Optional[Any] = None) -> None:
+        super().__init__()
+        try:
+            from opentelemetry import trace
+        except ImportError as e:
+            raise ImportError(
+                "`SpanEmitter` requires the `opentelemetry-api` package."
+                " Please install it with `pip install opentelemetry-api`."
+            ) from e
+        self._trace = trace
+        self._tracer = tracer if tracer is not None else trace.get_tracer("erniebot", VERSION)
+        self._key = f"otel_span_{id(self)}"
+
+    def on_request_start(self, ctx: RequestContext) -> None:
+        attributes = {
+            "http.request.method": ctx.method,
+            "url.path": ctx.path,
+            "erniebot.api_type": ctx.api_type,
+            "erniebot.stream": ctx.stream,
+        }
+        if ctx.model is not None:
+            attributes["gen_ai.request.model"] = ctx.model
+        span = self._tracer.start_span(
+            f"erniebot {ctx.model or ctx.path}",
+            kind=self._trace.SpanKind.CLIENT,
+            attributes=attributes,
+            start_time=ctx.start_time_ns,
+        )
+        ctx.attributes[self._key] = span
+
+    def on_headers(self, ctx: RequestContext, status_code: int, headers: Mapping[str, Any]) -> None:
+        span = ctx.attributes.get(self._key, None)
+        if span is not None:
+            span.add_event(
+                "headers", {"http.response.status_code": status_code, "erniebot.attempt": ctx.attempt}
+            )
+
+    def on_first_chunk(self, ctx: RequestContext, chunk: EBResponse) -> None:
+        span = ctx.attributes.get(self._key, None)
+        if span is not None:
+            span.add_event("first_chunk")
+
+    def on_retry(self, ctx: RequestContext, error: BaseException, delay: float) -> None:
+        span = ctx.attributes.get(self._key, None)
+        if span is not None:
+            span.add_event(
+                "retry",
+                {
+                    "erniebot.attempt": ctx.attempt,
+                    "erniebot.retry_delay": delay,
+                    "exception.type": type(error).__name__,
+                    "exception.message": str(error),
+                },
+            )
+
+    def on_request_end(
+        self, ctx: RequestContext, response: Optional[EBResponse], error: Optional[BaseException]
+    ) -> None:
+        span = ctx.attributes.pop(self._key, None)
+        if span is None:
+            return
+        attributes = {
+            "erniebot.attempts": ctx.attempt,
+            "erniebot.request_bytes": ctx.bytes_sent,
+            "erniebot.response_bytes": ctx.bytes_received,
+        }
+        if ctx.status_code is not None:
+            attributes["http.response.status_code"] = ctx.status_code
+        if ctx.stream:
+            attributes["erniebot.num_chunks"] = ctx.num_chunks
+        if isinstance(ctx.usage, Mapping):
+            for key, name in (
+                ("prompt_tokens", "gen_ai.usage.input_tokens"),
+                ("completion_tokens", "gen_ai.usage.output_tokens"),
+            ):
+                if isinstance(ctx.usage.get(key, None), int):
+                    attributes[name] = ctx.usage[key]
+        span.set_attributes(attributes)
+        if error is not None:
+            span.record_exception(error)
+            span.set_status(self._trace.Status(self._trace.StatusCode.ERROR, str(error)))
+        end_time = None
+        if ctx.duration is not None:
+            end_time = ctx.start_time_ns + int(ctx.duration * 1e9)
+        span.end(end_time=end_time)
@@ -0,0 +1,273 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import heapq
+import itertools
+import random
+import threading
+import time
+import weakref
+from typing import Awaitable, Callable, List, MutableMapping, Optional, Set, Tuple
+
+import erniebot.constants as constants
+import erniebot.errors as errors
+from erniebot.response import EBResponse
+
+from .utils import logging
+
+__all__ = ["TaskPoller", "get_task_poller", "wait_until"]
+
+
+class _PollEntry(object):
+    def __init__(
+        self,
+        fetch: Callable[[], Awaitable[EBResponse]],
+        until: Callable[[EBResponse], bool],
+        deadline: Optional[float],
+        interval: float,
+        future: "asyncio.Future[EBResponse]",
+    ) -> None:
+        super().__init__()
+        self.fetch = fetch
+        self.until = until
+        self.deadline = deadline
+        self.interval = interval
+        self.future = future
+
+
+class TaskPoller(object):
+    """Polls the statuses of many long-running tasks from a single loop.
+
+    Instead of running a polling loop for each task, tasks are submitted to
+    the poller, which keeps them in a queue ordered by the time of their next
+    poll. The interval between polls of a task grows exponentially with
+    jitter, so tasks that are submitted together do not poll in lockstep. As
+    polls are sent with `EBResource.arequest`, they are subject to the rate
+    limits and retries of the resource.
+
+    The poller is bound to the event loop that it is first used in.
+
+    Args:
+        min_interval: Delay before the first poll of a task.
+        max_interval: Maximum interval between polls of a task.
+        multiplier: Factor by which the interval grows after each poll.
+        max_concurrent_polls: Maximum number of polls in flight.
+    """
+
+    def __init__(
+        self,
+        *,
+        min_interval: float = constants.POLLING_MIN_INTERVAL_SECS,
+        max_interval: float = constants.POLLING_MAX_INTERVAL_SECS,
+        multiplier: float = 2.0,
+        max_concurrent_polls: int = 16,
+    ) -> None:
+        super().__init__()
+        if min_interval <= 0 or max_interval < min_interval:
+            raise ValueError("Invalid polling intervals.")
+        if multiplier < 1:
+            raise ValueError("`multiplier` must not be less than 1.")
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.multiplier = multiplier
+        self.max_concurrent_polls = max_concurrent_polls
+        # Entries ordered by the time of their next poll. The counter breaks
+        # ties.
+        self._queue: List[Tuple[float, int, _PollEntry]] = []
+        self._counter = itertools.count()
+        # Synchronization primitives are created in the event loop.
+        self._loop_ref: Optional["weakref.ref[asyncio.AbstractEventLoop]"] = None
+        self._poll_semaphore: asyncio.Semaphore
+        self._wakeup: asyncio.Event
+        self._runner: Optional[asyncio.Future] = None
+        self._polls: Set[asyncio.Future] = set()
+
+    @property
+    def num_pending(self) -> int:
+        """The number of tasks that have not completed."""
+        return len(self._queue) + len(self._polls)
+
+    def submit(
+        self,
+        fetch: Callable[[], Awaitable[EBResponse]],
+        until: Callable[[EBResponse], bool],
+        *,
+        timeout: Optional[float] = None,
+    ) -> "asyncio.Future[EBResponse]":
+        """Starts polling a task.
+
+        Args:
+            fetch: Function that fetches the status of the task.
+            until: Function that returns True if the task has completed. It
+                may raise an exception to indicate that the task has failed.
+            timeout: Maximum time to wait for the task to complete. If None,
+                wait indefinitely.
+
+        Returns:
+            A future that resolves to the last fetched response when `until`
+            returns True. Cancelling the future stops polling the task.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop_ref is None:
+            # A weak reference allows the loop to be collected while the poller
+            # is kept in a registry keyed by the loop.
+            self._loop_ref = weakref.ref(loop)
+            self._poll_semaphore = asyncio.Semaphore(self.max_concurrent_polls)
+            self._wakeup = asyncio.Event()
+        elif loop is not self._loop_ref():
+            raise RuntimeError("The poller is bound to a different event loop.")
+        now = loop.time()
+        deadline = now + timeout if timeout is not None else None
+        future = loop.create_future()
+        entry = _PollEntry(fetch, until, deadline, self.min_interval, future)
+        first_poll_at = now + self.min_interval
+        if deadline is not None:
+            first_poll_at = min(first_poll_at, deadline)
+        self._schedule(entry, first_poll_at)
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.ensure_future(self._run())
+        return future
+
+    async def wait(
+        self,
+        fetch: Callable[[], Awaitable[EBResponse]],
+        until: Callable[[EBResponse], bool],
+        *,
+        timeout: Optional[float] = None,
+    ) -> EBResponse:
+        """Polls a task until it completes. See `submit` for the arguments."""
+        return await self.submit(fetch, until, timeout=timeout)
+
+    def _schedule(self, entry: _PollEntry, when: float) -> None:
+        heapq.heappush(self._queue, (when, next(self._counter), entry))
+        self._wakeup.set()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._queue or len(self._polls) > 0:
+            self._wakeup.clear()
+            if not self._queue:
+                # Polls in flight may reschedule their tasks.
+                await self._wakeup.wait()
+                continue
+            when, _, entry = self._queue[0]
+            delay = when - loop.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            heapq.heappop(self._queue)
+            if entry.future.done():
+                # The caller is no longer interested.
+                continue
+            await self._poll_semaphore.acquire()
+            poll = asyncio.ensure_future(self._poll(entry))
+            self._polls.add(poll)
+            poll.add_done_callback(self._on_poll_done)
+
+    def _on_poll_done(self, poll: asyncio.Future) -> None:
+        self._polls.discard(poll)
+        self._wakeup.set()
+
+    async def _poll(self, entry: _PollEntry) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            resp = await entry.fetch()
+            completed = entry.until(resp)
+        except Exception as e:
+            if not entry.future.done():
+                entry.future.set_exception(e)
+            return
+        finally:
+            self._poll_semaphore.release()
+        if entry.future.done():
+            return
+        if completed:
+            entry.future.set_result(resp)
+            return
+
+        entry.interval = min(entry.interval * self.multiplier, self.max_interval)
+        delay = _jitter(entry.interval)
+        now = loop.time()
+        if entry.deadline is not None and now + delay > entry.deadline:
+            if entry.deadline - now <= 0:
+                entry.future.set_exception(
+                    errors.TimeoutError("Timed out waiting for the task to complete.")
+                )
+                return
+            delay = entry.deadline - now
+        logging.debug("Task not completed. Polling again in %.2f seconds.", delay)
+        self._schedule(entry, now + delay)
+
+
+def wait_until(
+    fetch: Callable[[], EBResponse],
+    until: Callable[[EBResponse], bool],
+    *,
+    timeout: Optional[float] = None,
+    min_interval: float = constants.POLLING_MIN_INTERVAL_SECS,
+    max_interval: float = constants.POLLING_MAX_INTERVAL_SECS,
+    multiplier: float = 2.0,
+) -> EBResponse:
+    """Polls a task from the current thread with the schedule of `TaskPoller`.
+
+    Args:
+        fetch: Function that fetches the status of the task.
+        until: Function that returns True if the task has completed.
+        timeout: Maximum time to wait for the task to complete. If None, wait
+            indefinitely.
+
+    Returns:
+        The last fetched response.
+    """
+    now = time.monotonic()
+    deadline = now + timeout if timeout is not None else None
+    delay = min_interval
+    interval = min_interval
+    while True:
+        if deadline is not None:
+            delay = min(delay, max(deadline - now, 0))
+        time.sleep(delay)
+        resp = fetch()
+        if until(resp):
+            return resp
+        now = time.monotonic()
+        if deadline is not None and now >= deadline:
+            raise errors.TimeoutError("Timed out waiting for the task to complete.")
+        interval = min(interval * multiplier, max_interval)
+        delay = _jitter(interval)
+        logging.debug("Task not completed. Polling again in %.2f seconds.", delay)
+
+
+def _jitter(interval: float) -> float:
+    # Equal jitter: half of the interval is fixed and half is random.
+    return interval / 2 + random.uniform(0, interval / 2)
+
+
+_pollers: MutableMapping[asyncio.AbstractEventLoop, TaskPoller] = weakref.WeakKeyDictionary()
+_pollers_lock = threading.Lock()
+
+
+def get_task_poller() -> TaskPoller:
+    """Returns the poller shared by the resources in the running event loop."""
+    loop = asyncio.get_running_loop()
+    with _pollers_lock:
+        poller = _pollers.get(loop, None)
+        if poller is None:
+            poller = TaskPoller()
+            _pollers[loop] = poller
+    return poller
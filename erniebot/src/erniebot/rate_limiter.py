@@ -0,0 +1,158 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import threading
+import time
+from typing import Any, Dict, Hashable, Mapping, Optional, Tuple
+
+from .utils import logging
+from .utils.misc import SingletonMeta
+
+__all__ = ["RateLimiter", "get_rate_limiter", "resolve_rate_limits"]
+
+
+class _TokenBucket(object):
+    """A token bucket that allows going into debt.
+
+    A caller reserves tokens and learns how long it has to wait until the
+    reservation becomes valid, without holding any lock while waiting. This
+    allows threads and coroutines to share the same bucket.
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        super().__init__()
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+
+    def reserve(self, amount: float, now: float) -> float:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+        # A single request that exceeds the capacity would never be admitted
+        # otherwise.
+        self._tokens -= min(amount, self.capacity)
+        if self._tokens >= 0:
+            return 0.0
+        return -self._tokens / self.rate
+
+
+class RateLimiter(object):
+    """Client-side limiter of requests per second and tokens per minute."""
+
+    def __init__(
+        self,
+        max_requests_per_second: Optional[float] = None,
+        max_tokens_per_minute: Optional[float] = None,
+    ) -> None:
+        super().__init__()
+        self._lock = threading.Lock()
+        self._request_bucket: Optional[_TokenBucket] = None
+        self._token_bucket: Optional[_TokenBucket] = None
+        if max_requests_per_second:
+            self._request_bucket = _TokenBucket(
+                rate=max_requests_per_second, capacity=max(max_requests_per_second, 1)
+            )
+        if max_tokens_per_minute:
+            self._token_bucket = _TokenBucket(
+                rate=max_tokens_per_minute / 60, capacity=max_tokens_per_minute
+            )
+
+    @property
+    def counts_tokens(self) -> bool:
+        return self._token_bucket is not None
+
+    def acquire(self, num_tokens: int = 0) -> None:
+        delay = self._reserve(num_tokens)
+        if delay > 0:
+            logging.debug("Rate limit reached. Waiting for %.3f seconds.", delay)
+            time.sleep(delay)
+
+    async def aacquire(self, num_tokens: int = 0) -> None:
+        """Asynchronous version of `acquire`."""
+        delay = self._reserve(num_tokens)
+        if delay > 0:
+            logging.debug("Rate limit reached. Waiting for %.3f seconds.", delay)
+            await asyncio.sleep(delay)
+
+    def _reserve(self, num_tokens: int) -> float:
+        now = time.monotonic()
+        delay = 0.0
+        with self._lock:
+            if self._request_bucket is not None:
+                delay = max(delay, self._request_bucket.reserve(1, now))
+            if self._token_bucket is not None and num_tokens > 0:
+                delay = max(delay, self._token_bucket.reserve(num_tokens, now))
+        return delay
+
+
+class _RateLimiterRegistry(metaclass=SingletonMeta):
+    def __init__(self) -> None:
+        super().__init__()
+        self._lock = threading.Lock()
+        self._limiters: Dict[Hashable, RateLimiter] = {}
+
+    def get(self, scope: Hashable, limits: Tuple[Optional[float], Optional[float]]) -> RateLimiter:
+        # Limiters are keyed by the limits as well, such that changing the
+        # settings takes effect immediately.
+        key = (scope, limits)
+        with self._lock:
+            limiter = self._limiters.get(key, None)
+            if limiter is None:
+                limiter = RateLimiter(*limits)
+                self._limiters[key] = limiter
+        return limiter
+
+
+def resolve_rate_limits(
+    api_type: str, model: Optional[str], config_dict: Mapping[str, Any]
+) -> Tuple[Hashable, Tuple[Optional[float], Optional[float]]]:
+    """Determines the scope and the limits that apply to a request.
+
+    Entries of `rate_limits` are looked up by `"<api_type>/<model>"`, model
+    name, and API type, in that order. If none matches, the global
+    `max_requests_per_second` and `max_tokens_per_minute` settings apply to
+    all requests of the API type.
+    """
+    rate_limits = config_dict.get("rate_limits", None)
+    if rate_limits:
+        if not isinstance(rate_limits, Mapping):
+            raise TypeError("`rate_limits` should be a mapping.")
+        candidates = [api_type]
+        if model is not None:
+            candidates = [f"{api_type}/{model}", model] + candidates
+        for name in candidates:
+            if name in rate_limits:
+                limits = rate_limits[name]
+                if not isinstance(limits, Mapping):
+                    raise TypeError(f"Rate limits for {repr(name)} should be a mapping.")
+                return (api_type, name), (
+                    limits.get("max_requests_per_second", None),
+                    limits.get("max_tokens_per_minute", None),
+                )
+    return (api_type, None), (
+        config_dict.get("max_requests_per_second", None),
+        config_dict.get("max_tokens_per_minute", None),
+    )
+
+
+def get_rate_limiter(
+    api_type: str, model: Optional[str], config_dict: Mapping[str, Any]
+) -> Optional[RateLimiter]:
+    """Returns the shared rate limiter for a request, or None if unlimited."""
+    scope, limits = resolve_rate_limits(api_type, model, config_dict)
+    if not any(limits):
+        return None
+    return _RateLimiterRegistry().get(scope, limits)
@@ -12,20 +12,57 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from .chat_completion import ChatCompletion, ChatCompletionResponse
-from .chat_completion_with_plugins import ChatCompletionWithPlugins
-from .embedding import Embedding, EmbeddingResponse
-from .fine_tuning import FineTuningJob, FineTuningTask
-from .image import Image, ImageResponse, ImageV1, ImageV2
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .chat_completion import ChatCompletion, ChatCompletionResponse
+    from .chat_completion_with_plugins import ChatCompletionWithPlugins
+    from .embedding import Embedding, EmbeddingArrayResponse, EmbeddingResponse
+    from .fine_tuning import FineTuningJob, FineTuningTask
+    from .image import Image, ImageResponse, ImageV1, ImageV2
 
 __all__ = [
     "ChatCompletion",
     "ChatCompletionWithPlugins",
     "Embedding",
+    "FineTuningJob",
+    "FineTuningTask",
     "Image",
     "ImageV1",
     "ImageV2",
     "ChatCompletionResponse",
     "EmbeddingResponse",
+    "EmbeddingArrayResponse",
     "ImageResponse",
 ]
+
+# Each resource module is imported on first access, so that using one
+# resource does not pay for the dependencies of the others.
+_LAZY_ATTRS = {
+    "ChatCompletion": ".chat_completion",
+    "ChatCompletionResponse": ".chat_completion",
+    "ChatCompletionWithPlugins": ".chat_completion_with_plugins",
+    "Embedding": ".embedding",
+    "EmbeddingArrayResponse": ".embedding",
+    "EmbeddingResponse": ".embedding",
+    "FineTuningJob": ".fine_tuning",
+    "FineTuningTask": ".fine_tuning",
+    "Image": ".image",
+    "ImageResponse": ".image",
+    "ImageV1": ".image",
+    "ImageV2": ".image",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRS:
+        module = importlib.import_module(_LAZY_ATTRS[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
+
+def __dir__():
+    return sorted(set(globals()) | _LAZY_ATTRS.keys())
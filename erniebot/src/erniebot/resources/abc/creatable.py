@@ -13,20 +13,39 @@
 # limitations under the License.
 
 import abc
-from typing import Any, AsyncIterator, Dict, Iterator, Union, cast
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Union, cast
 
+from erniebot.caching import ResponseCache
 from erniebot.response import EBResponse
 from erniebot.types import Request, RequestWithStream, ResponseT
 
 from .protocol import Resource
 
 
-class Creatable(Resource):
+class _ResponseCacheMixin(object):
+    def _get_response_cache(self) -> Optional[ResponseCache]:
+        """Returns the cache of created resources, or None to disable caching."""
+        return None
+
+    def _get_response_cache_key(self, req: Request) -> str:
+        """Returns the key of a request in the cache. Classes that enable
+        caching must implement this, such that the key identifies the backend
+        as well as the request."""
+        raise NotImplementedError
+
+
+class Creatable(Resource, _ResponseCacheMixin):
     """Creatable resource."""
 
     def create_resource(self, **create_kwargs: Any) -> EBResponse:
         """Creates a resource."""
         req = self._prepare_create(create_kwargs)
+        cache = self._get_response_cache()
+        if cache is not None:
+            cache_key = self._get_response_cache_key(req)
+            cached_resp = cache.get_response(cache_key)
+            if cached_resp is not None:
+                return self._postprocess_create(cached_resp)
         resp = self.request(
             method=req.method,
             path=req.path,
@@ -35,12 +54,20 @@ class Creatable(Resource):
             headers=req.headers,
             request_timeout=req.timeout,
         )
+        if cache is not None:
+            cache.set_response(cache_key, resp)
         resp = self._postprocess_create(resp)
         return resp
 
     async def acreate_resource(self, **create_kwargs: Any) -> EBResponse:
         """Asynchronous version of `create_resource`."""
         req = self._prepare_create(create_kwargs)
+        cache = self._get_response_cache()
+        if cache is not None:
+            cache_key = self._get_response_cache_key(req)
+            cached_resp = cache.get_response(cache_key)
+            if cached_resp is not None:
+                return self._postprocess_create(cached_resp)
         resp = await self.arequest(
             method=req.method,
             path=req.path,
@@ -49,6 +76,8 @@ class Creatable(Resource):
             headers=req.headers,
             request_timeout=req.timeout,
         )
+        if cache is not None:
+            cache.set_response(cache_key, resp)
         resp = self._postprocess_create(resp)
         return resp
 
@@ -60,10 +89,22 @@ class Creatable(Resource):
         return resp
 
 
-class CreatableWithStreaming(Resource):
+class CreatableWithStreaming(Resource, _ResponseCacheMixin):
     def create_resource(self, **create_kwargs: Any) -> Union[EBResponse, Iterator[EBResponse]]:
         """Creates a resource."""
         req = self._prepare_create(create_kwargs)
+        resp: Union[EBResponse, Iterator[EBResponse]]
+        cache = self._get_response_cache()
+        if cache is not None:
+            cache_key = self._get_response_cache_key(req)
+            if req.stream:
+                cached_chunks = cache.get_stream(cache_key)
+                if cached_chunks is not None:
+                    return self._postprocess_create(iter(cached_chunks))
+            else:
+                cached_resp = cache.get_response(cache_key)
+                if cached_resp is not None:
+                    return self._postprocess_create(cached_resp)
         resp = self.request(
             method=req.method,
             path=req.path,
@@ -72,6 +113,11 @@ class CreatableWithStreaming(Resource):
             headers=req.headers,
             request_timeout=req.timeout,
         )
+        if cache is not None:
+            if isinstance(resp, EBResponse):
+                cache.set_response(cache_key, resp)
+            else:
+                resp = cache.cache_stream(cache_key, resp)
         if isinstance(resp, EBResponse):
             resp = self._postprocess_create(resp)
         else:
@@ -81,6 +127,18 @@ class CreatableWithStreaming(Resource):
     async def acreate_resource(self, **create_kwargs: Any) -> Union[EBResponse, AsyncIterator[EBResponse]]:
         """Asynchronous version of `create_resource`."""
         req = self._prepare_create(create_kwargs)
+        resp: Union[EBResponse, AsyncIterator[EBResponse]]
+        cache = self._get_response_cache()
+        if cache is not None:
+            cache_key = self._get_response_cache_key(req)
+            if req.stream:
+                cached_chunks = cache.get_stream(cache_key)
+                if cached_chunks is not None:
+                    return self._postprocess_create(_replay_chunks(cached_chunks))
+            else:
+                cached_resp = cache.get_response(cache_key)
+                if cached_resp is not None:
+                    return self._postprocess_create(cached_resp)
         resp = await self.arequest(
             method=req.method,
             path=req.path,
@@ -89,6 +147,11 @@ class CreatableWithStreaming(Resource):
             headers=req.headers,
             request_timeout=req.timeout,
         )
+        if cache is not None:
+            if isinstance(resp, EBResponse):
+                cache.set_response(cache_key, resp)
+            else:
+                resp = cache.acache_stream(cache_key, resp)
         if isinstance(resp, EBResponse):
             resp = self._postprocess_create(resp)
         else:
@@ -103,3 +166,8 @@ class CreatableWithStreaming(Resource):
 
     def _postprocess_create(self, resp: ResponseT) -> ResponseT:
         return resp
+
+
+async def _replay_chunks(chunks: List[EBResponse]) -> AsyncIterator[EBResponse]:
+    for chunk in chunks:
+        yield chunk
@@ -26,11 +26,9 @@ from typing import (
     overload,
 )
 
-import jsonschema
-import jsonschema.exceptions
-
 import erniebot.errors as errors
 from erniebot.api_types import APIType
+from erniebot.caching import ResponseCache
 from erniebot.response import EBResponse
 from erniebot.types import ConfigDictType, HeadersType, RequestWithStream
 from erniebot.utils import logging
@@ -48,6 +46,8 @@ class ChatCompletion(EBResource, CreatableWithStreaming):
         APIType.AISTUDIO,
         APIType.CUSTOM,
     )
+    SUPPORTS_HEDGING: ClassVar[bool] = True
+    SUPPORTS_COALESCING: ClassVar[bool] = True
     _API_INFO_DICT: ClassVar[Dict[APIType, Dict[str, Any]]] = {
         APIType.QIANFAN: {
             "resource_id": "chat",
@@ -405,6 +405,9 @@ class ChatCompletion(EBResource, CreatableWithStreaming):
         resp = await resource.acreate_resource(**kwargs)
         return transform(ChatCompletionResponse.from_mapping, resp)
 
+    def _get_response_cache(self) -> Optional[ResponseCache]:
+        return self._get_configured_response_cache()
+
     def _prepare_create(self, kwargs: Dict[str, Any]) -> RequestWithStream:
         def _update_model_name(given_name: str, old_name_to_new_name: Dict[str, str]) -> str:
             if given_name in old_name_to_new_name:
@@ -547,6 +550,10 @@ class ChatCompletion(EBResource, CreatableWithStreaming):
 
     @staticmethod
     def _check_json_schema(schema: dict) -> bool:
+        # jsonschema is slow to import and only needed for function calling.
+        import jsonschema
+        import jsonschema.exceptions
+
         try:
             jsonschema.Draft202012Validator.check_schema(schema)
         except jsonschema.exceptions.SchemaError:
@@ -556,6 +563,8 @@ class ChatCompletion(EBResource, CreatableWithStreaming):
 
 
 class ChatCompletionResponse(EBResponse):
+    __slots__ = ()
+
     @property
     def is_function_response(self) -> bool:
         return hasattr(self, "function_call")
@@ -12,18 +12,41 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Any, ClassVar, Dict, List, Optional, Tuple, Union
+import array
+import asyncio
+import concurrent.futures
+from typing import (
+    Any,
+    Callable,
+    ClassVar,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
 import erniebot.errors as errors
 from erniebot.api_types import APIType
+from erniebot.caching import EmbeddingCache, ResponseCache
 from erniebot.response import EBResponse
 from erniebot.types import ConfigDictType, HeadersType, Request
-from erniebot.utils.misc import NOT_GIVEN, NotGiven, filter_args
+from erniebot.utils import json_codec
+from erniebot.utils.misc import NOT_GIVEN, Constant, NotGiven, filter_args
+from erniebot.utils.token_counter import get_token_counter
 
 from .abc import Creatable
 from .resource import EBResource
 
-__all__ = ["Embedding", "EmbeddingResponse"]
+try:
+    import numpy as np
+except ImportError:
+    # Embeddings are stored in `array.array` objects instead.
+    np = None  # type: ignore[assignment]
+
+__all__ = ["Embedding", "EmbeddingResponse", "EmbeddingArrayResponse"]
 
 
 class Embedding(EBResource, Creatable):
@@ -31,12 +54,16 @@ class Embedding(EBResource, Creatable):
         APIType.QIANFAN,
         APIType.AISTUDIO,
     )
+    SUPPORTS_HEDGING: ClassVar[bool] = True
+    SUPPORTS_COALESCING: ClassVar[bool] = True
     _API_INFO_DICT: ClassVar[Dict[APIType, Dict[str, Any]]] = {
         APIType.QIANFAN: {
             "resource_id": "embeddings",
             "models": {
                 "ernie-text-embedding": {
                     "model_id": "embedding-v1",
+                    "max_batch_size": 16,
+                    "max_batch_tokens": 16 * 384,
                 },
             },
         },
@@ -45,10 +72,15 @@ class Embedding(EBResource, Creatable):
             "models": {
                 "ernie-text-embedding": {
                     "model_id": "embedding-v1",
+                    "max_batch_size": 16,
+                    "max_batch_tokens": 16 * 384,
                 },
             },
         },
     }
+    # Batch limits used when a model does not specify its own.
+    _DEFAULT_MAX_BATCH_SIZE: ClassVar[int] = 16
+    _DEFAULT_MAX_BATCH_TOKENS: ClassVar[int] = 16 * 384
 
     @classmethod
     def create(
@@ -59,6 +91,7 @@ class Embedding(EBResource, Creatable):
         user_id: Union[str, NotGiven] = NOT_GIVEN,
         headers: Optional[HeadersType] = None,
         request_timeout: Optional[float] = None,
+        as_array: bool = False,
         _config_: Optional[ConfigDictType] = None,
     ) -> "EmbeddingResponse":
         """Creates embeddings for the given input texts.
@@ -69,6 +102,8 @@ class Embedding(EBResource, Creatable):
             user_id: ID for the end user.
             headers: Custom headers to send with the request.
             request_timeout: Timeout for a single request.
+            as_array: If True, an `EmbeddingArrayResponse` object that stores
+                the embeddings in a contiguous array is returned.
             _config_: Overrides the global settings.
 
         Returns:
@@ -85,7 +120,9 @@ class Embedding(EBResource, Creatable):
             kwargs["headers"] = headers
         if request_timeout is not None:
             kwargs["request_timeout"] = request_timeout
-        resp = resource.create_resource(**kwargs)
+        resp = resource._create_embeddings(kwargs)
+        if as_array:
+            return EmbeddingArrayResponse.from_mapping(resp)
         return EmbeddingResponse.from_mapping(resp)
 
     @classmethod
@@ -97,6 +134,7 @@ class Embedding(EBResource, Creatable):
         user_id: Union[str, NotGiven] = NOT_GIVEN,
         headers: Optional[HeadersType] = None,
         request_timeout: Optional[float] = None,
+        as_array: bool = False,
         _config_: Optional[ConfigDictType] = None,
     ) -> "EmbeddingResponse":
         """Creates embeddings for the given input texts.
@@ -107,6 +145,8 @@ class Embedding(EBResource, Creatable):
             user_id: ID for the end user.
             headers: Custom headers to send with the request.
             request_timeout: Timeout for a single request.
+            as_array: If True, an `EmbeddingArrayResponse` object that stores
+                the embeddings in a contiguous array is returned.
             _config_: Overrides the global settings.
 
         Returns:
@@ -123,9 +163,265 @@ class Embedding(EBResource, Creatable):
             kwargs["headers"] = headers
         if request_timeout is not None:
             kwargs["request_timeout"] = request_timeout
-        resp = await resource.acreate_resource(**kwargs)
+        resp = await resource._acreate_embeddings(kwargs)
+        if as_array:
+            return EmbeddingArrayResponse.from_mapping(resp)
         return EmbeddingResponse.from_mapping(resp)
 
+    @classmethod
+    def create_many(
+        cls,
+        model: str,
+        input: Iterable[str],
+        *,
+        max_concurrency: int = 4,
+        batch_size: Optional[int] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        as_array: bool = True,
+        user_id: Union[str, NotGiven] = NOT_GIVEN,
+        headers: Optional[HeadersType] = None,
+        request_timeout: Optional[float] = None,
+        _config_: Optional[ConfigDictType] = None,
+    ) -> Union["np.ndarray", List[List[float]]]:
+        """Creates embeddings for any number of input texts.
+
+        The texts are split into batches that respect the per-request limits
+        of the backend, and the batches are sent concurrently. If retries are
+        enabled (`max_retries` is 0 by default), each batch is retried
+        independently.
+
+        Args:
+            model: Name of the model to use.
+            input: Input texts to embed.
+            max_concurrency: Maximum number of batches in flight.
+            batch_size: Maximum number of texts in a batch. Defaults to the
+                maximum allowed by the backend.
+            progress_callback: Function called with the number of embedded
+                texts and the total number of texts each time a batch is done.
+            as_array: If True and NumPy is installed, the embeddings are
+                collected into a `float32` matrix. Otherwise, they are
+                returned as lists of the floats in the responses, without
+                loss of precision.
+            user_id: ID for the end user.
+            headers: Custom headers to send with the request.
+            request_timeout: Timeout for a single request.
+            _config_: Overrides the global settings.
+
+        Returns:
+            Embeddings in the order of the input texts. A `float32` matrix is
+            returned if `as_array` is True and NumPy is installed, and a list
+            of lists otherwise.
+        """
+        if max_concurrency < 1:
+            raise ValueError("`max_concurrency` must be a positive integer.")
+        texts = list(input)
+        batches = cls(**(_config_ or {}))._split_into_batches(model, texts, batch_size)
+        as_array = as_array and np is not None
+        collector = _EmbeddingCollector(len(texts), as_array, progress_callback)
+
+        def _create_batch(start: int, end: int) -> "EmbeddingResponse":
+            return cls.create(
+                model,
+                texts[start:end],
+                user_id=user_id,
+                headers=headers,
+                request_timeout=request_timeout,
+                as_array=as_array,
+                _config_=_config_,
+            )
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            futures = {executor.submit(_create_batch, start, end): (start, end) for start, end in batches}
+            try:
+                for future in concurrent.futures.as_completed(futures):
+                    start, end = futures[future]
+                    collector.add(start, end, future.result().get_result())
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+        return collector.result()
+
+    @classmethod
+    async def acreate_many(
+        cls,
+        model: str,
+        input: Iterable[str],
+        *,
+        max_concurrency: int = 4,
+        batch_size: Optional[int] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        as_array: bool = True,
+        user_id: Union[str, NotGiven] = NOT_GIVEN,
+        headers: Optional[HeadersType] = None,
+        request_timeout: Optional[float] = None,
+        _config_: Optional[ConfigDictType] = None,
+    ) -> Union["np.ndarray", List[List[float]]]:
+        """Creates embeddings for any number of input texts.
+
+        The texts are split into batches that respect the per-request limits
+        of the backend, and the batches are sent concurrently. If retries are
+        enabled (`max_retries` is 0 by default), each batch is retried
+        independently.
+
+        Args:
+            model: Name of the model to use.
+            input: Input texts to embed.
+            max_concurrency: Maximum number of batches in flight.
+            batch_size: Maximum number of texts in a batch. Defaults to the
+                maximum allowed by the backend.
+            progress_callback: Function called with the number of embedded
+                texts and the total number of texts each time a batch is done.
+            as_array: If True and NumPy is installed, the embeddings are
+                collected into a `float32` matrix. Otherwise, they are
+                returned as lists of the floats in the responses, without
+                loss of precision.
+            user_id: ID for the end user.
+            headers: Custom headers to send with the request.
+            request_timeout: Timeout for a single request.
+            _config_: Overrides the global settings.
+
+        Returns:
+            Embeddings in the order of the input texts. A `float32` matrix is
+            returned if `as_array` is True and NumPy is installed, and a list
+            of lists otherwise.
+        """
+        if max_concurrency < 1:
+            raise ValueError("`max_concurrency` must be a positive integer.")
+        texts = list(input)
+        batches = cls(**(_config_ or {}))._split_into_batches(model, texts, batch_size)
+        as_array = as_array and np is not None
+        collector = _EmbeddingCollector(len(texts), as_array, progress_callback)
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def _create_batch(start: int, end: int) -> None:
+            async with semaphore:
+                resp = await cls.acreate(
+                    model,
+                    texts[start:end],
+                    user_id=user_id,
+                    headers=headers,
+                    request_timeout=request_timeout,
+                    as_array=as_array,
+                    _config_=_config_,
+                )
+            collector.add(start, end, resp.get_result())
+
+        tasks = [asyncio.ensure_future(_create_batch(start, end)) for start, end in batches]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            # If one batch fails, the others are abandoned.
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        return collector.result()
+
+    def _split_into_batches(
+        self, model: str, texts: Sequence[str], batch_size: Optional[int]
+    ) -> List[Tuple[int, int]]:
+        model_info: Dict[str, Any] = {}
+        if self.api_type in self._API_INFO_DICT:
+            model_info = self._API_INFO_DICT[self.api_type]["models"].get(model, {})
+        max_size = model_info.get("max_batch_size", self._DEFAULT_MAX_BATCH_SIZE)
+        max_tokens = model_info.get("max_batch_tokens", self._DEFAULT_MAX_BATCH_TOKENS)
+        if batch_size is not None:
+            if batch_size < 1:
+                raise ValueError("`batch_size` must be a positive integer.")
+            max_size = min(batch_size, max_size)
+
+        token_counts = get_token_counter().count_many(texts)
+        batches = []
+        start = 0
+        num_tokens = 0
+        for i, text_tokens in enumerate(token_counts):
+            # A text that exceeds the token limit by itself is sent alone and
+            # left for the backend to reject.
+            if i > start and (i - start >= max_size or num_tokens + text_tokens > max_tokens):
+                batches.append((start, i))
+                start = i
+                num_tokens = 0
+            num_tokens += text_tokens
+        if start < len(texts):
+            batches.append((start, len(texts)))
+        return batches
+
+    def _create_embeddings(self, kwargs: Dict[str, Any]) -> EBResponse:
+        cache = self._get_embedding_cache()
+        if cache is None:
+            return self.create_resource(**kwargs)
+        model, texts = kwargs["model"], kwargs["input"]
+        vectors = cache.get_many(model, texts)
+        missing_indices = [i for i, vec in enumerate(vectors) if vec is None]
+        resp = None
+        if missing_indices:
+            # Only texts that are not cached are sent.
+            resp = self.create_resource(**{**kwargs, "input": [texts[i] for i in missing_indices]})
+            self._update_embedding_cache(cache, model, texts, missing_indices, vectors, resp)
+        return self._merge_embeddings(vectors, resp)
+
+    async def _acreate_embeddings(self, kwargs: Dict[str, Any]) -> EBResponse:
+        cache = self._get_embedding_cache()
+        if cache is None:
+            return await self.acreate_resource(**kwargs)
+        model, texts = kwargs["model"], kwargs["input"]
+        vectors = cache.get_many(model, texts)
+        missing_indices = [i for i, vec in enumerate(vectors) if vec is None]
+        resp = None
+        if missing_indices:
+            resp = await self.acreate_resource(**{**kwargs, "input": [texts[i] for i in missing_indices]})
+            self._update_embedding_cache(cache, model, texts, missing_indices, vectors, resp)
+        return self._merge_embeddings(vectors, resp)
+
+    def _get_response_cache(self) -> Optional[ResponseCache]:
+        return self._get_configured_response_cache()
+
+    def _get_embedding_cache(self) -> Optional[EmbeddingCache]:
+        cache = self._cfg["embedding_cache"]
+        if cache is not None and not isinstance(cache, EmbeddingCache):
+            raise TypeError("`embedding_cache` should be an `EmbeddingCache` object.")
+        return cache
+
+    @staticmethod
+    def _update_embedding_cache(
+        cache: EmbeddingCache,
+        model: str,
+        texts: List[str],
+        missing_indices: List[int],
+        vectors: List[Optional[List[float]]],
+        resp: EBResponse,
+    ) -> None:
+        new_vectors = [item["embedding"] for item in sorted(resp.data, key=lambda item: item["index"])]
+        if len(new_vectors) != len(missing_indices):
+            raise errors.HTTPRequestError("The number of embeddings does not match the number of inputs.")
+        cache.put_many(model, [texts[i] for i in missing_indices], new_vectors)
+        for i, vec in zip(missing_indices, new_vectors):
+            vectors[i] = vec
+
+    @staticmethod
+    def _merge_embeddings(vectors: List[Optional[List[float]]], resp: Optional[EBResponse]) -> EBResponse:
+        """Builds the response of a request that was (partly) served from the
+        embedding cache.
+
+        The status code, headers, and usage are those of the request for the
+        texts that were not cached. If every text was cached, no request is
+        sent, and the response is made up locally: the status code is 200,
+        the headers are empty, the usage is zero, and the body carries no
+        `id`.
+        """
+        if resp is not None:
+            rcode, rheaders = resp.rcode, resp.rheaders
+            assert isinstance(resp.rbody, dict)
+            rbody = dict(resp.rbody)
+        else:
+            rcode, rheaders = 200, {}
+            rbody = {"object": "embedding_list", "usage": {"prompt_tokens": 0, "total_tokens": 0}}
+        rbody["data"] = [
+            {"object": "embedding", "embedding": vec, "index": i} for i, vec in enumerate(vectors)
+        ]
+        return EBResponse(rcode, rbody, rheaders)
+
     def _prepare_create(self, kwargs: Dict[str, Any]) -> Request:
         def _set_val_if_key_exists(src: dict, dst: dict, key: str) -> None:
             if key in src:
@@ -192,8 +488,109 @@ class Embedding(EBResource, Creatable):
 
 
 class EmbeddingResponse(EBResponse):
+    __slots__ = ()
+
     def get_result(self) -> Any:
         embeddings = []
         for res in self.data:
             embeddings.append(res["embedding"])
         return embeddings
+
+
+class EmbeddingArrayResponse(EmbeddingResponse):
+    """A response that stores embeddings in a contiguous array.
+
+    The embeddings are copied into a single `float32` array right after the
+    response is decoded, and the lists of Python floats are discarded. This
+    reduces the memory held by the response, not the cost of decoding it. The
+    `embedding` field of each item in `data` is a view of the corresponding
+    row of the array.
+
+    If NumPy is installed, `get_result` returns an `numpy.ndarray` object of
+    shape `(num_embeddings, dim)`. Otherwise, the embeddings are stored in an
+    `array.array` object, and `get_result` returns a list of memoryviews of
+    its rows.
+    """
+
+    __slots__ = ("_vectors",)
+
+    _INSTANCE_ATTRS = Constant(("_dict", "_vectors"))
+
+    def __init__(self, rcode: int, rbody: Union[str, Dict[str, Any]], rheaders: Dict[str, Any]) -> None:
+        self._vectors: Any = None
+        if isinstance(rbody, dict) and "data" in rbody:
+            rbody = dict(rbody)
+            items = sorted(rbody["data"], key=lambda item: item["index"])
+            self._vectors, rows = self._pack_embeddings([item["embedding"] for item in items])
+            rbody["data"] = [{**item, "embedding": row} for item, row in zip(items, rows)]
+        super().__init__(rcode, rbody, rheaders)
+
+    def get_result(self) -> Any:
+        if np is not None:
+            return self._vectors
+        return [item["embedding"] for item in self.data]
+
+    def to_json(self) -> str:
+        return json_codec.dumps(self._dict, default=lambda obj: obj.tolist()).decode("utf-8")
+
+    def __reduce__(self) -> tuple:
+        # Memoryviews cannot be pickled.
+        rbody = self.rbody
+        if isinstance(rbody, dict) and "data" in rbody:
+            rbody = dict(rbody)
+            rbody["data"] = [{**item, "embedding": item["embedding"].tolist()} for item in rbody["data"]]
+        return (self.__class__, (self.rcode, rbody, self.rheaders))
+
+    @staticmethod
+    def _pack_embeddings(embeddings: List[List[float]]) -> Tuple[Any, List[Any]]:
+        num = len(embeddings)
+        dim = len(embeddings[0]) if num > 0 else 0
+        if any(len(emb) != dim for emb in embeddings):
+            raise errors.HTTPRequestError("Embeddings in the response have different dimensions.")
+        if np is not None:
+            # A single conversion of the nested lists, rather than one per row.
+            matrix: Any = np.asarray(embeddings, dtype=np.float32).reshape(num, dim)
+            return matrix, list(matrix)
+        vectors = array.array("f")
+        for emb in embeddings:
+            vectors.extend(emb)
+        view = memoryview(vectors)
+        return vectors, [view[i * dim : (i + 1) * dim] for i in range(num)]
+
+
+class _EmbeddingCollector(object):
+    """Puts embeddings of batches that complete in any order in place."""
+
+    def __init__(
+        self, num_texts: int, as_array: bool, progress_callback: Optional[Callable[[int, int], None]]
+    ) -> None:
+        super().__init__()
+        self._num_texts = num_texts
+        self._as_array = as_array
+        self._progress_callback = progress_callback
+        self._num_done = 0
+        self._matrix: Optional["np.ndarray"] = None
+        self._rows: List[Optional[List[float]]] = []
+        if not as_array:
+            self._rows = [None] * num_texts
+
+    def add(self, start: int, end: int, embeddings: Any) -> None:
+        if len(embeddings) != end - start:
+            raise errors.HTTPRequestError("The number of embeddings does not match the number of inputs.")
+        if self._as_array:
+            if self._matrix is None:
+                dim = len(embeddings[0]) if len(embeddings) > 0 else 0
+                self._matrix = np.empty((self._num_texts, dim), dtype=np.float32)
+            self._matrix[start:end] = embeddings
+        else:
+            self._rows[start:end] = embeddings
+        self._num_done += len(embeddings)
+        if self._progress_callback is not None:
+            self._progress_callback(self._num_done, self._num_texts)
+
+    def result(self) -> Union["np.ndarray", List[List[float]]]:
+        if self._as_array:
+            if self._matrix is None:
+                return np.empty((self._num_texts, 0), dtype=np.float32)
+            return self._matrix
+        return self._rows  # type: ignore[return-value]
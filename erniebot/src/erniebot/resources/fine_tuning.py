@@ -12,10 +12,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Any, ClassVar, Dict, List, Optional, Tuple, Union
+from typing import Any, ClassVar, Dict, FrozenSet, List, Optional, Tuple, Union
 
 import erniebot.errors as errors
 from erniebot.api_types import APIType
+from erniebot.polling import get_task_poller, wait_until
 from erniebot.response import EBResponse
 from erniebot.types import ConfigDictType, HeadersType, Request
 from erniebot.utils.misc import NOT_GIVEN, NotGiven, filter_args
@@ -126,6 +127,9 @@ class FineTuningTask(EBResource, Creatable):
 
 class FineTuningJob(EBResource, Creatable, Queryable, Cancellable):
     SUPPORTED_API_TYPES: ClassVar[Tuple[APIType, ...]] = (APIType.QIANFAN_SFT,)
+    # Values of `trainStatus` from which a job never leaves. Any other status
+    # (e.g. a job that is queued or still running) is polled again.
+    _TERMINAL_TRAIN_STATUSES: ClassVar[FrozenSet[str]] = frozenset(("FINISH", "FAIL", "STOP"))
 
     @classmethod
     def create(
@@ -239,6 +243,80 @@ class FineTuningJob(EBResource, Creatable, Queryable, Cancellable):
         resp = await resource.aquery_resource(**kwargs)
         return resp
 
+    @classmethod
+    def wait_until_done(
+        cls,
+        task_id: int,
+        job_id: int,
+        *,
+        timeout: Optional[float] = None,
+        headers: Optional[HeadersType] = None,
+        request_timeout: Optional[float] = None,
+        _config_: Optional[ConfigDictType] = None,
+    ) -> EBResponse:
+        """Waits until a job has finished, failed, or been stopped.
+
+        The job is queried with exponential backoff.
+
+        Args:
+            task_id: ID of the task.
+            job_id: ID of the job.
+            timeout: Maximum time to wait. If None, wait indefinitely.
+            headers: Custom headers to send with the requests.
+            request_timeout: Timeout for a single request.
+            _config_: Overrides the global settings.
+
+        Returns:
+            The last query response. Check `result["trainStatus"]` to see
+            whether the job has finished, failed, or been stopped.
+        """
+        config = _config_ or {}
+        resource = cls(**config)
+        kwargs = filter_args(
+            task_id=task_id,
+            job_id=job_id,
+        )
+        if headers is not None:
+            kwargs["headers"] = headers
+        if request_timeout is not None:
+            kwargs["request_timeout"] = request_timeout
+        return wait_until(
+            lambda: resource.query_resource(**kwargs),
+            cls._is_job_stopped,
+            timeout=timeout,
+        )
+
+    @classmethod
+    async def await_until_done(
+        cls,
+        task_id: int,
+        job_id: int,
+        *,
+        timeout: Optional[float] = None,
+        headers: Optional[HeadersType] = None,
+        request_timeout: Optional[float] = None,
+        _config_: Optional[ConfigDictType] = None,
+    ) -> EBResponse:
+        """Asynchronous version of `wait_until_done`.
+
+        The job is polled by the poller shared in the running event loop.
+        """
+        config = _config_ or {}
+        resource = cls(**config)
+        kwargs = filter_args(
+            task_id=task_id,
+            job_id=job_id,
+        )
+        if headers is not None:
+            kwargs["headers"] = headers
+        if request_timeout is not None:
+            kwargs["request_timeout"] = request_timeout
+        return await get_task_poller().wait(
+            lambda: resource.aquery_resource(**kwargs),
+            cls._is_job_stopped,
+            timeout=timeout,
+        )
+
     @classmethod
     def cancel(
         cls,
@@ -450,3 +528,7 @@ class FineTuningJob(EBResource, Creatable, Queryable, Cancellable):
             headers=headers,
             timeout=request_timeout,
         )
+
+    @staticmethod
+    def _is_job_stopped(resp: EBResponse) -> bool:
+        return resp.result["trainStatus"] in FineTuningJob._TERMINAL_TRAIN_STATUSES
@@ -12,12 +12,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Any, ClassVar, Dict, Optional, Tuple, Union
+import asyncio
+from typing import Any, ClassVar, Dict, Iterable, List, Optional, Tuple, Union
 
 from typing_extensions import TypeAlias
 
 import erniebot.errors as errors
 from erniebot.api_types import APIType
+from erniebot.polling import get_task_poller
 from erniebot.response import EBResponse
 from erniebot.types import ConfigDictType, HeadersType, Request
 from erniebot.utils.misc import NOT_GIVEN, NotGiven, filter_args
@@ -68,19 +70,27 @@ class _Image(EBResource):
         )
 
         req = self._prepare_fetch(resp_p)
-        resp_f = await self.apoll(
-            until=self._check_status,
-            method=req.method,
-            path=req.path,
-            params=req.params,
-            headers=req.headers,
-            request_timeout=timeout,
-        )
+        resp_f = await self._await_task(req, timeout)
 
         resp_f = self._postprocess(resp_f)
 
         return resp_f
 
+    async def _await_task(self, req: Request, request_timeout: Optional[float]) -> EBResponse:
+        async def _fetch() -> EBResponse:
+            return await self.arequest(
+                method=req.method,
+                path=req.path,
+                stream=False,
+                params=req.params,
+                headers=req.headers,
+                request_timeout=request_timeout,
+            )
+
+        # Tasks of all resources in the event loop are polled by the same
+        # poller.
+        return await get_task_poller().wait(_fetch, self._check_status, timeout=self.POLLING_TIMEOUT_SECS)
+
     def _prepare_paint(self, kwargs: Dict[str, Any]) -> Request:
         raise NotImplementedError
 
@@ -350,6 +360,84 @@ class ImageV2(_Image):
         resp = await resource.acreate_resource(**kwargs)
         return ImageV2Response.from_mapping(resp)
 
+    @classmethod
+    async def acreate_many(
+        cls,
+        model: str,
+        prompts: Iterable[str],
+        width: int,
+        height: int,
+        *,
+        version: Union[str, NotGiven] = NOT_GIVEN,
+        image_num: Union[int, NotGiven] = NOT_GIVEN,
+        max_concurrency: int = 4,
+        headers: Optional[HeadersType] = None,
+        request_timeout: Optional[float] = None,
+        _config_: Optional[ConfigDictType] = None,
+    ) -> List["ImageV2Response"]:
+        """Creates images for multiple prompts.
+
+        The generation tasks are submitted concurrently, and the pending tasks
+        are polled together by a shared poller with exponential backoff,
+        instead of each task polling at a fixed interval.
+
+        Args:
+            model: Name of the model to use.
+            prompts: Texts that describe the images.
+            width: Width of the images.
+            height: Height of the images.
+            version: Version of the model.
+            image_num: Number of images to generate for each prompt.
+            max_concurrency: Maximum number of task submissions in flight.
+            headers: Custom headers to send with the requests.
+            request_timeout: Timeout for a single request.
+            _config_: Overrides the global settings.
+
+        Returns:
+            Responses in the order of the prompts.
+        """
+        if max_concurrency < 1:
+            raise ValueError("`max_concurrency` must be a positive integer.")
+        resource = cls(**(_config_ or {}))
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def _create(prompt: str) -> ImageV2Response:
+            kwargs = filter_args(
+                model=model,
+                prompt=prompt,
+                width=width,
+                height=height,
+                version=version,
+                image_num=image_num,
+            )
+            if headers is not None:
+                kwargs["headers"] = headers
+            if request_timeout is not None:
+                kwargs["request_timeout"] = request_timeout
+            req = resource._prepare_paint(kwargs)
+            # Only the submissions are limited. Waiting for the tasks is cheap.
+            async with semaphore:
+                resp_p = await resource.arequest(
+                    method=req.method,
+                    path=req.path,
+                    stream=False,
+                    params=req.params,
+                    headers=req.headers,
+                    request_timeout=req.timeout,
+                )
+            resp_f = await resource._await_task(resource._prepare_fetch(resp_p), req.timeout)
+            return ImageV2Response.from_mapping(resource._postprocess(resp_f))
+
+        tasks = [asyncio.ensure_future(_create(prompt)) for prompt in prompts]
+        try:
+            return list(await asyncio.gather(*tasks))
+        finally:
+            # If one task fails, the others are abandoned.
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+
     def _prepare_paint(self, kwargs: Dict[str, Any]) -> Request:
         def _set_val_if_key_exists(src: dict, dst: dict, key: str) -> None:
             if key in src:
@@ -464,6 +552,8 @@ class ImageV2(_Image):
 
 
 class ImageV2Response(EBResponse):
+    __slots__ = ()
+
     def get_result(self) -> Any:
         image_urls = []
         for task_item in self.data["sub_task_result_list"]:
@@ -13,6 +13,8 @@
 # limitations under the License.
 
 import asyncio
+import copy
+import functools
 import operator
 import time
 from typing import (
@@ -20,6 +22,7 @@ from typing import (
     AsyncIterator,
     Callable,
     ClassVar,
+    Dict,
     Final,
     Iterator,
     List,
@@ -27,6 +30,7 @@ from typing import (
     Optional,
     Tuple,
     Union,
+    cast,
     final,
     overload,
 )
@@ -37,10 +41,35 @@ import erniebot.constants as constants
 import erniebot.errors as errors
 import erniebot.utils.logging as logging
 from erniebot.api_types import APIType, convert_str_to_api_type
-from erniebot.backends import build_backend
+from erniebot.backends import get_backend
+from erniebot.caching import ResponseCache, make_cache_key
+from erniebot.circuit_breaker import (
+    CircuitBreaker,
+    RetryBudget,
+    get_circuit_breaker,
+    get_retry_budget,
+)
+from erniebot.coalescing import get_request_coalescer
+from erniebot.concurrency_limiter import (
+    AdaptiveConcurrencyLimiter,
+    Permit,
+    get_concurrency_limiter,
+)
 from erniebot.config import GlobalConfig
+from erniebot.hedging import get_latency_tracker, hedge
+from erniebot.instrumentation.hooks import (
+    RequestContext,
+    get_current_request_context,
+    reset_current_request_context,
+    set_current_request_context,
+)
+from erniebot.rate_limiter import RateLimiter, get_rate_limiter
 from erniebot.response import EBResponse
-from erniebot.types import ConfigDictType, HeadersType, ParamsType
+from erniebot.types import ConfigDictType, HeadersType, ParamsType, Request
+from erniebot.utils.token_counter import get_token_counter
+
+# Response of a hedged attempt, and the context it recorded into
+_HedgedAttemptResult = Tuple[Union[EBResponse, AsyncIterator[EBResponse]], Optional[RequestContext]]
 
 
 class EBResource(object):
@@ -60,6 +89,12 @@ class EBResource(object):
     POLLING_INTERVAL_SECS: Final[float] = constants.POLLING_INTERVAL_SECS
 
     SUPPORTED_API_TYPES: ClassVar[Tuple[APIType, ...]]
+    # Whether requests of the resource are idempotent and can be hedged.
+    SUPPORTS_HEDGING: ClassVar[bool] = False
+    # Whether identical requests of the resource that are in flight at the
+    # same time can share a single response, which requires them to be
+    # idempotent.
+    SUPPORTS_COALESCING: ClassVar[bool] = False
 
     def __init__(self, **config: Any) -> None:
         object.__init__(self)
@@ -73,7 +108,35 @@ class EBResource(object):
         self.max_retries = self._cfg["max_retries"] or 0
         self.retry_after = (self._cfg["min_retry_delay"] or 0, self._cfg["max_retry_delay"] or 0)
 
-        self._backend = build_backend(self.api_type, self._cfg)
+        self._backend = get_backend(self.api_type, self._cfg)
+        api_type_name = self.api_type.name.lower()
+        self._base_url = self._cfg["api_base_url"] or getattr(type(self._backend), "base_url", None)
+
+        self._circuit_breaker: Optional[CircuitBreaker] = None
+        if self._cfg["circuit_breaker_threshold"]:
+            self._circuit_breaker = get_circuit_breaker(
+                api_type_name,
+                self._base_url,
+                failure_threshold=self._cfg["circuit_breaker_threshold"],
+                reset_timeout=self._cfg["circuit_breaker_reset_timeout"] or 0,
+            )
+        self._retry_budget: Optional[RetryBudget] = None
+        if self._cfg["retry_budget_ratio"]:
+            self._retry_budget = get_retry_budget(
+                api_type_name, self._base_url, ratio=self._cfg["retry_budget_ratio"]
+            )
+
+        # The retry strategies are shared by all requests of the resource.
+        # Each request still needs a controller of its own, as the controller
+        # keeps the state of the attempts.
+        self._retry_kwargs: Dict[str, Any] = dict(
+            stop=tenacity.stop_after_attempt(self.max_retries + 1),
+            wait=tenacity.wait_exponential(multiplier=1, max=self.retry_after[1], min=self.retry_after[0])
+            + tenacity.wait_random(min=0, max=0.5),
+            retry=self._should_retry,
+            before_sleep=self._before_sleep,
+            reraise=True,
+        )
 
     @overload
     def request(
@@ -125,33 +188,30 @@ class EBResource(object):
         headers: Optional[HeadersType] = None,
         request_timeout: Optional[float] = None,
     ) -> Union[EBResponse, Iterator[EBResponse]]:
-        retrying = tenacity.Retrying(
-            stop=tenacity.stop_after_attempt(self.max_retries + 1),
-            wait=tenacity.wait_exponential(multiplier=1, max=self.retry_after[1], min=self.retry_after[0])
-            + tenacity.wait_random(min=0, max=0.5),
-            retry=(
-                tenacity.retry_if_exception_type(errors.TryAgain)
-                | tenacity.retry_if_exception_type(errors.RateLimitError)
-                | tenacity.retry_if_exception_type(errors.TimeoutError)
-            ),
-            before_sleep=lambda retry_state: logging.warning(
-                "Retrying requests: Attempt %s ended with: %s",
-                retry_state.attempt_number,
-                retry_state.outcome,
-            ),
-            reraise=True,
+        if not stream and self.SUPPORTS_COALESCING and self._cfg["coalesce_requests"]:
+            return get_request_coalescer().call(
+                self._get_coalescing_key(method, path, params, headers),
+                lambda: cast(
+                    EBResponse,
+                    self._request_with_retries(
+                        method=method,
+                        path=path,
+                        stream=False,
+                        params=params,
+                        headers=headers,
+                        request_timeout=request_timeout,
+                    ),
+                ),
+                copy_result=_copy_response,
+            )
+        return self._request_with_retries(
+            method=method,
+            path=path,
+            stream=stream,
+            params=params,
+            headers=headers,
+            request_timeout=request_timeout,
         )
-        for attempt in retrying:
-            with attempt:
-                return self._request(
-                    method=method,
-                    path=path,
-                    stream=stream,
-                    params=params,
-                    headers=headers,
-                    request_timeout=request_timeout,
-                )
-        raise AssertionError
 
     @overload
     async def arequest(
@@ -203,33 +263,31 @@ class EBResource(object):
         headers: Optional[HeadersType] = None,
         request_timeout: Optional[float] = None,
     ) -> Union[EBResponse, AsyncIterator[EBResponse]]:
-        async_retrying = tenacity.AsyncRetrying(
-            stop=tenacity.stop_after_attempt(self.max_retries + 1),
-            wait=tenacity.wait_exponential(multiplier=1, max=self.retry_after[1], min=self.retry_after[0])
-            + tenacity.wait_random(min=0, max=0.5),
-            retry=(
-                tenacity.retry_if_exception_type(errors.TryAgain)
-                | tenacity.retry_if_exception_type(errors.RateLimitError)
-                | tenacity.retry_if_exception_type(errors.TimeoutError)
-            ),
-            before_sleep=lambda retry_state: logging.warning(
-                "Retrying requests: Attempt %s ended with: %s",
-                retry_state.attempt_number,
-                retry_state.outcome,
-            ),
-            reraise=True,
-        )
-        async for attempt in async_retrying:
-            with attempt:
-                return await self._arequest(
+        if not stream and self.SUPPORTS_COALESCING and self._cfg["coalesce_requests"]:
+
+            async def _request() -> EBResponse:
+                resp = await self._arequest_with_retries(
                     method=method,
                     path=path,
-                    stream=stream,
+                    stream=False,
                     params=params,
                     headers=headers,
                     request_timeout=request_timeout,
                 )
-        raise AssertionError
+                return cast(EBResponse, resp)
+
+            resp = await get_request_coalescer().acall(
+                self._get_coalescing_key(method, path, params, headers), _request, copy_result=_copy_response
+            )
+            return resp
+        return await self._arequest_with_retries(
+            method=method,
+            path=path,
+            stream=stream,
+            params=params,
+            headers=headers,
+            request_timeout=request_timeout,
+        )
 
     @final
     def poll(
@@ -291,6 +349,131 @@ class EBResource(object):
     def get_supported_api_type_names(cls) -> List[str]:
         return list(map(operator.attrgetter("name"), cls.SUPPORTED_API_TYPES))
 
+    def _request_with_retries(
+        self,
+        method: str,
+        path: str,
+        stream: bool,
+        params: Optional[ParamsType],
+        headers: Optional[HeadersType],
+        request_timeout: Optional[float],
+    ) -> Union[EBResponse, Iterator[EBResponse]]:
+        ctx = self._create_request_context(method, path, stream)
+        # The context is made current, so that the HTTP client and the retry
+        # callback can find it.
+        token = None if ctx is None else set_current_request_context(ctx)
+        try:
+            retrying = tenacity.Retrying(**self._retry_kwargs)
+
+            if self._retry_budget is not None:
+                self._retry_budget.record_request()
+            for attempt in retrying:
+                with attempt:
+                    resp = self._request(
+                        method=method,
+                        path=path,
+                        stream=stream,
+                        params=params,
+                        headers=headers,
+                        request_timeout=request_timeout,
+                    )
+        except BaseException as e:
+            if ctx is not None:
+                ctx.end(None, e)
+            raise
+        finally:
+            if token is not None:
+                reset_current_request_context(token)
+        if ctx is not None:
+            if isinstance(resp, EBResponse):
+                ctx.end(resp, None)
+            else:
+                resp = _ObservedStream(resp, functools.partial(ctx.end, None))
+        return resp
+
+    async def _arequest_with_retries(
+        self,
+        method: str,
+        path: str,
+        stream: bool,
+        params: Optional[ParamsType],
+        headers: Optional[HeadersType],
+        request_timeout: Optional[float],
+    ) -> Union[EBResponse, AsyncIterator[EBResponse]]:
+        ctx = self._create_request_context(method, path, stream)
+        token = None if ctx is None else set_current_request_context(ctx)
+        try:
+            async_retrying = tenacity.AsyncRetrying(**self._retry_kwargs)
+
+            if self._retry_budget is not None:
+                self._retry_budget.record_request()
+            if self.SUPPORTS_HEDGING and self._cfg["hedging_percentile"] is not None:
+                arequest = self._ahedged_request
+            else:
+                arequest = self._arequest
+            async for attempt in async_retrying:
+                with attempt:
+                    resp = await arequest(
+                        method=method,
+                        path=path,
+                        stream=stream,
+                        params=params,
+                        headers=headers,
+                        request_timeout=request_timeout,
+                    )
+        except BaseException as e:
+            if ctx is not None:
+                ctx.end(None, e)
+            raise
+        finally:
+            if token is not None:
+                reset_current_request_context(token)
+        if ctx is not None:
+            if isinstance(resp, EBResponse):
+                ctx.end(resp, None)
+            else:
+                resp = _AsyncObservedStream(resp, functools.partial(ctx.end, None))
+        return resp
+
+    def _create_request_context(self, method: str, path: str, stream: bool) -> Optional[RequestContext]:
+        hooks = self._cfg["request_hooks"]
+        if not hooks:
+            # Instrumentation costs nothing more than this check when it is
+            # disabled.
+            return None
+        ctx = RequestContext(
+            hooks,
+            api_type=self.api_type.name.lower(),
+            method=method,
+            path=path,
+            model=self._find_model_name(path),
+            stream=stream,
+        )
+        ctx.start()
+        return ctx
+
+    def _before_sleep(self, retry_state: tenacity.RetryCallState) -> None:
+        logging.warning(
+            "Retrying requests: Attempt %s ended with: %s",
+            retry_state.attempt_number,
+            retry_state.outcome,
+        )
+        ctx = get_current_request_context()
+        if ctx is not None and retry_state.outcome is not None:
+            error = retry_state.outcome.exception()
+            delay = retry_state.next_action.sleep if retry_state.next_action is not None else 0
+            if error is not None:
+                ctx.record_retry(error, delay)
+
+    def _get_coalescing_key(
+        self, method: str, path: str, params: Optional[ParamsType], headers: Optional[HeadersType]
+    ) -> str:
+        # Requests made with different credentials must not be merged.
+        credentials = (self._cfg["ak"], self._cfg["sk"], self._cfg["access_token"])
+        return make_cache_key(
+            self.api_type.name.lower(), self._base_url, credentials, method, path, params, headers
+        )
+
     @overload
     def _request(
         self,
@@ -337,14 +520,26 @@ class EBResource(object):
         headers: Optional[HeadersType],
         request_timeout: Optional[float],
     ) -> Union[EBResponse, Iterator[EBResponse]]:
-        resp = self._backend.request(
-            method,
-            path,
-            stream,
-            params=params,
-            headers=headers,
-            request_timeout=request_timeout,
-        )
+        if self._circuit_breaker is not None:
+            self._circuit_breaker.before_request()
+        try:
+            limiter = self._get_rate_limiter(path)
+            if limiter is not None:
+                limiter.acquire(_estimate_num_tokens(params) if limiter.counts_tokens else 0)
+            resp = self._backend.request(
+                method,
+                path,
+                stream,
+                params=params,
+                headers=headers,
+                request_timeout=request_timeout,
+            )
+        except BaseException as e:
+            if self._circuit_breaker is not None:
+                self._circuit_breaker.record(e)
+            raise
+        if self._circuit_breaker is not None:
+            self._circuit_breaker.record()
         if stream:
             if not isinstance(resp, Iterator):
                 raise RuntimeError("Expected an iterator of response objects")
@@ -399,22 +594,175 @@ class EBResource(object):
         headers: Optional[HeadersType],
         request_timeout: Optional[float],
     ) -> Union[EBResponse, AsyncIterator[EBResponse]]:
-        resp = await self._backend.arequest(
-            method,
-            path,
-            stream,
-            params=params,
-            headers=headers,
-            request_timeout=request_timeout,
-        )
+        if self._circuit_breaker is not None:
+            self._circuit_breaker.before_request()
+        concurrency_limiter = self._get_concurrency_limiter()
+        permit = None
+        try:
+            limiter = self._get_rate_limiter(path)
+            if limiter is not None:
+                await limiter.aacquire(_estimate_num_tokens(params) if limiter.counts_tokens else 0)
+            if concurrency_limiter is not None:
+                permit = await concurrency_limiter.acquire()
+            resp = await self._backend.arequest(
+                method,
+                path,
+                stream,
+                params=params,
+                headers=headers,
+                request_timeout=request_timeout,
+            )
+        except BaseException as e:
+            if self._circuit_breaker is not None:
+                self._circuit_breaker.record(e)
+            if concurrency_limiter is not None and permit is not None:
+                concurrency_limiter.release(permit, error=e)
+            raise
+        if self._circuit_breaker is not None:
+            self._circuit_breaker.record()
         if stream:
             if not isinstance(resp, AsyncIterator):
                 raise RuntimeError("Expected an iterator of response objects")
+            if concurrency_limiter is not None and permit is not None:
+                # The permit is held until the stream ends.
+                resp = _AsyncObservedStream(
+                    resp,
+                    functools.partial(
+                        _release_permit, concurrency_limiter, permit, time.monotonic() - permit.acquired_at
+                    ),
+                )
         else:
+            if concurrency_limiter is not None and permit is not None:
+                concurrency_limiter.release(permit)
             if not isinstance(resp, EBResponse):
                 raise RuntimeError("Expected a response object")
         return resp
 
+    async def _ahedged_request(
+        self,
+        method: str,
+        path: str,
+        stream: bool,
+        params: Optional[ParamsType],
+        headers: Optional[HeadersType],
+        request_timeout: Optional[float],
+    ) -> Union[EBResponse, AsyncIterator[EBResponse]]:
+        percentile = self._cfg["hedging_percentile"]
+        assert percentile is not None
+        tracker = get_latency_tracker((self.api_type.name.lower(), self._base_url, path))
+        # Each attempt records into a context of its own, and only the one
+        # whose outcome is used is accounted for in the request context.
+        ctx = get_current_request_context()
+        attempt_ctxs: List[RequestContext] = []
+
+        async def _attempt() -> _HedgedAttemptResult:
+            attempt_ctx = None
+            if ctx is not None:
+                attempt_ctx = ctx.fork()
+                attempt_ctxs.append(attempt_ctx)
+                # Each attempt runs in a task of its own, so the context
+                # variable does not need to be reset.
+                set_current_request_context(attempt_ctx)
+            start_time = time.monotonic()
+            resp = await self._arequest(
+                method=method,
+                path=path,
+                stream=stream,
+                params=params,
+                headers=headers,
+                request_timeout=request_timeout,
+            )
+            if not isinstance(resp, EBResponse):
+                # For streams, we wait for the first chunk.
+                resp = await _prefetch_first_chunk(resp)
+            tracker.record(time.monotonic() - start_time)
+            return resp, attempt_ctx
+
+        def _may_hedge() -> bool:
+            # Hedged requests are paid for with the retry budget.
+            return self._retry_budget is None or self._retry_budget.try_withdraw()
+
+        async def _discard(result: _HedgedAttemptResult) -> None:
+            await _close_stream(result[0])
+
+        try:
+            resp, attempt_ctx = await hedge(
+                _attempt,
+                tracker.percentile(percentile),
+                may_hedge=_may_hedge,
+                discard=_discard,
+            )
+        except Exception:
+            # The error of the first attempt is raised.
+            if attempt_ctxs:
+                attempt_ctxs[0].commit()
+            raise
+        if attempt_ctx is not None:
+            attempt_ctx.commit()
+        return resp
+
+    def _get_configured_response_cache(self) -> Optional[ResponseCache]:
+        # Only resources whose creation is idempotent should use this to
+        # enable caching.
+        cache = self._cfg["response_cache"]
+        if cache is not None and not isinstance(cache, ResponseCache):
+            raise TypeError("`response_cache` should be a `ResponseCache` object.")
+        return cache
+
+    def _get_response_cache_key(self, req: Request) -> str:
+        # Responses obtained with different credentials must not be shared.
+        credentials = (self._cfg["ak"], self._cfg["sk"], self._cfg["access_token"])
+        return make_cache_key(
+            type(self).__name__,
+            self.api_type.name.lower(),
+            self._base_url,
+            credentials,
+            req.method,
+            req.path,
+            req.params,
+        )
+
+    def _should_retry(self, retry_state: tenacity.RetryCallState) -> bool:
+        outcome = retry_state.outcome
+        if outcome is None or not outcome.failed:
+            return False
+        if not isinstance(
+            outcome.exception(), (errors.TryAgain, errors.RateLimitError, errors.TimeoutError)
+        ):
+            return False
+        # Leave the last attempt to the stop condition, so as not to spend the
+        # budget in vain.
+        if retry_state.attempt_number > self.max_retries:
+            return False
+        if self._retry_budget is not None and not self._retry_budget.try_withdraw():
+            logging.warning("Retry budget exhausted. Giving up retrying.")
+            return False
+        return True
+
+    def _get_rate_limiter(self, path: str) -> Optional[RateLimiter]:
+        return get_rate_limiter(self.api_type.name.lower(), self._find_model_name(path), self._cfg)
+
+    def _get_concurrency_limiter(self) -> Optional[AdaptiveConcurrencyLimiter]:
+        if not self._cfg["adaptive_concurrency"]:
+            return None
+        return get_concurrency_limiter(
+            self.api_type.name.lower(),
+            self._base_url,
+            initial_limit=self._cfg["initial_concurrency"],
+            max_limit=self._cfg["max_concurrency"],
+        )
+
+    def _find_model_name(self, path: str) -> Optional[str]:
+        # Resources that support multiple models map model names to paths in
+        # `_API_INFO_DICT`, so the model can be identified by the path.
+        api_info = getattr(self, "_API_INFO_DICT", {}).get(self.api_type, None)
+        if api_info is None or "models" not in api_info:
+            return None
+        for model, model_info in api_info["models"].items():
+            if path == f"/{api_info['resource_id']}/{model_info['model_id']}":
+                return model
+        return None
+
     def _create_config_dict(self, overrides: Any) -> ConfigDictType:
         cfg_dict = GlobalConfig().create_dict(**overrides)
         api_type_str = cfg_dict["api_type"]
@@ -423,3 +771,155 @@ class EBResource(object):
         api_type = convert_str_to_api_type(api_type_str)
         cfg_dict["api_type"] = api_type
         return cfg_dict
+
+
+def _copy_response(resp: EBResponse) -> EBResponse:
+    return EBResponse(resp.rcode, copy.deepcopy(resp.rbody), dict(resp.rheaders))
+
+
+def _release_permit(
+    limiter: AdaptiveConcurrencyLimiter, permit: Permit, latency: float, error: Optional[BaseException]
+) -> None:
+    limiter.release(permit, latency=latency, error=error)
+
+
+def _estimate_num_tokens(params: Optional[ParamsType]) -> int:
+    if not params:
+        return 0
+    texts: List[str] = []
+    messages = params.get("messages", None)
+    if isinstance(messages, list):
+        for message in messages:
+            if isinstance(message, dict) and isinstance(message.get("content", None), str):
+                texts.append(message["content"])
+    for key in ("system", "prompt", "input"):
+        val = params.get(key, None)
+        if isinstance(val, str):
+            texts.append(val)
+        elif isinstance(val, list):
+            texts.extend(item for item in val if isinstance(item, str))
+    return get_token_counter().count_total(texts)
+
+
+class _ObservedStream(Iterator[EBResponse]):
+    """Wraps a stream and calls `on_end` exactly once, with the error (if any),
+    when the stream is exhausted, fails, or gets closed. `on_end` is also
+    called if the stream is garbage collected without having ended, which
+    covers streams that are never iterated."""
+
+    def __init__(
+        self, stream: Iterator[EBResponse], on_end: Callable[[Optional[BaseException]], None]
+    ) -> None:
+        super().__init__()
+        self._stream = stream
+        self._on_end: Optional[Callable[[Optional[BaseException]], None]] = on_end
+
+    def __iter__(self) -> "_ObservedStream":
+        return self
+
+    def __next__(self) -> EBResponse:
+        if self._on_end is None:
+            raise StopIteration
+        try:
+            return next(self._stream)
+        except StopIteration:
+            self._end(None)
+            raise
+        except BaseException as e:
+            self._end(e)
+            raise
+
+    def close(self) -> None:
+        # A consumer that stops early does not make the request fail.
+        try:
+            close = getattr(self._stream, "close", None)
+            if close is not None:
+                close()
+        finally:
+            self._end(None)
+
+    def __del__(self) -> None:
+        self._end(None)
+
+    def _end(self, error: Optional[BaseException]) -> None:
+        on_end, self._on_end = self._on_end, None
+        if on_end is not None:
+            on_end(error)
+
+
+class _AsyncObservedStream(AsyncIterator[EBResponse]):
+    """Asynchronous version of `_ObservedStream`. If the stream is garbage
+    collected, `on_end` is called in the event loop that created the stream,
+    unless the loop has been closed."""
+
+    def __init__(
+        self, stream: AsyncIterator[EBResponse], on_end: Callable[[Optional[BaseException]], None]
+    ) -> None:
+        super().__init__()
+        self._loop = asyncio.get_running_loop()
+        self._stream = stream
+        self._on_end: Optional[Callable[[Optional[BaseException]], None]] = on_end
+
+    def __aiter__(self) -> "_AsyncObservedStream":
+        return self
+
+    async def __anext__(self) -> EBResponse:
+        if self._on_end is None:
+            raise StopAsyncIteration
+        try:
+            return await self._stream.__anext__()
+        except StopAsyncIteration:
+            self._end(None)
+            raise
+        except BaseException as e:
+            self._end(e)
+            raise
+
+    async def aclose(self) -> None:
+        try:
+            await _close_stream(self._stream)
+        finally:
+            self._end(None)
+
+    def __del__(self) -> None:
+        on_end, self._on_end = self._on_end, None
+        if on_end is None:
+            return
+        if self._loop.is_closed():
+            on_end(None)
+        else:
+            # Garbage collection may take place in any thread.
+            self._loop.call_soon_threadsafe(on_end, None)
+
+    def _end(self, error: Optional[BaseException]) -> None:
+        on_end, self._on_end = self._on_end, None
+        if on_end is not None:
+            on_end(error)
+
+
+async def _prefetch_first_chunk(stream: AsyncIterator[EBResponse]) -> AsyncIterator[EBResponse]:
+    try:
+        first_chunk = await stream.__anext__()
+    except StopAsyncIteration:
+        first_chunk = None
+    except BaseException:
+        await _close_stream(stream)
+        raise
+
+    async def _chain() -> AsyncIterator[EBResponse]:
+        try:
+            if first_chunk is None:
+                return
+            yield first_chunk
+            async for chunk in stream:
+                yield chunk
+        finally:
+            await _close_stream(stream)
+
+    return _chain()
+
+
+async def _close_stream(resp: Union[EBResponse, AsyncIterator[EBResponse]]) -> None:
+    aclose = getattr(resp, "aclose", None)
+    if aclose is not None:
+        await aclose()
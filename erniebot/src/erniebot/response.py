@@ -12,13 +12,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import inspect
-import json
 from collections.abc import Mapping
-from typing import Any, Dict, Iterator, Union
+from typing import Any, ClassVar, Dict, FrozenSet, Iterator, Optional, Union
 
 from typing_extensions import Self
 
+from .utils import json_codec
 from .utils.misc import Constant
 
 __all__ = ["EBResponse"]
@@ -30,8 +29,14 @@ class EBResponse(Mapping):
     An `EBResponse` object behaves like a read-only dictionary, except that the
     status code, response body, response headers, and the fields of the response
     body are accessible through attributes.
+
+    Instances are lightweight, as one is created for every chunk of a streamed
+    response: the class and its subclasses in the SDK use `__slots__`, and the
+    names that response fields must not shadow are computed once per class.
     """
 
+    __slots__ = ("_dict",)
+
     _INNER_DICT_TYPE = Constant(dict)
     _INSTANCE_ATTRS = Constant(("_dict",))
     _RESERVED_KEYS = Constant(("rcode", "rbody", "rheaders"))
@@ -40,6 +45,8 @@ class EBResponse(Mapping):
     rbody: Union[str, Dict[str, Any]]
     rheaders: Dict[str, Any]
 
+    _reserved_names: ClassVar[Optional[FrozenSet[str]]] = None
+
     def __init__(self, rcode: int, rbody: Union[str, Dict[str, Any]], rheaders: Dict[str, Any]) -> None:
         """Initializes the instance based on response code, body, and headers.
 
@@ -48,7 +55,8 @@ class EBResponse(Mapping):
             rbody: Response body. If `rbody` is a dictionary, the key-value
                 pairs in the dictionary will also get registered, so that they
                 can be accessed from the object using dot notation.
-            rheaders: Response headers.
+            rheaders: Response headers. The mapping is not copied, so it can be
+                shared by all chunks of a streamed response.
         """
         super().__init__()
         self._dict = self._INNER_DICT_TYPE(rcode=rcode, rbody=rbody, rheaders=rheaders)
@@ -57,6 +65,13 @@ class EBResponse(Mapping):
 
     @classmethod
     def from_mapping(cls, mapping: Mapping) -> Self:
+        if isinstance(mapping, EBResponse) and cls.__init__ is EBResponse.__init__:
+            # Responses are read-only, so the dictionary can be shared instead
+            # of being rebuilt.
+            obj = cls.__new__(cls)
+            obj._dict = mapping._dict
+            obj._check_keys(mapping._dict.keys() - cls._RESERVED_KEYS)
+            return obj
         return cls(mapping["rcode"], mapping["rbody"], mapping["rheaders"])
 
     def __getitem__(self, key: str) -> Any:
@@ -152,12 +167,25 @@ class EBResponse(Mapping):
         return self._dict.copy()
 
     def to_json(self) -> str:
-        return json.dumps(self._dict)
+        return json_codec.dumps(self._dict).decode("utf-8")
 
     def _update_from_dict(self, dict_: Dict[str, Any]) -> None:
-        member_names = set(pair[0] for pair in inspect.getmembers(self))
-        for k, v in dict_.items():
-            if k in self._RESERVED_KEYS or k in member_names:
-                raise ValueError(f"{repr(k)} is a reserved key.")
-            else:
-                self._dict[k] = v
+        self._check_keys(dict_.keys())
+        self._dict.update(dict_)
+
+    @classmethod
+    def _check_keys(cls, keys: Any) -> None:
+        reserved_names = cls._get_reserved_names()
+        if not reserved_names.isdisjoint(keys):
+            k = next(k for k in keys if k in reserved_names)
+            raise ValueError(f"{repr(k)} is a reserved key.")
+
+    @classmethod
+    def _get_reserved_names(cls) -> FrozenSet[str]:
+        # Fields must not shadow the members of the class, so that they can
+        # be accessed as attributes.
+        reserved_names = cls.__dict__.get("_reserved_names", None)
+        if reserved_names is None:
+            reserved_names = frozenset(dir(cls)).union(cls._RESERVED_KEYS, cls._INSTANCE_ATTRS)
+            cls._reserved_names = reserved_names
+        return reserved_names
@@ -0,0 +1,243 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import atexit
+import http.cookiejar
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    AsyncGenerator,
+    Dict,
+    Final,
+    Generator,
+    Generic,
+    Hashable,
+    List,
+    MutableMapping,
+    Optional,
+    TypeVar,
+)
+
+import aiohttp
+import requests
+import requests.adapters
+
+from . import constants
+from .utils import logging
+from .utils.misc import SingletonMeta
+from .utils.url import extract_base_url
+
+__all__ = ["SessionPool", "close_sessions", "aclose_sessions"]
+
+_SessionT = TypeVar("_SessionT")
+
+
+@dataclass
+class _PooledSession(Generic[_SessionT]):
+    session: _SessionT
+    last_used_at: float = field(default_factory=time.monotonic)
+    num_users: int = 0
+
+
+class SessionPool(metaclass=SingletonMeta):
+    """Process-wide pool of HTTP sessions shared by all clients.
+
+    `requests` sessions are shared among threads and keyed by the scheme and
+    host of the base URL, the proxy, and the connection limit. `aiohttp`
+    sessions are bound to event loops, so each event loop owns a separate set
+    of sessions with the same keys. Sessions that have not been used for a
+    while are closed and evicted. The remaining `requests` sessions are closed
+    when the interpreter exits, whereas the `aiohttp` sessions of an event
+    loop should be closed by calling `aclose_sessions` before the loop is
+    closed.
+
+    Since the sessions are shared by requests made with different
+    credentials, they never store or send cookies.
+    """
+
+    DEFAULT_MAX_CONNECTIONS_PER_HOST: Final[int] = constants.DEFAULT_MAX_CONNECTIONS_PER_HOST
+    DEFAULT_KEEPALIVE_TIMEOUT_SECS: Final[float] = constants.DEFAULT_KEEPALIVE_TIMEOUT_SECS
+    DEFAULT_SESSION_IDLE_TIMEOUT_SECS: Final[float] = constants.DEFAULT_SESSION_IDLE_TIMEOUT_SECS
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._lock = threading.Lock()
+        self._sessions: Dict[Hashable, _PooledSession[requests.Session]] = {}
+        self._asessions: MutableMapping[
+            asyncio.AbstractEventLoop, Dict[Hashable, _PooledSession[aiohttp.ClientSession]]
+        ] = weakref.WeakKeyDictionary()
+        atexit.register(self.close)
+
+    @contextmanager
+    def session(
+        self,
+        base_url: str,
+        *,
+        proxy: Optional[str] = None,
+        max_connections_per_host: Optional[int] = None,
+        idle_timeout: Optional[float] = None,
+    ) -> Generator[requests.Session, None, None]:
+        """Borrows a pooled `requests` session for the given base URL."""
+        if max_connections_per_host is None:
+            max_connections_per_host = self.DEFAULT_MAX_CONNECTIONS_PER_HOST
+        if idle_timeout is None:
+            idle_timeout = self.DEFAULT_SESSION_IDLE_TIMEOUT_SECS
+        key = (extract_base_url(base_url), proxy, max_connections_per_host)
+
+        with self._lock:
+            self._evict_idle_sessions(self._sessions, idle_timeout)
+            entry = self._sessions.get(key, None)
+            if entry is None:
+                entry = _PooledSession(self._create_session(proxy, max_connections_per_host))
+                self._sessions[key] = entry
+            entry.num_users += 1
+
+        try:
+            yield entry.session
+        finally:
+            with self._lock:
+                entry.num_users -= 1
+                entry.last_used_at = time.monotonic()
+
+    @asynccontextmanager
+    async def asession(
+        self,
+        base_url: str,
+        *,
+        max_connections_per_host: Optional[int] = None,
+        keepalive_timeout: Optional[float] = None,
+        idle_timeout: Optional[float] = None,
+    ) -> AsyncGenerator[aiohttp.ClientSession, None]:
+        """Borrows a pooled `aiohttp` session bound to the running event loop."""
+        if max_connections_per_host is None:
+            max_connections_per_host = self.DEFAULT_MAX_CONNECTIONS_PER_HOST
+        if keepalive_timeout is None:
+            keepalive_timeout = self.DEFAULT_KEEPALIVE_TIMEOUT_SECS
+        if idle_timeout is None:
+            idle_timeout = self.DEFAULT_SESSION_IDLE_TIMEOUT_SECS
+        key = (extract_base_url(base_url), max_connections_per_host, keepalive_timeout)
+        loop = asyncio.get_running_loop()
+
+        # All sessions of an event loop are only touched from the thread that
+        # runs the loop, so no lock is required for the per-loop mapping.
+        with self._lock:
+            sessions = self._asessions.get(loop, None)
+            if sessions is None:
+                sessions = {}
+                self._asessions[loop] = sessions
+        stale_sessions = self._evict_idle_sessions(sessions, idle_timeout)
+        entry = sessions.get(key, None)
+        if entry is None or entry.session.closed:
+            entry = _PooledSession(self._create_asession(max_connections_per_host, keepalive_timeout))
+            sessions[key] = entry
+        entry.num_users += 1
+
+        try:
+            for session in stale_sessions:
+                await session.close()
+            yield entry.session
+        finally:
+            entry.num_users -= 1
+            entry.last_used_at = time.monotonic()
+
+    def close(self) -> None:
+        """Closes all pooled `requests` sessions."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for entry in sessions:
+            entry.session.close()
+
+    async def aclose(self) -> None:
+        """Closes all pooled `aiohttp` sessions bound to the running event loop."""
+        with self._lock:
+            sessions = self._asessions.pop(asyncio.get_running_loop(), {})
+        for entry in sessions.values():
+            await entry.session.close()
+
+    @staticmethod
+    def _evict_idle_sessions(
+        sessions: Dict[Hashable, _PooledSession[Any]], idle_timeout: float
+    ) -> List[Any]:
+        now = time.monotonic()
+        stale_keys = [
+            key
+            for key, entry in sessions.items()
+            if entry.num_users == 0 and now - entry.last_used_at > idle_timeout
+        ]
+        stale_sessions = []
+        for key in stale_keys:
+            entry = sessions.pop(key)
+            if isinstance(entry.session, requests.Session):
+                entry.session.close()
+            else:
+                stale_sessions.append(entry.session)
+        if stale_keys:
+            logging.debug("%d idle session(s) evicted", len(stale_keys))
+        return stale_sessions
+
+    @staticmethod
+    def _create_session(proxy: Optional[str], max_connections_per_host: int) -> requests.Session:
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1, pool_maxsize=max(max_connections_per_host, 1)
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        if proxy is not None:
+            session.proxies = {"http": proxy, "https": proxy}
+        session.cookies.set_policy(_NoCookiesPolicy())
+        return session
+
+    @staticmethod
+    def _create_asession(max_connections_per_host: int, keepalive_timeout: float) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=0, limit_per_host=max_connections_per_host, keepalive_timeout=keepalive_timeout
+        )
+        return aiohttp.ClientSession(connector=connector, cookie_jar=aiohttp.DummyCookieJar())
+
+
+class _NoCookiesPolicy(http.cookiejar.CookiePolicy):
+    """A cookie policy that rejects all cookies."""
+
+    netscape = True
+    rfc2965 = False
+    hide_cookie2 = False
+
+    def set_ok(self, cookie: http.cookiejar.Cookie, request: Any) -> bool:
+        return False
+
+    def return_ok(self, cookie: http.cookiejar.Cookie, request: Any) -> bool:
+        return False
+
+    def domain_return_ok(self, domain: str, request: Any) -> bool:
+        return False
+
+    def path_return_ok(self, path: str, request: Any) -> bool:
+        return False
+
+
+def close_sessions() -> None:
+    """Closes all pooled `requests` sessions."""
+    SessionPool().close()
+
+
+async def aclose_sessions() -> None:
+    """Closes all pooled `aiohttp` sessions bound to the running event loop."""
+    await SessionPool().aclose()
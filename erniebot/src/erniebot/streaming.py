@@ -0,0 +1,163 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Final,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Union,
+)
+
+from .resources.chat_completion import ChatCompletionResponse
+
+__all__ = ["ChatCompletionStreamAccumulator", "StreamMetrics"]
+
+
+@dataclass
+class StreamMetrics(object):
+    """Latency measurements of a streamed response.
+
+    All times are in seconds and measured on the client side.
+    """
+
+    # Time from the start of the request to the first chunk that carries
+    # content
+    time_to_first_token: Optional[float] = None
+    # Time between the arrivals of consecutive chunks
+    inter_chunk_latencies: List[float] = field(default_factory=list)
+    # Time from the start of the request to the last chunk
+    total_time: Optional[float] = None
+    num_chunks: int = 0
+    # Number of generated tokens, as reported by the server
+    num_completion_tokens: Optional[int] = None
+
+    @property
+    def mean_inter_token_latency(self) -> Optional[float]:
+        """Average time to generate a token after the first one.
+
+        Server-reported token counts are used if available. Otherwise, every
+        chunk is counted as a single token.
+        """
+        if self.time_to_first_token is None or self.total_time is None:
+            return None
+        num_tokens = self.num_completion_tokens
+        if num_tokens is None:
+            num_tokens = self.num_chunks
+        if num_tokens < 2:
+            return None
+        return (self.total_time - self.time_to_first_token) / (num_tokens - 1)
+
+
+class ChatCompletionStreamAccumulator(object):
+    """Merges the chunks of a streamed chat completion into a full response.
+
+    Iterating over the accumulator yields the chunks of the wrapped stream
+    unchanged, so it can be dropped into existing streaming loops. The chunks
+    are merged along the way, and `get_response` returns the complete
+    `ChatCompletionResponse` once the stream is exhausted:
+
+    - The texts in `result` are joined.
+    - Other fields (e.g. `usage`, `function_call`, `search_info`, and
+      `is_end`) take the last non-empty value in the stream, since the server
+      sends metadata in the last chunk or repeats it in every chunk.
+
+    Chunks can also be fed manually with `add`.
+
+    Args:
+        stream: Chunks returned by `ChatCompletion.create` or
+            `ChatCompletion.acreate` with `stream=True`.
+        started_at: Value of `time.monotonic()` when the request was sent. If
+            not given, the time at which the accumulator is created is used.
+    """
+
+    # Fields that only make sense for a single chunk
+    _PER_CHUNK_FIELDS: Final = frozenset(("result", "sentence_id"))
+
+    def __init__(
+        self,
+        stream: Union[Iterator[ChatCompletionResponse], AsyncIterator[ChatCompletionResponse], None] = None,
+        *,
+        started_at: Optional[float] = None,
+    ) -> None:
+        super().__init__()
+        self._stream = stream
+        self._started_at = started_at if started_at is not None else time.monotonic()
+        self._last_chunk_at: Optional[float] = None
+        self._texts: List[str] = []
+        self._fields: Dict[str, Any] = {}
+        self._rcode = 200
+        self._rheaders: Dict[str, Any] = {}
+        self.metrics = StreamMetrics()
+
+    def __iter__(self) -> Iterator[ChatCompletionResponse]:
+        if self._stream is None or not isinstance(self._stream, Iterator):
+            raise TypeError("The wrapped stream is not a synchronous iterator.")
+        for chunk in self._stream:
+            self.add(chunk)
+            yield chunk
+
+    async def __aiter__(self) -> AsyncIterator[ChatCompletionResponse]:
+        if self._stream is None or not isinstance(self._stream, AsyncIterator):
+            raise TypeError("The wrapped stream is not an asynchronous iterator.")
+        async for chunk in self._stream:
+            self.add(chunk)
+            yield chunk
+
+    @property
+    def text(self) -> str:
+        """The text received so far."""
+        if len(self._texts) > 1:
+            # Join once, so that repeated access stays cheap.
+            self._texts = ["".join(self._texts)]
+        return self._texts[0] if self._texts else ""
+
+    def add(self, chunk: Mapping[str, Any]) -> None:
+        """Merges a chunk into the accumulated response."""
+        now = time.monotonic()
+        metrics = self.metrics
+        if self._last_chunk_at is not None:
+            metrics.inter_chunk_latencies.append(now - self._last_chunk_at)
+        self._last_chunk_at = now
+        metrics.num_chunks += 1
+        metrics.total_time = now - self._started_at
+
+        self._rcode = chunk.get("rcode", self._rcode)
+        self._rheaders = chunk.get("rheaders", self._rheaders)
+        text = chunk.get("result", None)
+        if text:
+            self._texts.append(text)
+        if metrics.time_to_first_token is None and (text or chunk.get("function_call", None)):
+            metrics.time_to_first_token = now - self._started_at
+        for key, value in chunk.items():
+            if key in ("rcode", "rbody", "rheaders") or key in self._PER_CHUNK_FIELDS:
+                continue
+            if value is None or (isinstance(value, (str, list, dict)) and len(value) == 0):
+                continue
+            self._fields[key] = value
+        usage = self._fields.get("usage", None)
+        if isinstance(usage, dict) and "completion_tokens" in usage:
+            metrics.num_completion_tokens = usage["completion_tokens"]
+
+    def get_response(self) -> ChatCompletionResponse:
+        """Returns a response that contains everything received so far."""
+        rbody = dict(self._fields)
+        rbody["result"] = self.text
+        return ChatCompletionResponse(self._rcode, rbody, self._rheaders)
@@ -0,0 +1,167 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import contextlib
+import hashlib
+import json
+import os
+import pathlib
+import tempfile
+import time
+from typing import Any, Dict, Final, Generator, Hashable, Optional, Tuple, Union
+
+from .utils import logging
+
+try:
+    import fcntl
+except ImportError:
+    # Inter-process locking is not available on this platform (e.g. Windows).
+    # Writes are still atomic, but concurrent processes may request tokens
+    # redundantly.
+    fcntl = None  # type: ignore[assignment]
+
+__all__ = ["FileTokenStore"]
+
+
+class FileTokenStore(object):
+    """A token store backed by a JSON file that can be shared by processes.
+
+    Tokens are stored along with their expiration times (as UNIX timestamps),
+    and are indexed by the digests of the cache keys, such that no credentials
+    are written to disk in plain text. The file is only readable and writable
+    by the owner. Processes coordinate through an advisory lock on a sidecar
+    lock file.
+    """
+
+    # Tokens that expire within this period are considered unusable.
+    MIN_REMAINING_LIFETIME_SECS: Final[float] = 60
+
+    _FILE_MODE: Final[int] = 0o600
+
+    def __init__(self, path: Union[str, os.PathLike]) -> None:
+        super().__init__()
+        self.path = pathlib.Path(path).expanduser()
+        self._lock_path = self.path.with_name(self.path.name + ".lock")
+
+    def load(self, key: Hashable) -> Optional[Tuple[str, Optional[float]]]:
+        """Looks up a valid token.
+
+        Returns:
+            A tuple of the token and its remaining lifetime in seconds (None if
+            unknown), or None if no valid token is found.
+        """
+        entry = self._read_all().get(self._digest(key), None)
+        if entry is None:
+            return None
+        try:
+            token = entry["token"]
+            expires_at = entry["expires_at"]
+        except (KeyError, TypeError):
+            return None
+        if not isinstance(token, str):
+            return None
+        if expires_at is None:
+            return token, None
+        remaining = expires_at - time.time()
+        if remaining < self.MIN_REMAINING_LIFETIME_SECS:
+            return None
+        return token, remaining
+
+    def save(self, key: Hashable, token: str, expires_in: Optional[float]) -> None:
+        now = time.time()
+        entries = {
+            k: v
+            for k, v in self._read_all().items()
+            if isinstance(v, dict) and (v.get("expires_at", None) is None or v["expires_at"] > now)
+        }
+        entries[self._digest(key)] = {
+            "token": token,
+            "expires_at": now + expires_in if expires_in is not None else None,
+        }
+        try:
+            self._write_all(entries)
+        except OSError as e:
+            logging.warning("Failed to write the token store %s: %r", self.path, e)
+
+    @contextlib.contextmanager
+    def lock(self) -> Generator[None, None, None]:
+        """Holds the inter-process lock of the store."""
+        fd = self.acquire_lock()
+        try:
+            yield
+        finally:
+            self.release_lock(fd)
+
+    def acquire_lock(self) -> Optional[int]:
+        """Blocks until the inter-process lock is acquired.
+
+        Returns:
+            A file descriptor that should be passed to `release_lock`.
+        """
+        if fcntl is None:
+            return None
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(self._lock_path, os.O_RDWR | os.O_CREAT, self._FILE_MODE)
+        except OSError as e:
+            # The store is merely an optimization, so we proceed without
+            # the lock.
+            logging.warning("Failed to open the lock file %s: %r", self._lock_path, e)
+            return None
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        except BaseException:
+            os.close(fd)
+            raise
+        return fd
+
+    def release_lock(self, fd: Optional[int]) -> None:
+        if fd is None:
+            return
+        try:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+    def _read_all(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logging.warning("Failed to read the token store %s: %r", self.path, e)
+            return {}
+        if not isinstance(entries, dict):
+            return {}
+        return entries
+
+    def _write_all(self, entries: Dict[str, Any]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file and then rename it, so that readers never
+        # see a partially written file.
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=self.path.name, suffix=".tmp")
+        try:
+            os.chmod(tmp_path, self._FILE_MODE)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+            raise
+
+    @staticmethod
+    def _digest(key: Hashable) -> str:
+        return hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
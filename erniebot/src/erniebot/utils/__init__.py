@@ -12,4 +12,4 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from . import bos, logging, misc, token_helper, url
+from . import bos, json_codec, logging, misc, sse, token_counter, token_helper, url
@@ -0,0 +1,162 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import abc
+import json
+from json import JSONDecodeError
+from typing import Any, Callable, Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
+__all__ = [
+    "JSONCodec",
+    "StdlibJSONCodec",
+    "OrjsonJSONCodec",
+    "JSONDecodeError",
+    "get_codec",
+    "set_codec",
+    "dumps",
+    "loads",
+]
+
+JSONInputType = Union[str, bytes, bytearray, memoryview]
+
+
+class JSONCodec(metaclass=abc.ABCMeta):
+    """Encodes objects to UTF-8 JSON bytes and decodes them.
+
+    All codecs produce compact output that keeps non-ASCII characters as is,
+    and raise `JSONDecodeError` for invalid input.
+    """
+
+    name: str
+
+    @abc.abstractmethod
+    def dumps(
+        self,
+        obj: Any,
+        *,
+        default: Optional[Callable[[Any], Any]] = None,
+        sort_keys: bool = False,
+        indent: bool = False,
+    ) -> bytes:
+        """Encodes an object.
+
+        Args:
+            obj: Object to encode.
+            default: Function that converts an unsupported object to a
+                serializable one.
+            sort_keys: Whether to sort the keys of dictionaries.
+            indent: Whether to pretty-print with an indent of two spaces.
+        """
+
+    @abc.abstractmethod
+    def loads(self, data: JSONInputType) -> Any:
+        """Decodes a JSON document given as bytes or a string."""
+
+
+class StdlibJSONCodec(JSONCodec):
+    name = "json"
+
+    def dumps(
+        self,
+        obj: Any,
+        *,
+        default: Optional[Callable[[Any], Any]] = None,
+        sort_keys: bool = False,
+        indent: bool = False,
+    ) -> bytes:
+        return json.dumps(
+            obj,
+            ensure_ascii=False,
+            default=default,
+            sort_keys=sort_keys,
+            indent=2 if indent else None,
+            separators=None if indent else (",", ":"),
+        ).encode("utf-8")
+
+    def loads(self, data: JSONInputType) -> Any:
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        # `json.loads` accepts UTF-8 bytes as well.
+        return json.loads(data)
+
+
+class OrjsonJSONCodec(JSONCodec):
+    name = "orjson"
+
+    def __init__(self) -> None:
+        super().__init__()
+        if orjson is None:
+            raise ImportError("orjson is not installed.")
+        self._stdlib_codec = StdlibJSONCodec()
+
+    def dumps(
+        self,
+        obj: Any,
+        *,
+        default: Optional[Callable[[Any], Any]] = None,
+        sort_keys: bool = False,
+        indent: bool = False,
+    ) -> bytes:
+        option = orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, default=default, option=option)
+        except orjson.JSONEncodeError:
+            # orjson is stricter than the standard library in a few cases
+            # (e.g. integers that do not fit in 64 bits).
+            return self._stdlib_codec.dumps(obj, default=default, sort_keys=sort_keys, indent=indent)
+
+    def loads(self, data: JSONInputType) -> Any:
+        # `orjson.JSONDecodeError` is a subclass of `json.JSONDecodeError`.
+        return orjson.loads(data)
+
+
+_codec: JSONCodec = OrjsonJSONCodec() if orjson is not None else StdlibJSONCodec()
+
+
+def get_codec() -> JSONCodec:
+    """Returns the codec used by the SDK."""
+    return _codec
+
+
+def set_codec(codec: JSONCodec) -> None:
+    """Sets the codec used by the SDK.
+
+    By default, `OrjsonJSONCodec` is used if orjson is installed, and
+    `StdlibJSONCodec` otherwise.
+    """
+    global _codec
+    _codec = codec
+
+
+def dumps(
+    obj: Any,
+    *,
+    default: Optional[Callable[[Any], Any]] = None,
+    sort_keys: bool = False,
+    indent: bool = False,
+) -> bytes:
+    return _codec.dumps(obj, default=default, sort_keys=sort_keys, indent=indent)
+
+
+def loads(data: JSONInputType) -> Any:
+    return _codec.loads(data)
@@ -0,0 +1,148 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from dataclasses import dataclass
+from typing import List, Optional, Union
+
+__all__ = ["SSEEvent", "SSEDecoder"]
+
+_EMPTY: bytes = b""
+
+
+@dataclass
+class SSEEvent(object):
+    # If the event has a single `data` line, `data` is a view into the buffer
+    # that the line was read from.
+    data: Union[bytes, memoryview]
+    event: Optional[str] = None
+    id: Optional[str] = None
+    retry: Optional[int] = None
+
+
+class SSEDecoder(object):
+    """Incrementally decodes a server-sent event stream.
+
+    Chunks of arbitrary size are fed to the decoder, and complete events are
+    returned as soon as their terminating blank line is seen. Lines are
+    handled as memoryviews of the chunks, so an event with a single `data`
+    line (the common case) is produced without copying its payload.
+
+    Lines may end with LF or CRLF. Comments and unknown fields are ignored.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        # Incomplete last line of the previous chunk.
+        self._pending: bytes = _EMPTY
+        self._data_lines: List[memoryview] = []
+        self._event: Optional[str] = None
+        self._id: Optional[str] = None
+        self._retry: Optional[int] = None
+
+    def feed(self, chunk: bytes) -> List[SSEEvent]:
+        """Decodes a chunk of the stream and returns the completed events."""
+        if self._pending:
+            # Only the incomplete line is copied.
+            buf = self._pending + chunk
+        else:
+            buf = chunk
+        view = memoryview(buf)
+        events = []
+        data_lines = self._data_lines
+        start = 0
+        while True:
+            end = buf.find(b"\n", start)
+            if end < 0:
+                break
+            line_end = end - 1 if end > start and buf[end - 1] == 0x0D else end
+            # Fast paths for the most common kinds of lines
+            if start == line_end:
+                if data_lines:
+                    events.append(self._make_event())
+                else:
+                    self._event = None
+            elif buf.startswith(b"data: ", start, line_end):
+                if not data_lines and buf.startswith(b"\n", end + 1):
+                    # A single-line event, terminated by the following blank
+                    # line
+                    events.append(SSEEvent(view[start + 6 : line_end], self._event, self._id, self._retry))
+                    self._event = None
+                    end += 1
+                else:
+                    data_lines.append(view[start + 6 : line_end])
+            else:
+                event = self._process_line(buf, view, start, line_end)
+                if event is not None:
+                    events.append(event)
+            start = end + 1
+        self._pending = buf[start:] if start < len(buf) else _EMPTY
+        return events
+
+    def flush(self) -> List[SSEEvent]:
+        """Returns the last event if the stream ends without a blank line."""
+        events = []
+        if self._pending:
+            buf = self._pending
+            self._pending = _EMPTY
+            event = self._process_line(buf, memoryview(buf), 0, len(buf))
+            if event is not None:
+                events.append(event)
+        event = self._dispatch()
+        if event is not None:
+            events.append(event)
+        return events
+
+    def _process_line(self, buf: bytes, view: memoryview, start: int, end: int) -> Optional[SSEEvent]:
+        if start == end:
+            return self._dispatch()
+        if buf[start] == 0x3A:
+            # A comment line
+            return None
+        colon = buf.find(b":", start, end)
+        if colon < 0:
+            name_end, value_start = end, end
+        else:
+            name_end, value_start = colon, colon + 1
+            if value_start < end and buf[value_start] == 0x20:
+                value_start += 1
+        name = view[start:name_end]
+        if name == b"data":
+            self._data_lines.append(view[value_start:end])
+        elif name == b"event":
+            self._event = buf[value_start:end].decode("utf-8")
+        elif name == b"id":
+            self._id = buf[value_start:end].decode("utf-8")
+        elif name == b"retry":
+            try:
+                self._retry = int(buf[value_start:end])
+            except ValueError:
+                pass
+        return None
+
+    def _dispatch(self) -> Optional[SSEEvent]:
+        if self._data_lines:
+            return self._make_event()
+        self._event = None
+        return None
+
+    def _make_event(self) -> SSEEvent:
+        if len(self._data_lines) == 1:
+            data: Union[bytes, memoryview] = self._data_lines[0]
+        else:
+            data = b"\n".join(self._data_lines)
+        event = SSEEvent(data=data, event=self._event, id=self._id, retry=self._retry)
+        # The event ID and the retry time persist across events.
+        self._data_lines.clear()
+        self._event = None
+        return event
@@ -0,0 +1,243 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import abc
+import collections
+import hashlib
+import os
+import re
+import threading
+import unicodedata
+from typing import Dict, Final, FrozenSet, Iterable, List, Optional, OrderedDict, Union
+
+__all__ = [
+    "TokenCounter",
+    "ApproxTokenCounter",
+    "VocabTokenCounter",
+    "get_token_counter",
+    "set_token_counter",
+    "count_tokens",
+]
+
+# CJK Unified Ideographs
+_HAN_PATTERN: Final = re.compile(r"[\u4e00-\u9fff]")
+# Runs of word characters other than Han characters
+_WORD_PATTERN: Final = re.compile(r"[^\W\u4e00-\u9fff]+")
+# Runs of word characters, and single characters of other kinds. Han
+# characters are kept apart, as vocabularies usually contain them one by one.
+_PRETOKENIZE_PATTERN: Final = re.compile(r"[^\W\u4e00-\u9fff]+|\S")
+
+
+class TokenCounter(metaclass=abc.ABCMeta):
+    """Counts the tokens of texts.
+
+    Counts of long texts are memoized by the hash of their contents, so that
+    counting the same document again (e.g. each time a prompt is built) is
+    cheap.
+
+    Args:
+        cache_size: Maximum number of memoized counts. Set to 0 to disable
+            memoization.
+    """
+
+    # Texts shorter than this are counted faster than they are hashed.
+    MIN_CACHED_LENGTH: Final[int] = 256
+
+    def __init__(self, *, cache_size: int = 4096) -> None:
+        super().__init__()
+        self.cache_size = cache_size
+        self._cache: OrderedDict[bytes, int] = collections.OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def count(self, text: str) -> int:
+        """Counts the tokens of a text."""
+        if self.cache_size <= 0 or len(text) < self.MIN_CACHED_LENGTH:
+            return self._count(text)
+        key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+        with self._cache_lock:
+            num_tokens = self._cache.get(key, None)
+            if num_tokens is not None:
+                self._cache.move_to_end(key)
+                return num_tokens
+        num_tokens = self._count(text)
+        with self._cache_lock:
+            self._cache[key] = num_tokens
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return num_tokens
+
+    def count_many(self, texts: Iterable[str]) -> List[int]:
+        """Counts the tokens of each of the texts."""
+        return [self.count(text) for text in texts]
+
+    def count_total(self, texts: Iterable[str]) -> int:
+        """Counts the tokens of all the texts together."""
+        return sum(self.count(text) for text in texts)
+
+    def clear_cache(self) -> None:
+        with self._cache_lock:
+            self._cache.clear()
+
+    @abc.abstractmethod
+    def _count(self, text: str) -> int:
+        ...
+
+
+class ApproxTokenCounter(TokenCounter):
+    """Estimates token counts without a vocabulary.
+
+    Every Han character counts as a token, and every other word counts as 1.3
+    tokens. Punctuation does not count.
+    """
+
+    def _count(self, text: str) -> int:
+        num_han = _HAN_PATTERN.subn("", text)[1]
+        num_words = len(_WORD_PATTERN.findall(text))
+        return num_han + int(num_words * 1.3)
+
+
+class VocabTokenCounter(TokenCounter):
+    """Counts tokens by greedy longest-match tokenization against a vocabulary.
+
+    Texts are first split into words, punctuation marks, and single Han
+    characters, and each piece is then matched against the vocabulary from
+    left to right, taking the longest token each time (as in WordPiece).
+    Characters that are not in the vocabulary count as one token each.
+
+    Both WordPiece vocabularies (continuation pieces are prefixed with `##`,
+    as in the vocabularies of ERNIE models) and SentencePiece vocabularies
+    (word-initial pieces are prefixed with `▁`) are supported.
+
+    Args:
+        vocab: Tokens of the vocabulary.
+        continuation_prefix: Prefix of the tokens that continue a word.
+        word_prefix: Prefix of the tokens that start a word.
+        lowercase: Whether to lowercase texts and strip accents before
+            matching.
+        max_token_length: Length of the longest token to try. Defaults to
+            the length of the longest token in the vocabulary.
+        cache_size: Maximum number of memoized counts.
+    """
+
+    def __init__(
+        self,
+        vocab: Iterable[str],
+        *,
+        continuation_prefix: str = "##",
+        word_prefix: str = "",
+        lowercase: bool = True,
+        max_token_length: Optional[int] = None,
+        cache_size: int = 4096,
+    ) -> None:
+        super().__init__(cache_size=cache_size)
+        self.vocab: FrozenSet[str] = frozenset(vocab)
+        self.continuation_prefix = continuation_prefix
+        self.word_prefix = word_prefix
+        self.lowercase = lowercase
+        if max_token_length is None:
+            max_token_length = max(map(len, self.vocab), default=1)
+        self.max_token_length = max_token_length
+        self._word_cache: Dict[str, int] = {}
+
+    @classmethod
+    def from_file(
+        cls, path: Union[str, os.PathLike], *, lowercase: bool = True, cache_size: int = 4096
+    ) -> "VocabTokenCounter":
+        """Loads a vocabulary file with one token per line.
+
+        Anything after a tab on a line (e.g. the scores in a SentencePiece
+        `.vocab` file) is ignored. The prefixes are inferred from the tokens.
+        """
+        vocab = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                token = line.rstrip("\r\n").split("\t", 1)[0]
+                if token:
+                    vocab.append(token)
+        if any(token.startswith("##") for token in vocab):
+            continuation_prefix, word_prefix = "##", ""
+        elif any(token.startswith("▁") for token in vocab):
+            continuation_prefix, word_prefix = "", "▁"
+        else:
+            continuation_prefix, word_prefix = "##", ""
+        return cls(
+            vocab,
+            continuation_prefix=continuation_prefix,
+            word_prefix=word_prefix,
+            lowercase=lowercase,
+            cache_size=cache_size,
+        )
+
+    def _count(self, text: str) -> int:
+        if self.lowercase:
+            text = _strip_accents(text.lower())
+        word_cache = self._word_cache
+        num_tokens = 0
+        for word in _PRETOKENIZE_PATTERN.findall(text):
+            # Natural language repeats words a lot, so their counts are
+            # remembered.
+            n = word_cache.get(word, None)
+            if n is None:
+                n = self._count_word(word)
+                if len(word_cache) >= 65536:
+                    word_cache.clear()
+                word_cache[word] = n
+            num_tokens += n
+        return num_tokens
+
+    def _count_word(self, word: str) -> int:
+        vocab = self.vocab
+        num_tokens = 0
+        start = 0
+        while start < len(word):
+            prefix = self.word_prefix if start == 0 else self.continuation_prefix
+            end = min(len(word), start + self.max_token_length)
+            while end > start + 1 and prefix + word[start:end] not in vocab:
+                end -= 1
+            num_tokens += 1
+            start = end
+        return num_tokens
+
+
+def _strip_accents(text: str) -> str:
+    if text.isascii():
+        return text
+    text = unicodedata.normalize("NFD", text)
+    return "".join(char for char in text if unicodedata.category(char) != "Mn")
+
+
+_counter: TokenCounter = ApproxTokenCounter()
+
+
+def get_token_counter() -> TokenCounter:
+    """Returns the token counter used by the SDK."""
+    return _counter
+
+
+def set_token_counter(counter: TokenCounter) -> None:
+    """Sets the token counter used by the SDK.
+
+    The counter is used wherever the SDK needs to estimate token counts,
+    such as in client-side rate limiting and in batching of embedding
+    requests. By default, `ApproxTokenCounter` is used. For more accurate
+    counts, load the vocabulary of the model with
+    `VocabTokenCounter.from_file`.
+    """
+    global _counter
+    _counter = counter
+
+
+def count_tokens(text: str) -> int:
+    """Counts the tokens of a text with the token counter used by the SDK."""
+    return _counter.count(text)
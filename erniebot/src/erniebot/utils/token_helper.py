@@ -12,28 +12,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import math
-import re
+from .token_counter import get_token_counter
 
 __all__ = ["approx_num_tokens"]
 
 
 def approx_num_tokens(text: str) -> int:
-    """Estimates the number of tokens for a text."""
-    cnt_han = 0
-    cnt_word = 0
+    """Estimates the number of tokens for a text.
 
-    res = []
-    for char in text:
-        if re.match(r"[\u4e00-\u9fff]", char):
-            cnt_han += 1
-            res.append(" ")
-        elif re.match(r"[^\w\s]", char):
-            res.append(" ")
-        else:
-            res.append(char)
-
-    res_text = "".join(res)
-    cnt_word = len(res_text.split())
-
-    return cnt_han + int(math.floor(cnt_word * 1.3))
+    The text is counted with the token counter used by the SDK, which is an
+    `ApproxTokenCounter` unless replaced with
+    `erniebot.utils.token_counter.set_token_counter`.
+    """
+    return get_token_counter().count(text)
@@ -0,0 +1,78 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import threading
+import unittest
+import uuid
+
+from erniebot.api_types import APIType
+from erniebot.auth import AuthTokenManager
+
+
+class _FakeAuthTokenManager(AuthTokenManager):
+    """Issues tokens without a network, and blocks synchronous requests until
+    `release` is set."""
+
+    def __init__(self, cache_key):
+        self._key = cache_key
+        super().__init__(APIType.QIANFAN)
+        self.release = threading.Event()
+        self.sync_started = threading.Event()
+        self.sync_finished = threading.Event()
+        self.num_requests = 0
+
+    def _request_auth_token(self, init):
+        self.num_requests += 1
+        self.sync_started.set()
+        self.release.wait(5)
+        self.sync_finished.set()
+        return "sync-token", 3600.0
+
+    async def _arequest_auth_token(self, init):
+        self.num_requests += 1
+        return "async-token", 3600.0
+
+    def _get_cache_key(self):
+        return self._key
+
+
+class TestAuthTokenManager(unittest.TestCase):
+    def setUp(self):
+        self.manager = _FakeAuthTokenManager(("ak", "sk", uuid.uuid4().hex))
+
+    def test_async_update_does_not_wait_for_sync_request(self):
+        thread = threading.Thread(target=self.manager.update_auth_token)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(self.manager.release.set)
+        self.assertTrue(self.manager.sync_started.wait(5))
+
+        async def _update():
+            token = await self.manager.aupdate_auth_token()
+            # The synchronous request must still be in flight.
+            self.assertFalse(self.manager.sync_finished.is_set())
+            return token
+
+        self.assertEqual(asyncio.run(_update()), "async-token")
+
+    def test_sync_updates_share_request(self):
+        self.manager.release.set()
+        threads = [threading.Thread(target=self.manager.get_auth_token) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.manager.num_requests, 1)
+        self.assertEqual(self.manager.get_auth_token(), "sync-token")
@@ -0,0 +1,129 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import unittest
+from unittest import mock
+
+from _utils import Clock
+
+import erniebot
+import erniebot.errors as errors
+from erniebot.circuit_breaker import CircuitBreaker, CircuitState, RetryBudget
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        patcher = mock.patch("erniebot.circuit_breaker.time.monotonic", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+
+    def _fail(self, error=None):
+        self.breaker.before_request()
+        self.breaker.record(error or errors.ConnectionError())
+
+    def test_opens_after_consecutive_failures(self):
+        for _ in range(2):
+            self._fail()
+        self.assertIs(self.breaker.state, CircuitState.CLOSED)
+        self._fail(errors.TimeoutError())
+        self.assertIs(self.breaker.state, CircuitState.OPEN)
+        with self.assertRaises(errors.CircuitOpenError):
+            self.breaker.before_request()
+
+    def test_success_resets_failure_count(self):
+        for _ in range(2):
+            self._fail()
+        self.breaker.before_request()
+        self.breaker.record()
+        for _ in range(2):
+            self._fail()
+        self.assertIs(self.breaker.state, CircuitState.CLOSED)
+
+    def test_rate_limit_and_bad_request_are_not_failures(self):
+        for _ in range(10):
+            self._fail(errors.RateLimitError())
+            self._fail(errors.BadRequestError())
+        self.assertIs(self.breaker.state, CircuitState.CLOSED)
+
+    def test_cancellation_is_not_an_outcome(self):
+        for _ in range(2):
+            self._fail()
+        self.breaker.before_request()
+        self.breaker.record(asyncio.CancelledError())
+        self._fail()
+        self.assertIs(self.breaker.state, CircuitState.OPEN)
+
+    def test_half_open_probe_success_closes(self):
+        for _ in range(3):
+            self._fail()
+        self.clock.now += 30
+        self.assertIs(self.breaker.state, CircuitState.HALF_OPEN)
+        self.breaker.before_request()
+        # Only a single probe is let through.
+        with self.assertRaises(errors.CircuitOpenError):
+            self.breaker.before_request()
+        self.breaker.record()
+        self.assertIs(self.breaker.state, CircuitState.CLOSED)
+        self.breaker.before_request()
+
+    def test_half_open_probe_failure_reopens(self):
+        for _ in range(3):
+            self._fail()
+        self.clock.now += 30
+        self._fail()
+        self.assertIs(self.breaker.state, CircuitState.OPEN)
+        self.clock.now += 29
+        with self.assertRaises(errors.CircuitOpenError):
+            self.breaker.before_request()
+
+    def test_disabled_by_default(self):
+        self.assertEqual(erniebot.GlobalConfig().get_value("circuit_breaker_threshold"), 0)
+
+
+class TestRetryBudget(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        patcher = mock.patch("erniebot.circuit_breaker.time.monotonic", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_retries_are_capped_by_ratio(self):
+        budget = RetryBudget(ratio=0.1, min_retries_per_sec=0, window=10)
+        for _ in range(100):
+            budget.record_request()
+        self.assertEqual(sum(budget.try_withdraw() for _ in range(20)), 10)
+
+    def test_min_retries_per_sec(self):
+        budget = RetryBudget(ratio=0, min_retries_per_sec=1, window=10)
+        self.assertEqual(sum(budget.try_withdraw() for _ in range(20)), 10)
+
+    def test_window_slides(self):
+        budget = RetryBudget(ratio=0, min_retries_per_sec=0.1, window=10)
+        self.assertTrue(budget.try_withdraw())
+        self.assertFalse(budget.try_withdraw())
+        self.clock.now += 10
+        self.assertTrue(budget.try_withdraw())
+
+    def test_resource_budget(self):
+        config = dict(api_type="aistudio", access_token="access_token")
+        self.assertIsNotNone(erniebot.ChatCompletion(**config)._retry_budget)
+        # A ratio of 0, which can be set from the environment, disables the
+        # budget.
+        for ratio in (0, None):
+            with self.subTest(ratio=ratio):
+                resource = erniebot.ChatCompletion(**config, retry_budget_ratio=ratio)
+                self.assertIsNone(resource._retry_budget)
@@ -0,0 +1,197 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import erniebot
+from erniebot.coalescing import RequestCoalescer
+from erniebot.resources.resource import EBResource
+from erniebot.response import EBResponse
+
+
+class TestRequestCoalescer(unittest.TestCase):
+    def test_call(self):
+        coalescer = RequestCoalescer()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def _func():
+            calls.append(None)
+            started.set()
+            release.wait()
+            return "result"
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            leader = executor.submit(coalescer.call, "key", _func)
+            started.wait()
+            follower = executor.submit(coalescer.call, "key", _func)
+            while coalescer.hits == 0:
+                time.sleep(0.001)
+            release.set()
+            self.assertEqual((leader.result(), follower.result()), ("result", "result"))
+        self.assertEqual((len(calls), coalescer.hits, coalescer.misses, coalescer.in_flight), (1, 1, 1, 0))
+        # Results are not kept after the call completes.
+        coalescer.call("key", _func)
+        self.assertEqual(len(calls), 2)
+
+    def test_copy_result(self):
+        coalescer = RequestCoalescer()
+        result = {"value": 1}
+        self.assertIs(coalescer.call("key", lambda: result, copy_result=dict), result)
+
+        started = threading.Event()
+        release = threading.Event()
+
+        def _func():
+            started.set()
+            release.wait()
+            return result
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            leader = executor.submit(coalescer.call, "key", _func, dict)
+            started.wait()
+            follower = executor.submit(coalescer.call, "key", _func, dict)
+            while coalescer.hits == 0:
+                time.sleep(0.001)
+            release.set()
+            results = [leader.result(), follower.result()]
+        self.assertEqual(results, [result, result])
+        self.assertTrue(all(r is not result for r in results))
+        self.assertIsNot(results[0], results[1])
+
+    def test_call_error(self):
+        coalescer = RequestCoalescer()
+        with self.assertRaises(ValueError):
+            coalescer.call("key", _raise_value_error)
+        self.assertEqual(coalescer.in_flight, 0)
+
+
+class TestAsyncRequestCoalescer(unittest.IsolatedAsyncioTestCase):
+    async def test_acall(self):
+        coalescer = RequestCoalescer()
+        release = asyncio.Event()
+        calls = []
+
+        async def _func():
+            calls.append(None)
+            await release.wait()
+            return "result"
+
+        waiters = [asyncio.create_task(coalescer.acall("key", _func)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        self.assertEqual(await asyncio.gather(*waiters), ["result"] * 3)
+        self.assertEqual((len(calls), coalescer.hits, coalescer.misses, coalescer.in_flight), (1, 2, 1, 0))
+
+    async def test_copy_result(self):
+        coalescer = RequestCoalescer()
+        release = asyncio.Event()
+        result = {"value": 1}
+
+        async def _func():
+            await release.wait()
+            return result
+
+        waiters = [asyncio.create_task(coalescer.acall("key", _func, copy_result=dict)) for _ in range(2)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters)
+        self.assertEqual(results, [result, result])
+        self.assertTrue(all(r is not result for r in results))
+        self.assertIsNot(results[0], results[1])
+
+    async def test_cancelled_waiter(self):
+        coalescer = RequestCoalescer()
+        release = asyncio.Event()
+
+        async def _func():
+            await release.wait()
+            return "result"
+
+        leader = asyncio.create_task(coalescer.acall("key", _func))
+        follower = asyncio.create_task(coalescer.acall("key", _func))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        self.assertEqual(await follower, "result")
+        self.assertTrue(leader.cancelled())
+
+    async def test_all_waiters_cancelled(self):
+        coalescer = RequestCoalescer()
+        cancelled = asyncio.Event()
+
+        async def _func():
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        waiter = asyncio.create_task(coalescer.acall("key", _func))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+        await asyncio.sleep(0)
+        self.assertEqual(coalescer.in_flight, 0)
+
+
+class TestResourceCoalescing(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.release = asyncio.Event()
+        self.num_requests = 0
+
+        async def _fake_request(*args, **kwargs):
+            self.num_requests += 1
+            await self.release.wait()
+            return EBResponse(200, {"id": "1", "result": "hello"}, {})
+
+        patcher = mock.patch.object(EBResource, "_arequest_with_retries", side_effect=_fake_request)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def _gather(self, coros):
+        tasks = [asyncio.create_task(coro) for coro in coros]
+        await asyncio.sleep(0)
+        self.release.set()
+        return await asyncio.gather(*tasks)
+
+    async def test_chat_completion_is_coalesced(self):
+        config = dict(api_type="aistudio", access_token="token", coalesce_requests=True)
+        resps = await self._gather(
+            erniebot.ChatCompletion.acreate(
+                model="ernie-3.5", messages=[{"role": "user", "content": "hi"}], _config_=config
+            )
+            for _ in range(2)
+        )
+        self.assertEqual(self.num_requests, 1)
+        resps[0].rbody["result"] = "MUTATED"
+        self.assertEqual(resps[1].get_result(), "hello")
+
+    async def test_fine_tuning_task_is_not_coalesced(self):
+        config = dict(api_type="qianfan_sft", ak="ak", sk="sk", coalesce_requests=True)
+        await self._gather(
+            erniebot.FineTuningTask.acreate(name="task", description="", _config_=config) for _ in range(2)
+        )
+        self.assertEqual(self.num_requests, 2)
+
+
+def _raise_value_error():
+    raise ValueError
@@ -0,0 +1,99 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import gc
+import unittest
+from unittest import mock
+
+import erniebot
+import erniebot.errors as errors
+from erniebot.backends.aistudio import AIStudioBackend
+from erniebot.concurrency_limiter import AdaptiveConcurrencyLimiter
+from erniebot.response import EBResponse
+
+_CONFIG = dict(api_type="aistudio", access_token="access_token", adaptive_concurrency=True)
+
+
+class TestAdaptiveConcurrencyLimiter(unittest.IsolatedAsyncioTestCase):
+    async def test_waiters_are_woken_up_in_order(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=1)
+        permit = await limiter.acquire()
+        order = []
+
+        async def _acquire(i):
+            limiter.release(await limiter.acquire())
+            order.append(i)
+
+        waiters = [asyncio.create_task(_acquire(i)) for i in range(3)]
+        await asyncio.sleep(0)
+        self.assertEqual(limiter.queue_depth, 3)
+        limiter.release(permit)
+        await asyncio.gather(*waiters)
+        self.assertEqual(order, [0, 1, 2])
+        self.assertEqual(limiter.in_flight, 0)
+
+    async def test_backoff_on_overload(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8, max_limit=16)
+        permits = [await limiter.acquire() for _ in range(2)]
+        limiter.release(permits[0], error=errors.RateLimitError())
+        self.assertEqual(limiter.limit, 4)
+        # A request sent before the backoff does not trigger another one.
+        limiter.release(permits[1], error=errors.RateLimitError())
+        self.assertEqual(limiter.limit, 4)
+        limiter.release(permits[1], error=errors.RateLimitError())
+        self.assertEqual(limiter.in_flight, 0)
+
+
+class TestStreamPermit(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.num_chunks = 3
+
+        async def _fake_arequest(backend, method, path, stream, **kwargs):
+            async def _stream():
+                for i in range(self.num_chunks):
+                    yield EBResponse(200, {"id": "1", "result": str(i)}, {})
+
+            return _stream()
+
+        patcher = mock.patch.object(AIStudioBackend, "arequest", _fake_arequest)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.limiter = erniebot.ChatCompletion(**_CONFIG)._get_concurrency_limiter()
+
+    async def _create_stream(self):
+        return await erniebot.ChatCompletion.acreate(
+            model="ernie-3.5", messages=[{"role": "user", "content": "hi"}], stream=True, _config_=_CONFIG
+        )
+
+    async def test_released_when_exhausted(self):
+        stream = await self._create_stream()
+        self.assertEqual(self.limiter.in_flight, 1)
+        self.assertEqual([chunk.result async for chunk in stream], ["0", "1", "2"])
+        self.assertEqual(self.limiter.in_flight, 0)
+
+    async def test_released_when_closed(self):
+        stream = await self._create_stream()
+        await stream.__anext__()
+        await stream.aclose()
+        await asyncio.sleep(0)
+        self.assertEqual(self.limiter.in_flight, 0)
+
+    async def test_released_when_never_iterated(self):
+        stream = await self._create_stream()
+        self.assertEqual(self.limiter.in_flight, 1)
+        del stream
+        gc.collect()
+        await asyncio.sleep(0)
+        self.assertEqual(self.limiter.in_flight, 0)
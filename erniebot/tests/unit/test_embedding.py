@@ -0,0 +1,101 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import pickle
+import unittest
+from unittest import mock
+
+import erniebot.errors as errors
+from erniebot.resources import embedding
+from erniebot.resources.embedding import (
+    Embedding,
+    EmbeddingArrayResponse,
+    EmbeddingResponse,
+)
+
+# Not representable as float32.
+_PRECISE_VALUE = 0.1234567890123
+
+
+def _fake_create(model, input, *, as_array=False, **kwargs):
+    rbody = {
+        "object": "embedding_list",
+        "data": [
+            {"object": "embedding", "embedding": [_PRECISE_VALUE, float(len(text))], "index": i}
+            for i, text in enumerate(input)
+        ],
+    }
+    response_type = EmbeddingArrayResponse if as_array else EmbeddingResponse
+    return response_type(200, rbody, {})
+
+
+async def _fake_acreate(*args, **kwargs):
+    return _fake_create(*args, **kwargs)
+
+
+class TestCreateMany(unittest.TestCase):
+    def setUp(self):
+        for name, fake in (("create", _fake_create), ("acreate", _fake_acreate)):
+            patcher = mock.patch.object(Embedding, name, side_effect=fake)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.texts = ["a" * i for i in range(1, 8)]
+
+    def test_full_precision_without_array(self):
+        embeddings = Embedding.create_many("ernie-text-embedding", self.texts, batch_size=3, as_array=False)
+        self.assertIsInstance(embeddings, list)
+        self.assertEqual(embeddings, [[_PRECISE_VALUE, float(i)] for i in range(1, 8)])
+
+    @unittest.skipIf(embedding.np is None, "NumPy is not installed")
+    def test_float32_matrix(self):
+        embeddings = Embedding.create_many("ernie-text-embedding", self.texts, batch_size=3)
+        self.assertEqual(embeddings.shape, (7, 2))
+        self.assertEqual(str(embeddings.dtype), "float32")
+        self.assertEqual(embeddings[:, 1].tolist(), [float(i) for i in range(1, 8)])
+
+    def test_async_full_precision_without_array(self):
+        embeddings = asyncio.run(
+            Embedding.acreate_many("ernie-text-embedding", self.texts, batch_size=3, as_array=False)
+        )
+        self.assertEqual(embeddings, [[_PRECISE_VALUE, float(i)] for i in range(1, 8)])
+
+
+class TestEmbeddingArrayResponse(unittest.TestCase):
+    def _make_response(self, embeddings):
+        rbody = {
+            "object": "embedding_list",
+            "data": [
+                {"object": "embedding", "embedding": emb, "index": i}
+                for i, emb in reversed(list(enumerate(embeddings)))
+            ],
+        }
+        return EmbeddingArrayResponse(200, rbody, {})
+
+    def test_rows_are_views(self):
+        resp = self._make_response([[0.5, 1.0], [1.5, 2.0]])
+        result = resp.get_result()
+        self.assertEqual([list(row) for row in result], [[0.5, 1.0], [1.5, 2.0]])
+        self.assertEqual([item["index"] for item in resp.data], [0, 1])
+        if embedding.np is not None:
+            self.assertEqual(result.shape, (2, 2))
+            self.assertTrue(embedding.np.shares_memory(resp.data[1]["embedding"], result))
+
+    def test_pickle(self):
+        resp = pickle.loads(pickle.dumps(self._make_response([[0.5, 1.0], [1.5, 2.0]])))
+        self.assertEqual([list(row) for row in resp.get_result()], [[0.5, 1.0], [1.5, 2.0]])
+
+    def test_different_dimensions(self):
+        with self.assertRaises(errors.HTTPRequestError):
+            self._make_response([[0.5, 1.0], [1.5]])
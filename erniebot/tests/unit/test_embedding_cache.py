@@ -0,0 +1,99 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import tempfile
+import unittest
+from unittest import mock
+
+from _utils import Clock
+
+from erniebot.caching import EmbeddingCache
+
+
+class TestEmbeddingCache(unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp_dir.cleanup)
+        self.clock = Clock()
+        patcher = mock.patch("erniebot.caching.embedding_cache.time.time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _create_cache(self, **kwargs):
+        cache = EmbeddingCache(self._tmp_dir.name, **kwargs)
+        self.addCleanup(cache.close)
+        return cache
+
+    def _trace_statements(self, cache):
+        statements = []
+        cache._conn.set_trace_callback(statements.append)
+        return statements
+
+    def test_get_and_put(self):
+        cache = self._create_cache()
+        self.assertEqual(cache.get_many("model", ["a"]), [None])
+        cache.put_many("model", ["a", "b", "a"], [[0.5, 1.0], [1.5, 2.0], [0.5, 1.0]])
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get_many("model", ["b", "c", "a"]), [[1.5, 2.0], None, [0.5, 1.0]])
+        self.assertEqual(cache.get_many("other_model", ["a"]), [None])
+
+    def test_shared_between_instances(self):
+        self._create_cache().put_many("model", ["a"], [[0.5, 1.0]])
+        self.assertEqual(self._create_cache().get_many("model", ["a"]), [[0.5, 1.0]])
+
+    def test_dimension_mismatch(self):
+        cache = self._create_cache()
+        cache.put_many("model", ["a"], [[0.5, 1.0]])
+        with self.assertRaises(ValueError):
+            cache.put_many("model", ["b"], [[0.5, 1.0, 1.5]])
+        self.assertEqual(cache.get_many("model", ["b"]), [None])
+
+    def test_least_recently_used_is_evicted(self):
+        cache = self._create_cache(max_entries=2)
+        cache.put_many("model", ["a", "b"], [[0.0], [1.0]])
+        self.clock.now += EmbeddingCache.ACCESS_TIME_RESOLUTION_SECS + 1
+        cache.get_many("model", ["a"])
+        self.clock.now += 1
+        cache.put_many("model", ["c"], [[2.0]])
+        self.assertEqual(cache.get_many("model", ["a", "b", "c"]), [[0.0], None, [2.0]])
+
+    def test_freed_slot_is_reused_after_delay(self):
+        cache = self._create_cache(max_entries=1)
+        cache.put_many("model", ["a"], [[0.0]])
+        cache.put_many("model", ["b"], [[1.0]])
+        self.clock.now += EmbeddingCache.SLOT_REUSE_DELAY_SECS
+        cache.put_many("model", ["c"], [[2.0]])
+        num_slots = cache._conn.execute("SELECT num_slots FROM models").fetchone()[0]
+        self.assertEqual(num_slots, 2)
+        self.assertEqual(cache.get_many("model", ["a", "b", "c"]), [None, None, [2.0]])
+
+    def test_access_times_are_updated_in_one_transaction(self):
+        cache = self._create_cache()
+        texts = [str(i) for i in range(10)]
+        cache.put_many("model", texts, [[float(i)] for i in range(10)])
+        self.clock.now += EmbeddingCache.ACCESS_TIME_RESOLUTION_SECS + 1
+        statements = self._trace_statements(cache)
+        cache.get_many("model", texts)
+        self.assertEqual(statements.count("BEGIN IMMEDIATE"), 1)
+        self.assertEqual(statements.count("COMMIT"), 1)
+        accessed_at = cache._conn.execute("SELECT DISTINCT accessed_at FROM entries").fetchall()
+        self.assertEqual(accessed_at, [(self.clock.now,)])
+
+    def test_recent_access_times_are_not_updated(self):
+        cache = self._create_cache()
+        cache.put_many("model", ["a"], [[0.0]])
+        self.clock.now += 1
+        statements = self._trace_statements(cache)
+        cache.get_many("model", ["a"])
+        self.assertFalse([s for s in statements if s.startswith(("BEGIN", "UPDATE"))])
@@ -0,0 +1,110 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import unittest
+from unittest import mock
+
+from _utils import Clock
+
+import erniebot.errors as errors
+from erniebot.polling import TaskPoller
+from erniebot.resources.fine_tuning import FineTuningJob
+from erniebot.response import EBResponse
+
+_CONFIG = dict(api_type="qianfan_sft", ak="ak", sk="sk")
+
+
+class _JobStatuses(object):
+    """Returns the given training statuses in order, repeating the last one."""
+
+    def __init__(self, statuses):
+        super().__init__()
+        self._statuses = statuses
+        self.num_queries = 0
+
+    def _next(self, path, params):
+        assert path == "/finetune/jobDetail"
+        assert params == {"taskId": 1, "jobId": 2}
+        status = self._statuses[min(self.num_queries, len(self._statuses) - 1)]
+        self.num_queries += 1
+        return EBResponse(200, {"result": {"taskId": 1, "jobId": 2, "trainStatus": status}}, {})
+
+    def request(self, *, method, path, stream, params, headers, request_timeout):
+        return self._next(path, params)
+
+    async def arequest(self, *, method, path, stream, params, headers, request_timeout):
+        return self._next(path, params)
+
+
+class TestFineTuningJobWaitUntilDone(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+
+        def _sleep(secs):
+            self.clock.now += secs
+
+        for target, new in (
+            ("erniebot.polling.time.monotonic", self.clock),
+            ("erniebot.polling.time.sleep", _sleep),
+        ):
+            patcher = mock.patch(target, new)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _wait_until_done(self, statuses, **kwargs):
+        job = _JobStatuses(statuses)
+        with mock.patch.object(FineTuningJob, "request", side_effect=job.request):
+            resp = FineTuningJob.wait_until_done(task_id=1, job_id=2, _config_=_CONFIG, **kwargs)
+        return resp, job.num_queries
+
+    def test_terminal_statuses(self):
+        for status in ("FINISH", "FAIL", "STOP"):
+            with self.subTest(status=status):
+                resp, num_queries = self._wait_until_done(["RUNNING", status])
+                self.assertEqual(resp.result["trainStatus"], status)
+                self.assertEqual(num_queries, 2)
+
+    def test_non_terminal_statuses(self):
+        # Jobs that have not started yet are waited for as well.
+        resp, num_queries = self._wait_until_done(["QUEUE", "NEW", "RUNNING", "FINISH"])
+        self.assertEqual(resp.result["trainStatus"], "FINISH")
+        self.assertEqual(num_queries, 4)
+
+    def test_timeout(self):
+        with self.assertRaises(errors.TimeoutError):
+            self._wait_until_done(["RUNNING"], timeout=60)
+        self.assertGreaterEqual(self.clock.now, 1060)
+
+
+class TestFineTuningJobAwaitUntilDone(unittest.IsolatedAsyncioTestCase):
+    async def _await_until_done(self, statuses, **kwargs):
+        job = _JobStatuses(statuses)
+        poller = TaskPoller(min_interval=0.001, max_interval=0.004)
+        with mock.patch.object(FineTuningJob, "arequest", side_effect=job.arequest), mock.patch(
+            "erniebot.resources.fine_tuning.get_task_poller", return_value=poller
+        ):
+            resp = await FineTuningJob.await_until_done(task_id=1, job_id=2, _config_=_CONFIG, **kwargs)
+        return resp, job.num_queries
+
+    async def test_terminal_statuses(self):
+        for status in ("FINISH", "FAIL", "STOP"):
+            with self.subTest(status=status):
+                resp, num_queries = await self._await_until_done(["QUEUE", "RUNNING", status])
+                self.assertEqual(resp.result["trainStatus"], status)
+                self.assertEqual(num_queries, 3)
+
+    async def test_timeout(self):
+        with self.assertRaises(errors.TimeoutError):
+            await self._await_until_done(["RUNNING"], timeout=0.02)
@@ -0,0 +1,89 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import unittest
+
+from erniebot.hedging import hedge
+
+
+class TestHedge(unittest.IsolatedAsyncioTestCase):
+    async def test_no_hedge_when_fast(self):
+        calls = []
+
+        async def _attempt():
+            calls.append(None)
+            return "result"
+
+        self.assertEqual(await hedge(_attempt, 1.0, may_hedge=lambda: True), "result")
+        self.assertEqual(len(calls), 1)
+
+    async def test_hedged_attempt_wins(self):
+        attempts = iter([10.0, 0.0])
+        discarded = []
+
+        async def _attempt():
+            await asyncio.sleep(next(attempts))
+            return "result"
+
+        async def _discard(result):
+            discarded.append(result)
+
+        result = await hedge(_attempt, 0.01, may_hedge=lambda: True, discard=_discard)
+        self.assertEqual(result, "result")
+        self.assertEqual(discarded, [])
+
+    async def test_loser_completing_on_cancellation_is_discarded(self):
+        attempts = iter(["slow", "fast"])
+        discarded = []
+
+        async def _attempt():
+            name = next(attempts)
+            if name == "fast":
+                return name
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                # The attempt completed before the cancellation took effect.
+                return "late"
+            return name
+
+        async def _discard(result):
+            discarded.append(result)
+
+        result = await hedge(_attempt, 0.01, may_hedge=lambda: True, discard=_discard)
+        self.assertEqual(result, "fast")
+        self.assertEqual(discarded, ["late"])
+
+    async def test_may_hedge_false(self):
+        calls = []
+
+        async def _attempt():
+            calls.append(None)
+            await asyncio.sleep(0.05)
+            return "result"
+
+        self.assertEqual(await hedge(_attempt, 0.01, may_hedge=lambda: False), "result")
+        self.assertEqual(len(calls), 1)
+
+    async def test_error_of_primary_is_raised(self):
+        attempts = iter([ValueError("primary"), KeyError("hedged")])
+
+        async def _attempt():
+            error = next(attempts)
+            await asyncio.sleep(0.02 if isinstance(error, ValueError) else 0.03)
+            raise error
+
+        with self.assertRaisesRegex(ValueError, "primary"):
+            await hedge(_attempt, 0.01, may_hedge=lambda: True)
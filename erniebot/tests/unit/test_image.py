@@ -0,0 +1,115 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import asyncio
+import unittest
+from unittest import mock
+
+import erniebot.errors as errors
+from erniebot.polling import TaskPoller
+from erniebot.resources.image import ImageV2, ImageV2Response
+from erniebot.response import EBResponse
+
+
+class TestImageV2CreateMany(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        # Statuses returned by the successive fetches of each task
+        self.schedules = {}
+        self.num_fetches = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+        poller = TaskPoller(min_interval=0.001, max_interval=0.004)
+        for patcher in (
+            mock.patch.object(ImageV2, "arequest", side_effect=self._fake_arequest),
+            mock.patch("erniebot.resources.image.get_task_poller", return_value=poller),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def _fake_arequest(self, *, method, path, stream, params, headers, request_timeout):
+        if path == "/txt2imgv2":
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            await asyncio.sleep(0.001)
+            self.in_flight -= 1
+            task_id = params["prompt"]
+            self.num_fetches[task_id] = 0
+            return EBResponse(200, {"data": {"task_id": task_id}}, {})
+        elif path == "/getImgv2":
+            task_id = params["task_id"]
+            schedule = self.schedules[task_id]
+            status = schedule[min(self.num_fetches[task_id], len(schedule) - 1)]
+            self.num_fetches[task_id] += 1
+            return EBResponse(
+                200,
+                {
+                    "data": {
+                        "task_id": task_id,
+                        "task_status": status,
+                        "sub_task_result_list": [
+                            {
+                                "final_image_list": [
+                                    {"img_approve_conclusion": "pass", "img_url": f"https://{task_id}"}
+                                ]
+                            }
+                        ],
+                    }
+                },
+                {},
+            )
+        else:
+            raise AssertionError(f"Unexpected path: {path}")
+
+    async def _create_many(self, prompts, **kwargs):
+        return await ImageV2.acreate_many(
+            model="ernie-vilg-v2",
+            prompts=prompts,
+            width=512,
+            height=512,
+            _config_=dict(api_type="yinian", ak="ak", sk="sk"),
+            **kwargs,
+        )
+
+    async def test_acreate_many(self):
+        self.schedules = {
+            "a": ["RUNNING", "RUNNING", "RUNNING", "SUCCESS"],
+            "b": ["INIT", "SUCCESS"],
+            "c": ["SUCCESS"],
+            "d": ["RUNNING", "SUCCESS"],
+        }
+        resps = await self._create_many(list(self.schedules), max_concurrency=2)
+        # Responses are in the order of the prompts, regardless of the order
+        # in which the tasks complete.
+        self.assertTrue(all(isinstance(resp, ImageV2Response) for resp in resps))
+        self.assertEqual([resp.get_result() for resp in resps], [[f"https://{p}"] for p in "abcd"])
+        self.assertEqual(self.num_fetches, {"a": 4, "b": 2, "c": 1, "d": 2})
+        self.assertEqual(self.max_in_flight, 2)
+
+    async def test_empty(self):
+        self.assertEqual(await self._create_many([]), [])
+
+    async def test_invalid_max_concurrency(self):
+        with self.assertRaises(ValueError):
+            await self._create_many(["a"], max_concurrency=0)
+
+    async def test_failed_task_cancels_others(self):
+        self.schedules = {"a": ["RUNNING", "FAILED"], "b": ["RUNNING"]}
+        with self.assertRaises(errors.APIError):
+            await self._create_many(list(self.schedules))
+        num_fetches = self.num_fetches["b"]
+        await asyncio.sleep(0.05)
+        # The abandoned task is no longer polled.
+        self.assertEqual(self.num_fetches["b"], num_fetches)
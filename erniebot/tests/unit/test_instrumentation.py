@@ -0,0 +1,505 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import gc
+import json
+import unittest
+import urllib.request
+from unittest import mock
+
+import erniebot
+import erniebot.errors as errors
+from erniebot.hedging import LatencyTracker
+from erniebot.http_client import AsyncTransportResponse, Transport, TransportResponse
+from erniebot.instrumentation import (
+    Histogram,
+    MetricsCollector,
+    RequestHooks,
+    SpanEmitter,
+    start_prometheus_server,
+)
+
+try:
+    import opentelemetry
+except ImportError:
+    opentelemetry = None
+
+_USAGE = {"prompt_tokens": 3, "completion_tokens": 5, "total_tokens": 8}
+
+
+def _wrap(result):
+    # The envelope of AI Studio responses
+    return {"errorCode": 0, "errorMsg": "success", "result": result}
+
+
+class _FakeResponse(object):
+    """A scripted response of `_FakeTransport`."""
+
+    def __init__(self, body=None, *, chunks=None, status_code=200, delay=0.0, read_delay=0.0, error=None):
+        super().__init__()
+        self.status_code = status_code
+        if chunks is not None:
+            self.headers = {"Content-Type": "text/event-stream"}
+            self.chunks = [f"data: {json.dumps(_wrap(chunk))}\n\n".encode("utf-8") for chunk in chunks]
+        else:
+            body = body or {}
+            self.headers = {"Content-Type": "application/json"}
+            self.chunks = [json.dumps(body if "errorCode" in body else _wrap(body)).encode("utf-8")]
+        self.delay = delay
+        self.read_delay = read_delay
+        self.error = error
+        self.closed = False
+
+    @property
+    def num_bytes(self):
+        return sum(map(len, self.chunks))
+
+
+class _SyncResponse(TransportResponse):
+    def __init__(self, fake):
+        super().__init__()
+        self.status_code = fake.status_code
+        self.headers = fake.headers
+        self._fake = fake
+
+    def read(self):
+        return b"".join(self._fake.chunks)
+
+    def iter_bytes(self):
+        yield from self._fake.chunks
+
+    def close(self):
+        self._fake.closed = True
+
+
+class _AsyncResponse(AsyncTransportResponse):
+    def __init__(self, fake):
+        super().__init__()
+        self.status_code = fake.status_code
+        self.headers = fake.headers
+        self._fake = fake
+
+    async def read(self):
+        await asyncio.sleep(self._fake.read_delay)
+        return b"".join(self._fake.chunks)
+
+    async def aiter_bytes(self):
+        await asyncio.sleep(self._fake.read_delay)
+        for chunk in self._fake.chunks:
+            yield chunk
+
+    async def aclose(self):
+        self._fake.closed = True
+
+
+class _FakeTransport(Transport):
+    """Serves scripted responses in order, and records the requests."""
+
+    def __init__(self, responses):
+        super().__init__()
+        self.responses = list(responses)
+        self.requests = []
+
+    def send(self, method, url, *, headers, data, stream, timeout):
+        fake = self._next(data)
+        if fake.error is not None:
+            raise fake.error
+        return _SyncResponse(fake)
+
+    async def asend(self, method, url, *, headers, data, stream, timeout):
+        fake = self._next(data)
+        await asyncio.sleep(fake.delay)
+        if fake.error is not None:
+            raise fake.error
+        return _AsyncResponse(fake)
+
+    def _next(self, data):
+        self.requests.append(data)
+        return self.responses.pop(0)
+
+
+class _RecordingHooks(RequestHooks):
+    def __init__(self):
+        super().__init__()
+        self.events = []
+        self.contexts = []
+
+    def on_request_start(self, ctx):
+        self.events.append("start")
+        self.contexts.append(ctx)
+
+    def on_headers(self, ctx, status_code, headers):
+        self.events.append(("headers", status_code))
+
+    def on_first_chunk(self, ctx, chunk):
+        self.events.append("first_chunk")
+
+    def on_chunk(self, ctx, chunk, num_bytes):
+        self.events.append(("chunk", num_bytes))
+
+    def on_retry(self, ctx, error, delay):
+        self.events.append(("retry", type(error).__name__, ctx.attempt))
+
+    def on_request_end(self, ctx, response, error):
+        self.events.append(("end", None if error is None else type(error).__name__))
+
+
+class _FailingHooks(RequestHooks):
+    def on_request_start(self, ctx):
+        raise RuntimeError("broken hook")
+
+
+def _chat_kwargs(transport, hooks, **config):
+    return dict(
+        model="ernie-3.5",
+        messages=[{"role": "user", "content": "你好"}],
+        _config_=dict(
+            api_type="aistudio",
+            access_token="access_token",
+            transport=transport,
+            request_hooks=hooks,
+            **config,
+        ),
+    )
+
+
+class TestRequestHooks(unittest.TestCase):
+    def test_events_of_request(self):
+        hooks = _RecordingHooks()
+        fake = _FakeResponse({"id": "1", "result": "hi", "usage": _USAGE})
+        transport = _FakeTransport([fake])
+        resp = erniebot.ChatCompletion.create(**_chat_kwargs(transport, [_FailingHooks(), hooks]))
+        self.assertEqual(resp.result, "hi")
+        self.assertEqual(hooks.events, ["start", ("headers", 200), ("end", None)])
+        ctx = hooks.contexts[0]
+        self.assertEqual((ctx.api_type, ctx.model, ctx.stream), ("aistudio", "ernie-3.5", False))
+        self.assertEqual(ctx.bytes_sent, len(transport.requests[0]))
+        self.assertEqual(ctx.bytes_received, fake.num_bytes)
+        self.assertEqual(ctx.usage, _USAGE)
+        self.assertIsNotNone(ctx.duration)
+
+    def test_events_of_stream(self):
+        hooks = _RecordingHooks()
+        fake = _FakeResponse(
+            chunks=[
+                {"id": "1", "result": "你", "is_end": False},
+                {"id": "1", "result": "好", "is_end": True, "usage": _USAGE},
+            ]
+        )
+        transport = _FakeTransport([fake])
+        stream = erniebot.ChatCompletion.create(stream=True, **_chat_kwargs(transport, [hooks]))
+        self.assertEqual(hooks.events, ["start", ("headers", 200)])
+        self.assertEqual("".join(chunk.result for chunk in stream), "你好")
+        chunk_sizes = [len(chunk) - len("data: \n\n") for chunk in fake.chunks]
+        self.assertEqual(
+            hooks.events[2:],
+            ["first_chunk", ("chunk", chunk_sizes[0]), ("chunk", chunk_sizes[1]), ("end", None)],
+        )
+        ctx = hooks.contexts[0]
+        self.assertEqual(ctx.num_chunks, 2)
+        self.assertEqual(ctx.usage, _USAGE)
+        self.assertIsNotNone(ctx.time_to_first_chunk)
+
+    def test_end_of_stream_that_is_never_iterated(self):
+        hooks = _RecordingHooks()
+        transport = _FakeTransport([_FakeResponse(chunks=[{"id": "1", "result": "你", "is_end": True}])])
+        stream = erniebot.ChatCompletion.create(stream=True, **_chat_kwargs(transport, [hooks]))
+        del stream
+        gc.collect()
+        self.assertEqual(hooks.events, ["start", ("headers", 200), ("end", None)])
+
+    def test_events_of_retry(self):
+        hooks = _RecordingHooks()
+        transport = _FakeTransport(
+            [
+                _FakeResponse(error=errors.TimeoutError("timed out")),
+                _FakeResponse({"id": "1", "result": "hi"}),
+            ]
+        )
+        erniebot.ChatCompletion.create(
+            **_chat_kwargs(transport, [hooks], max_retries=1, min_retry_delay=0.01, max_retry_delay=0.01)
+        )
+        self.assertEqual(
+            hooks.events, ["start", ("retry", "TimeoutError", 1), ("headers", 200), ("end", None)]
+        )
+        self.assertEqual(hooks.contexts[0].attempt, 2)
+
+    def test_events_of_failed_request(self):
+        hooks = _RecordingHooks()
+        transport = _FakeTransport([_FakeResponse(error=errors.ConnectionError("refused"))])
+        with self.assertRaises(errors.ConnectionError):
+            erniebot.ChatCompletion.create(**_chat_kwargs(transport, [hooks]))
+        self.assertEqual(hooks.events, ["start", ("end", "ConnectionError")])
+
+
+class TestHedgedRequestContext(unittest.TestCase):
+    def setUp(self):
+        # Hedge after 10 ms.
+        patcher = mock.patch.object(LatencyTracker, "percentile", return_value=0.01)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_only_winner_is_accounted_for(self):
+        hooks = _RecordingHooks()
+        slow = _FakeResponse({"id": "1", "result": "slow", "usage": _USAGE}, read_delay=10)
+        fast = _FakeResponse({"id": "2", "result": "fast", "usage": _USAGE}, delay=0.05)
+        transport = _FakeTransport([slow, fast])
+        resp = asyncio.run(
+            erniebot.ChatCompletion.acreate(**_chat_kwargs(transport, [hooks], hedging_percentile=50))
+        )
+        self.assertEqual(resp.result, "fast")
+        self.assertEqual(len(transport.requests), 2)
+        # The headers of the slow attempt arrived first, but are not counted.
+        self.assertEqual(hooks.events, ["start", ("headers", 200), ("end", None)])
+        ctx = hooks.contexts[0]
+        self.assertEqual(ctx.bytes_sent, len(transport.requests[1]))
+        self.assertEqual(ctx.bytes_received, fast.num_bytes)
+
+    def test_only_winner_is_accounted_for_in_stream(self):
+        hooks = _RecordingHooks()
+        slow = _FakeResponse(chunks=[{"id": "1", "result": "slow", "is_end": True}], read_delay=10)
+        fast = _FakeResponse(
+            chunks=[
+                {"id": "2", "result": "fa", "is_end": False},
+                {"id": "2", "result": "st", "is_end": True},
+            ],
+            delay=0.05,
+        )
+        transport = _FakeTransport([slow, fast])
+
+        async def _main():
+            stream = await erniebot.ChatCompletion.acreate(
+                stream=True, **_chat_kwargs(transport, [hooks], hedging_percentile=50)
+            )
+            return "".join([chunk.result async for chunk in stream])
+
+        self.assertEqual(asyncio.run(_main()), "fast")
+        self.assertTrue(slow.closed)
+        chunk_sizes = [len(chunk) - len("data: \n\n") for chunk in fast.chunks]
+        self.assertEqual(
+            hooks.events,
+            [
+                "start",
+                ("headers", 200),
+                "first_chunk",
+                ("chunk", chunk_sizes[0]),
+                ("chunk", chunk_sizes[1]),
+                ("end", None),
+            ],
+        )
+        ctx = hooks.contexts[0]
+        self.assertEqual(ctx.num_chunks, 2)
+        self.assertEqual(ctx.bytes_sent, len(transport.requests[1]))
+        self.assertEqual(ctx.bytes_received, sum(chunk_sizes))
+
+    def test_error_of_first_attempt_is_accounted_for(self):
+        hooks = _RecordingHooks()
+        transport = _FakeTransport(
+            [
+                _FakeResponse(error=errors.ConnectionError("refused"), delay=0.05),
+                _FakeResponse(error=errors.ConnectionError("refused"), delay=0.1),
+            ]
+        )
+        with self.assertRaises(errors.ConnectionError):
+            asyncio.run(
+                erniebot.ChatCompletion.acreate(**_chat_kwargs(transport, [hooks], hedging_percentile=50))
+            )
+        self.assertEqual(hooks.events, ["start", ("end", "ConnectionError")])
+        self.assertEqual(hooks.contexts[0].bytes_sent, len(transport.requests[0]))
+
+
+class TestMetricsCollector(unittest.TestCase):
+    def test_histogram_buckets(self):
+        histogram = Histogram("latency_seconds", "Latency.", ("model",), buckets=(1, 0.5, 2))
+        for value in (0.1, 0.5, 0.7, 3):
+            histogram.observe(value, "ernie-3.5")
+        histogram.observe(1.5, "ernie-4.0")
+        self.assertEqual(histogram.buckets, (0.5, 1, 2))
+        self.assertEqual(
+            histogram.collect(), [(("ernie-3.5",), [2, 3, 3, 4], 4.3), (("ernie-4.0",), [0, 0, 1, 1], 1.5)]
+        )
+        self.assertEqual(histogram.get_count("ernie-3.5"), 4)
+        self.assertAlmostEqual(histogram.get_sum("ernie-3.5"), 4.3)
+
+    def test_histogram_exposition(self):
+        histogram = Histogram("latency_seconds", "Latency.", ("model",), buckets=(0.5, 1))
+        histogram.observe(0.25, 'a"b')
+        histogram.observe(2, 'a"b')
+        self.assertEqual(
+            histogram.to_prometheus(),
+            [
+                "# HELP latency_seconds Latency.",
+                "# TYPE latency_seconds histogram",
+                'latency_seconds_bucket{model="a\\"b",le="0.5"} 1',
+                'latency_seconds_bucket{model="a\\"b",le="1"} 1',
+                'latency_seconds_bucket{model="a\\"b",le="+Inf"} 2',
+                'latency_seconds_sum{model="a\\"b"} 2.25',
+                'latency_seconds_count{model="a\\"b"} 2',
+            ],
+        )
+
+    def test_collect_requests(self):
+        collector = MetricsCollector(namespace="test")
+        rate_limited = _FakeResponse({"errorCode": 18, "errorMsg": "slow down"})
+        fake = _FakeResponse({"id": "1", "result": "hi", "usage": _USAGE})
+        transport = _FakeTransport(
+            [
+                rate_limited,
+                fake,
+                _FakeResponse(error=errors.ConnectionError("refused")),
+            ]
+        )
+        kwargs = _chat_kwargs(
+            transport, [collector], max_retries=1, min_retry_delay=0.01, max_retry_delay=0.01
+        )
+        erniebot.ChatCompletion.create(**kwargs)
+        with self.assertRaises(errors.ConnectionError):
+            erniebot.ChatCompletion.create(**kwargs)
+
+        labels = ("aistudio", "ernie-3.5")
+        self.assertEqual(collector.requests.get(*labels, "success"), 1)
+        self.assertEqual(collector.requests.get(*labels, "ConnectionError"), 1)
+        self.assertEqual(collector.retries.get(*labels, "RateLimitError"), 1)
+        self.assertEqual(collector.rate_limit_hits.get(*labels), 1)
+        self.assertEqual(collector.tokens.get(*labels, "prompt"), 3)
+        self.assertEqual(collector.tokens.get(*labels, "completion"), 5)
+        # The bytes of all attempts are counted.
+        self.assertEqual(collector.bytes_received.get(*labels), rate_limited.num_bytes + fake.num_bytes)
+        self.assertEqual(collector.bytes_sent.get(*labels), sum(map(len, transport.requests)))
+        self.assertEqual(collector.request_duration.get_count(*labels, "false"), 2)
+        self.assertEqual(collector.in_flight, 0)
+
+        text = collector.to_prometheus()
+        self.assertTrue(text.endswith("\n"))
+        self.assertIn(
+            'test_requests_total{api_type="aistudio",model="ernie-3.5",outcome="success"} 1\n', text
+        )
+        self.assertIn('test_tokens_total{api_type="aistudio",model="ernie-3.5",kind="completion"} 5\n', text)
+        self.assertIn("# TYPE test_request_duration_seconds histogram\n", text)
+        self.assertIn("# TYPE test_requests_in_flight gauge\ntest_requests_in_flight 0\n", text)
+        for line in text.splitlines():
+            if not line.startswith("#"):
+                float(line.rsplit(" ", 1)[1])
+
+    def test_stream_that_is_never_iterated(self):
+        collector = MetricsCollector(namespace="test")
+
+        async def _drop_stream():
+            transport = _FakeTransport([_FakeResponse(chunks=[{"id": "1", "result": "你", "is_end": True}])])
+            await erniebot.ChatCompletion.acreate(stream=True, **_chat_kwargs(transport, [collector]))
+            self.assertEqual(collector.in_flight, 1)
+            gc.collect()
+            await asyncio.sleep(0)
+
+        asyncio.run(_drop_stream())
+        self.assertEqual(collector.in_flight, 0)
+        self.assertEqual(collector.requests.get("aistudio", "ernie-3.5", "success"), 1)
+
+    def test_prometheus_server(self):
+        collector = MetricsCollector(namespace="test")
+        server = start_prometheus_server(collector, port=0)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        # Only the loopback interface is listened on by default.
+        host, port = server.server_address[:2]
+        self.assertEqual(host, "127.0.0.1")
+        with urllib.request.urlopen(f"http://{host}:{port}/metrics", timeout=5) as resp:
+            self.assertEqual(resp.read().decode("utf-8"), collector.to_prometheus())
+
+
+class _FakeSpan(object):
+    def __init__(self, name, kwargs):
+        super().__init__()
+        self.name = name
+        self.kwargs = kwargs
+        self.events = []
+        self.attributes = {}
+        self.status = None
+        self.exceptions = []
+        self.end_time = None
+
+    def add_event(self, name, attributes=None):
+        self.events.append((name, attributes))
+
+    def set_attributes(self, attributes):
+        self.attributes.update(attributes)
+
+    def record_exception(self, error):
+        self.exceptions.append(error)
+
+    def set_status(self, status):
+        self.status = status
+
+    def end(self, end_time=None):
+        self.end_time = end_time
+
+
+class _FakeTracer(object):
+    def __init__(self):
+        super().__init__()
+        self.spans = []
+
+    def start_span(self, name, **kwargs):
+        span = _FakeSpan(name, kwargs)
+        self.spans.append(span)
+        return span
+
+
+@unittest.skipIf(opentelemetry is None, "opentelemetry-api is not installed")
+class TestSpanEmitter(unittest.TestCase):
+    def test_span_of_stream(self):
+        tracer = _FakeTracer()
+        transport = _FakeTransport(
+            [
+                _FakeResponse(error=errors.TimeoutError("timed out")),
+                _FakeResponse(
+                    chunks=[
+                        {"id": "1", "result": "你", "is_end": False},
+                        {"id": "1", "result": "好", "is_end": True, "usage": _USAGE},
+                    ]
+                ),
+            ]
+        )
+        stream = erniebot.ChatCompletion.create(
+            stream=True,
+            **_chat_kwargs(
+                transport, [SpanEmitter(tracer)], max_retries=1, min_retry_delay=0.01, max_retry_delay=0.01
+            ),
+        )
+        self.assertEqual(len(tracer.spans), 1)
+        span = tracer.spans[0]
+        self.assertIsNone(span.end_time)
+        list(stream)
+        self.assertEqual(span.name, "erniebot ernie-3.5")
+        self.assertEqual(span.kwargs["attributes"]["gen_ai.request.model"], "ernie-3.5")
+        self.assertEqual([name for name, _ in span.events], ["retry", "headers", "first_chunk"])
+        self.assertEqual(span.events[0][1]["exception.type"], "TimeoutError")
+        self.assertEqual(span.attributes["erniebot.attempts"], 2)
+        self.assertEqual(span.attributes["erniebot.num_chunks"], 2)
+        self.assertEqual(span.attributes["gen_ai.usage.input_tokens"], 3)
+        self.assertEqual(span.attributes["gen_ai.usage.output_tokens"], 5)
+        self.assertEqual(span.attributes["http.response.status_code"], 200)
+        self.assertIsNone(span.status)
+        self.assertGreaterEqual(span.end_time, span.kwargs["start_time"])
+
+    def test_span_of_failed_request(self):
+        tracer = _FakeTracer()
+        transport = _FakeTransport([_FakeResponse(error=errors.ConnectionError("refused"))])
+        with self.assertRaises(errors.ConnectionError):
+            erniebot.ChatCompletion.create(**_chat_kwargs(transport, [SpanEmitter(tracer)]))
+        span = tracer.spans[0]
+        self.assertEqual(len(span.exceptions), 1)
+        self.assertEqual(span.status.status_code, opentelemetry.trace.StatusCode.ERROR)
+        self.assertIsNotNone(span.end_time)
@@ -0,0 +1,245 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import asyncio
+import unittest
+from unittest import mock
+
+from _utils import Clock
+
+import erniebot.errors as errors
+import erniebot.polling as polling
+from erniebot.polling import TaskPoller, wait_until
+from erniebot.response import EBResponse
+
+
+class _ScheduledFetch(object):
+    """Fetches statuses in the given order, raising the exceptions among them."""
+
+    def __init__(self, statuses):
+        super().__init__()
+        self._statuses = iter(statuses)
+        self.num_calls = 0
+
+    def _next(self):
+        self.num_calls += 1
+        status = next(self._statuses)
+        if isinstance(status, Exception):
+            raise status
+        return EBResponse(200, {"status": status}, {})
+
+    def __call__(self):
+        return self._next()
+
+    async def acall(self):
+        return self._next()
+
+
+def _is_done(resp):
+    return resp["status"] == "done"
+
+
+def _record_jitter(test_case, uniform=None):
+    """Records the intervals and the jittered delays between polls."""
+    records = []
+    jitter = polling._jitter
+
+    def _jitter(interval):
+        delay = jitter(interval)
+        records.append((interval, delay))
+        return delay
+
+    patchers = [mock.patch("erniebot.polling._jitter", _jitter)]
+    if uniform is not None:
+        patchers.append(mock.patch("erniebot.polling.random.uniform", uniform))
+    for patcher in patchers:
+        patcher.start()
+        test_case.addCleanup(patcher.stop)
+    return records
+
+
+class TestTaskPoller(unittest.IsolatedAsyncioTestCase):
+    def _make_poller(self, **kwargs):
+        kwargs.setdefault("min_interval", 0.01)
+        kwargs.setdefault("max_interval", 0.04)
+        return TaskPoller(**kwargs)
+
+    def test_invalid_args(self):
+        with self.assertRaises(ValueError):
+            TaskPoller(min_interval=0)
+        with self.assertRaises(ValueError):
+            TaskPoller(min_interval=2, max_interval=1)
+        with self.assertRaises(ValueError):
+            TaskPoller(multiplier=0.5)
+
+    async def test_backoff(self):
+        poller = self._make_poller()
+        records = _record_jitter(self, uniform=lambda a, b: b)
+        fetch = _ScheduledFetch(["pending"] * 4 + ["done"])
+        resp = await poller.wait(fetch.acall, _is_done)
+        self.assertEqual(resp["status"], "done")
+        self.assertEqual(fetch.num_calls, 5)
+        # The interval doubles after each poll until it reaches the maximum.
+        self.assertEqual(records, [(0.02, 0.02), (0.04, 0.04), (0.04, 0.04), (0.04, 0.04)])
+        await asyncio.sleep(0)
+        self.assertEqual(poller.num_pending, 0)
+
+    async def test_jitter(self):
+        poller = self._make_poller(min_interval=0.001, max_interval=0.008)
+        records = _record_jitter(self)
+        fetch = _ScheduledFetch(["pending"] * 20 + ["done"])
+        await poller.wait(fetch.acall, _is_done)
+        self.assertEqual(len(records), 20)
+        # Half of the interval is fixed and half is random.
+        for interval, delay in records:
+            self.assertGreaterEqual(delay, interval / 2)
+            self.assertLessEqual(delay, interval)
+        self.assertGreater(len({delay for _, delay in records}), 1)
+
+    async def test_deadline(self):
+        poller = self._make_poller()
+        expired = _ScheduledFetch(["pending"] * 100)
+        other = _ScheduledFetch(["pending"] * 5 + ["done"])
+        loop = asyncio.get_running_loop()
+        started_at = loop.time()
+        expired_future = poller.submit(expired.acall, _is_done, timeout=0.05)
+        other_future = poller.submit(other.acall, _is_done)
+        with self.assertRaises(errors.TimeoutError):
+            await expired_future
+        # The last poll is moved forward to the deadline instead of being
+        # scheduled after it.
+        self.assertGreaterEqual(loop.time() - started_at, 0.05)
+        self.assertLess(loop.time() - started_at, 0.5)
+        # The deadline of one task does not affect the others.
+        self.assertEqual((await other_future)["status"], "done")
+        self.assertEqual(other.num_calls, 6)
+
+    async def test_timeout_shorter_than_min_interval(self):
+        poller = self._make_poller(min_interval=10, max_interval=10)
+        fetch = _ScheduledFetch(["pending", "done"])
+        with self.assertRaises(errors.TimeoutError):
+            await poller.wait(fetch.acall, _is_done, timeout=0.01)
+        self.assertEqual(fetch.num_calls, 1)
+
+    async def test_until_raises(self):
+        poller = self._make_poller()
+
+        def _until(resp):
+            if resp["status"] == "failed":
+                raise errors.APIError("Task failed.")
+            return _is_done(resp)
+
+        failed = _ScheduledFetch(["pending", "failed"])
+        other = _ScheduledFetch(["pending"] * 3 + ["done"])
+        failed_future = poller.submit(failed.acall, _until)
+        other_future = poller.submit(other.acall, _until)
+        with self.assertRaises(errors.APIError):
+            await failed_future
+        self.assertEqual((await other_future)["status"], "done")
+        self.assertEqual(failed.num_calls, 2)
+
+    async def test_fetch_raises(self):
+        poller = self._make_poller()
+        fetch = _ScheduledFetch(["pending", errors.ConnectionError("Connection reset.")])
+        with self.assertRaises(errors.ConnectionError):
+            await poller.wait(fetch.acall, _is_done)
+        await asyncio.sleep(0)
+        self.assertEqual(poller.num_pending, 0)
+
+    async def test_cancel_one_waiter(self):
+        poller = self._make_poller()
+        cancelled = _ScheduledFetch(["pending"] * 100)
+        other = _ScheduledFetch(["pending"] * 3 + ["done"])
+        cancelled_future = poller.submit(cancelled.acall, _is_done)
+        other_future = poller.submit(other.acall, _is_done)
+        while cancelled.num_calls == 0:
+            await asyncio.sleep(0.001)
+        cancelled_future.cancel()
+        num_calls = cancelled.num_calls
+        self.assertEqual((await other_future)["status"], "done")
+        await asyncio.sleep(0.1)
+        # The cancelled task is dropped from the queue.
+        self.assertLessEqual(cancelled.num_calls, num_calls + 1)
+        self.assertEqual(poller.num_pending, 0)
+
+    async def test_restart_after_idle(self):
+        poller = self._make_poller()
+        fetch = _ScheduledFetch(["pending", "done"])
+        await poller.wait(fetch.acall, _is_done)
+        runner = poller._runner
+        assert runner is not None
+        await asyncio.wait_for(runner, 1)
+        # The runner exits once no task is pending, and is started again when
+        # a new task is submitted.
+        fetch = _ScheduledFetch(["pending", "done"])
+        self.assertEqual((await poller.wait(fetch.acall, _is_done))["status"], "done")
+        self.assertIsNot(poller._runner, runner)
+
+    async def test_max_concurrent_polls(self):
+        poller = self._make_poller(max_concurrent_polls=2)
+        in_flight = 0
+        max_in_flight = 0
+
+        async def _fetch():
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return EBResponse(200, {"status": "done"}, {})
+
+        resps = await asyncio.gather(*(poller.wait(_fetch, _is_done) for _ in range(6)))
+        self.assertEqual(len(resps), 6)
+        self.assertEqual(max_in_flight, 2)
+
+
+class TestWaitUntil(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.delays = []
+
+        def _sleep(secs):
+            self.delays.append(secs)
+            self.clock.now += secs
+
+        for target, new in (
+            ("erniebot.polling.time.monotonic", self.clock),
+            ("erniebot.polling.time.sleep", _sleep),
+            ("erniebot.polling.random.uniform", lambda a, b: b),
+        ):
+            patcher = mock.patch(target, new)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_backoff(self):
+        fetch = _ScheduledFetch(["pending"] * 4 + ["done"])
+        resp = wait_until(fetch, _is_done, min_interval=1, max_interval=4)
+        self.assertEqual(resp["status"], "done")
+        self.assertEqual(self.delays, [1, 2, 4, 4, 4])
+
+    def test_timeout(self):
+        fetch = _ScheduledFetch(["pending"] * 100)
+        with self.assertRaises(errors.TimeoutError):
+            wait_until(fetch, _is_done, timeout=10, min_interval=1, max_interval=4)
+        # The last delay is cut short by the deadline.
+        self.assertEqual(self.delays, [1, 2, 4, 3])
+        self.assertEqual(fetch.num_calls, 4)
+
+    def test_until_raises(self):
+        def _until(resp):
+            raise errors.APIError("Task failed.")
+
+        with self.assertRaises(errors.APIError):
+            wait_until(_ScheduledFetch(["failed"]), _until)
@@ -0,0 +1,139 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import unittest
+from unittest import mock
+
+from _utils import Clock
+
+from erniebot.rate_limiter import RateLimiter, get_rate_limiter, resolve_rate_limits
+
+
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.delays = []
+        patcher = mock.patch("erniebot.rate_limiter.time.monotonic", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch("erniebot.rate_limiter.time.sleep", self.delays.append)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_requests_go_into_debt(self):
+        limiter = RateLimiter(max_requests_per_second=2)
+        for _ in range(5):
+            limiter.acquire()
+        # Two requests are admitted immediately, and each of the others
+        # waits for the debt of the ones before it.
+        self.assertEqual(self.delays, [0.5, 1.0, 1.5])
+
+    def test_requests_refill(self):
+        limiter = RateLimiter(max_requests_per_second=2)
+        limiter.acquire()
+        limiter.acquire()
+        self.clock.now += 0.5
+        limiter.acquire()
+        self.assertEqual(self.delays, [])
+        # The bucket does not refill beyond its capacity.
+        self.clock.now += 10
+        for _ in range(3):
+            limiter.acquire()
+        self.assertEqual(self.delays, [0.5])
+
+    def test_slow_rate(self):
+        limiter = RateLimiter(max_requests_per_second=0.5)
+        limiter.acquire()
+        limiter.acquire()
+        self.assertEqual(self.delays, [2.0])
+
+    def test_tokens(self):
+        limiter = RateLimiter(max_tokens_per_minute=600)
+        self.assertTrue(limiter.counts_tokens)
+        limiter.acquire(500)
+        limiter.acquire(200)
+        self.assertEqual(self.delays, [10.0])
+        self.clock.now += 10
+        # Requests that are not counted do not reserve tokens.
+        limiter.acquire(0)
+        limiter.acquire(10)
+        self.assertEqual(self.delays, [10.0, 1.0])
+
+    def test_oversized_request_is_capped(self):
+        limiter = RateLimiter(max_tokens_per_minute=600)
+        limiter.acquire(6000)
+        limiter.acquire(60)
+        self.assertEqual(self.delays, [6.0])
+
+    def test_longest_delay_applies(self):
+        limiter = RateLimiter(max_requests_per_second=1, max_tokens_per_minute=60)
+        limiter.acquire(60)
+        limiter.acquire(3)
+        self.assertEqual(self.delays, [3.0])
+        self.assertFalse(RateLimiter(max_requests_per_second=1).counts_tokens)
+
+    def test_aacquire(self):
+        limiter = RateLimiter(max_requests_per_second=1)
+        with mock.patch("erniebot.rate_limiter.asyncio.sleep", new_callable=mock.AsyncMock) as sleep:
+            asyncio.run(limiter.aacquire())
+            sleep.assert_not_awaited()
+            asyncio.run(limiter.aacquire())
+            sleep.assert_awaited_once_with(1.0)
+        self.assertEqual(self.delays, [])
+
+
+class TestResolveRateLimits(unittest.TestCase):
+    def test_precedence(self):
+        config_dict = {
+            "max_requests_per_second": 1,
+            "rate_limits": {
+                "aistudio/ernie-4.0": {"max_requests_per_second": 2},
+                "ernie-4.0": {"max_requests_per_second": 3},
+                "ernie-3.5": {"max_tokens_per_minute": 4},
+                "qianfan": {"max_requests_per_second": 5},
+            },
+        }
+        self.assertEqual(
+            resolve_rate_limits("aistudio", "ernie-4.0", config_dict),
+            (("aistudio", "aistudio/ernie-4.0"), (2, None)),
+        )
+        self.assertEqual(
+            resolve_rate_limits("qianfan", "ernie-4.0", config_dict),
+            (("qianfan", "ernie-4.0"), (3, None)),
+        )
+        self.assertEqual(
+            resolve_rate_limits("aistudio", "ernie-3.5", config_dict),
+            (("aistudio", "ernie-3.5"), (None, 4)),
+        )
+        self.assertEqual(
+            resolve_rate_limits("qianfan", None, config_dict), (("qianfan", "qianfan"), (5, None))
+        )
+        self.assertEqual(resolve_rate_limits("aistudio", None, config_dict), (("aistudio", None), (1, None)))
+
+    def test_invalid_config(self):
+        with self.assertRaises(TypeError):
+            resolve_rate_limits("aistudio", None, {"rate_limits": [1]})
+        with self.assertRaises(TypeError):
+            resolve_rate_limits("aistudio", None, {"rate_limits": {"aistudio": 1}})
+
+    def test_shared_limiter(self):
+        self.assertIsNone(get_rate_limiter("aistudio", "ernie-4.0", {}))
+        config_dict = {"rate_limits": {"ernie-4.0": {"max_requests_per_second": 7}}}
+        limiter = get_rate_limiter("aistudio", "ernie-4.0", config_dict)
+        self.assertIsInstance(limiter, RateLimiter)
+        self.assertIs(get_rate_limiter("aistudio", "ernie-4.0", config_dict), limiter)
+        self.assertIsNot(get_rate_limiter("qianfan", "ernie-4.0", config_dict), limiter)
+        config_dict = {"rate_limits": {"ernie-4.0": {"max_requests_per_second": 8}}}
+        self.assertIsNot(get_rate_limiter("aistudio", "ernie-4.0", config_dict), limiter)
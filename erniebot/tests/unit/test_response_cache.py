@@ -0,0 +1,160 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import erniebot
+from erniebot.caching import InMemoryResponseCache, SQLiteResponseCache, make_cache_key
+from erniebot.resources.resource import EBResource
+from erniebot.response import EBResponse
+
+
+def _make_response(result):
+    return EBResponse(
+        rcode=200, rbody={"id": "1", "result": result}, rheaders={"Content-Type": "application/json"}
+    )
+
+
+class _ResponseCacheTests(object):
+    def create_cache(self, **kwargs):
+        raise NotImplementedError
+
+    def test_get_and_set_response(self):
+        cache = self.create_cache()
+        self.assertIsNone(cache.get_response("key"))
+        cache.set_response("key", _make_response("hello"))
+        resp = cache.get_response("key")
+        self.assertEqual(resp.rcode, 200)
+        self.assertEqual(resp.rbody, {"id": "1", "result": "hello"})
+        self.assertEqual(resp.rheaders, {"Content-Type": "application/json"})
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_cached_response_is_not_shared(self):
+        cache = self.create_cache()
+        resp = _make_response("hello")
+        cache.set_response("key", resp)
+        resp.rbody["result"] = "MUTATED"
+        hit = cache.get_response("key")
+        self.assertEqual(hit.rbody["result"], "hello")
+        hit.rbody["result"] = "MUTATED"
+        self.assertEqual(EBResponse.from_mapping(hit).rbody["result"], "MUTATED")
+        self.assertEqual(cache.get_response("key").rbody["result"], "hello")
+
+    def test_cache_stream(self):
+        cache = self.create_cache()
+        chunks = [_make_response(str(i)) for i in range(3)]
+        for chunk in cache.cache_stream("key", iter(chunks)):
+            chunk.rbody["result"] = "MUTATED"
+        self.assertEqual([c.rbody["result"] for c in cache.get_stream("key")], ["0", "1", "2"])
+
+    def test_unfinished_stream_is_not_cached(self):
+        cache = self.create_cache()
+        stream = cache.cache_stream("key", iter([_make_response(str(i)) for i in range(3)]))
+        next(stream)
+        stream.close()
+        self.assertIsNone(cache.get_stream("key"))
+
+    def test_max_size(self):
+        cache = self.create_cache(max_size=2)
+        with mock.patch("erniebot.caching.response_cache.time.time", side_effect=range(1000, 2000)):
+            for key in ("a", "b"):
+                cache.set_response(key, _make_response(key))
+            # Touch "a", so that "b" is the least recently used.
+            cache.get_response("a")
+            cache.set_response("c", _make_response("c"))
+            self.assertIsNone(cache.get_response("b"))
+            self.assertIsNotNone(cache.get_response("a"))
+            self.assertIsNotNone(cache.get_response("c"))
+
+    def test_ttl(self):
+        cache = self.create_cache(ttl=10)
+        with mock.patch("erniebot.caching.response_cache.time.time", return_value=1000.0):
+            cache.set_response("key", _make_response("hello"))
+        with mock.patch("erniebot.caching.response_cache.time.time", return_value=1005.0):
+            self.assertIsNotNone(cache.get_response("key"))
+        with mock.patch("erniebot.caching.response_cache.time.time", return_value=1011.0):
+            self.assertIsNone(cache.get_response("key"))
+
+    def test_stream_is_not_a_response(self):
+        cache = self.create_cache()
+        cache.set("key", [(200, {"result": str(i)}, {}) for i in range(2)])
+        self.assertIsNone(cache.get_response("key"))
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+
+    def test_clear(self):
+        cache = self.create_cache()
+        cache.set_response("key", _make_response("hello"))
+        cache.clear()
+        self.assertIsNone(cache.get_response("key"))
+
+
+class TestInMemoryResponseCache(_ResponseCacheTests, unittest.TestCase):
+    def create_cache(self, **kwargs):
+        return InMemoryResponseCache(**kwargs)
+
+
+class TestSQLiteResponseCache(_ResponseCacheTests, unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp_dir.cleanup)
+
+    def create_cache(self, **kwargs):
+        cache = SQLiteResponseCache(os.path.join(self._tmp_dir.name, "cache.db"), **kwargs)
+        self.addCleanup(cache.close)
+        return cache
+
+
+class TestMakeCacheKey(unittest.TestCase):
+    def test_canonical(self):
+        self.assertEqual(make_cache_key("a", {"x": 1, "y": 2}), make_cache_key("a", {"y": 2, "x": 1}))
+        self.assertNotEqual(make_cache_key("a", {"x": 1}), make_cache_key("b", {"x": 1}))
+
+
+class TestResourceResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = InMemoryResponseCache()
+        patcher = mock.patch.object(
+            EBResource, "request", side_effect=lambda **kwargs: _make_response("hello")
+        )
+        self.request = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _create_chat_completion(self, access_token):
+        return erniebot.ChatCompletion.create(
+            model="ernie-3.5",
+            messages=[{"role": "user", "content": "hi"}],
+            _config_=dict(api_type="aistudio", access_token=access_token, response_cache=self.cache),
+        )
+
+    def test_chat_completion_is_cached(self):
+        for _ in range(2):
+            self.assertEqual(self._create_chat_completion("token").get_result(), "hello")
+        self.assertEqual(self.request.call_count, 1)
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_credentials_are_part_of_key(self):
+        self._create_chat_completion("token1")
+        self._create_chat_completion("token2")
+        self.assertEqual(self.request.call_count, 2)
+        self.assertEqual(self.cache.hits, 0)
+
+    def test_fine_tuning_task_is_not_cached(self):
+        config = dict(api_type="qianfan_sft", ak="ak", sk="sk", response_cache=self.cache)
+        for _ in range(2):
+            erniebot.FineTuningTask.create(name="task", description="", _config_=config)
+        self.assertEqual(self.request.call_count, 2)
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 0))
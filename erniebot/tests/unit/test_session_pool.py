@@ -0,0 +1,50 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import email.message
+import unittest
+import urllib.request
+
+import aiohttp
+
+from erniebot.session_pool import SessionPool, aclose_sessions
+
+
+class _FakeResponse(object):
+    def info(self):
+        headers = email.message.Message()
+        headers["Set-Cookie"] = "session=secret; Path=/"
+        return headers
+
+
+class TestSessionPool(unittest.TestCase):
+    def test_cookies_are_not_stored(self):
+        with SessionPool().session("https://example.com/api") as session:
+            jar = session.cookies
+            request = urllib.request.Request("https://example.com/api")
+            jar.extract_cookies(_FakeResponse(), request)
+            self.assertEqual(len(jar), 0)
+
+    def test_async_cookies_are_not_stored(self):
+        async def _main():
+            loop = asyncio.get_running_loop()
+            async with SessionPool().asession("https://example.com/api") as session:
+                self.assertIsInstance(session.cookie_jar, aiohttp.DummyCookieJar)
+            # The event loop is left untouched.
+            self.assertNotIn("close", vars(loop))
+            await aclose_sessions()
+            self.assertTrue(session.closed)
+
+        asyncio.run(_main())
@@ -0,0 +1,87 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+from erniebot.utils.sse import SSEDecoder
+
+
+def _decode(chunks):
+    decoder = SSEDecoder()
+    events = []
+    for chunk in chunks:
+        events.extend(decoder.feed(chunk))
+    events.extend(decoder.flush())
+    return events
+
+
+def _data(events):
+    return [bytes(event.data) for event in events]
+
+
+class TestSSEDecoder(unittest.TestCase):
+    def test_single_line_events(self):
+        events = _decode([b"data: a\n\ndata: b\n\n"])
+        self.assertEqual(_data(events), [b"a", b"b"])
+
+    def test_crlf(self):
+        events = _decode([b"data: a\r\n\r\ndata: b\r\ndata: c\r\n\r\n"])
+        self.assertEqual(_data(events), [b"a", b"b\nc"])
+
+    def test_crlf_split_between_chunks(self):
+        events = _decode([b"data: a\r", b"\n\r", b"\ndata: b\r\n", b"\r\n"])
+        self.assertEqual(_data(events), [b"a", b"b"])
+
+    def test_multi_line_data(self):
+        events = _decode([b"data: a\ndata:b\ndata\ndata: c\n\n"])
+        self.assertEqual(_data(events), [b"a\nb\n\nc"])
+
+    def test_split_multibyte_character(self):
+        payload = "data: 你好\n\n".encode("utf-8")
+        # Split inside the encoding of the first character.
+        split_at = payload.index("你".encode("utf-8")) + 1
+        events = _decode([payload[:split_at], payload[split_at:]])
+        self.assertEqual([bytes(event.data).decode("utf-8") for event in events], ["你好"])
+
+    def test_every_chunk_boundary(self):
+        stream = (
+            ": comment\r\nevent: delta\r\nid: 1\r\ndata: 你好\r\ndata: 世界\r\n\r\n"
+            'data: {"result": "文心"}\n\nretry: 3000\ndata: end\n\n'
+        ).encode("utf-8")
+        expected = _decode([stream])
+        self.assertEqual(
+            [(bytes(e.data).decode("utf-8"), e.event, e.id, e.retry) for e in expected],
+            [
+                ("你好\n世界", "delta", "1", None),
+                ('{"result": "文心"}', None, "1", None),
+                ("end", None, "1", 3000),
+            ],
+        )
+        for i in range(len(stream) + 1):
+            self.assertEqual(_decode([stream[:i], stream[i:]]), _decode([stream]), i)
+        self.assertEqual(_decode([stream[i : i + 1] for i in range(len(stream))]), expected)
+
+    def test_event_type_does_not_persist(self):
+        events = _decode([b"event: a\n\nevent: b\ndata: x\n\ndata: y\n\n"])
+        self.assertEqual([(bytes(e.data), e.event) for e in events], [(b"x", "b"), (b"y", None)])
+
+    def test_invalid_retry_is_ignored(self):
+        events = _decode([b"retry: soon\ndata: x\n\n"])
+        self.assertEqual(events[0].retry, None)
+
+    def test_flush(self):
+        decoder = SSEDecoder()
+        self.assertEqual(decoder.feed(b"data: a\ndata: b"), [])
+        self.assertEqual(_data(decoder.flush()), [b"a\nb"])
+        self.assertEqual(decoder.flush(), [])
@@ -0,0 +1,125 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import unittest
+
+from erniebot import ChatCompletionResponse, ChatCompletionStreamAccumulator
+
+
+def _make_chunks():
+    return [
+        ChatCompletionResponse(
+            200,
+            {"id": "as-1", "sentence_id": 0, "result": "Hello", "is_end": False, "usage": {}},
+            {"X-Request-Id": "1"},
+        ),
+        ChatCompletionResponse(
+            200,
+            {"id": "as-1", "sentence_id": 1, "result": ", ", "is_end": False, "search_info": {}},
+            {"X-Request-Id": "1"},
+        ),
+        ChatCompletionResponse(
+            200,
+            {
+                "id": "as-1",
+                "sentence_id": 2,
+                "result": "world!",
+                "is_end": True,
+                "usage": {"prompt_tokens": 3, "completion_tokens": 4, "total_tokens": 7},
+                "function_call": {"name": "get_weather", "arguments": "{}"},
+                "search_info": {"search_results": [{"index": 1, "url": "https://example.com"}]},
+            },
+            {"X-Request-Id": "1"},
+        ),
+    ]
+
+
+async def _agen(chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+class TestChatCompletionStreamAccumulator(unittest.IsolatedAsyncioTestCase):
+    def test_iter(self):
+        chunks = _make_chunks()
+        stream = ChatCompletionStreamAccumulator(iter(chunks))
+        self.assertEqual(list(stream), chunks)
+        self.assertEqual(stream.text, "Hello, world!")
+        # Repeated access returns the same text.
+        self.assertEqual(stream.text, "Hello, world!")
+
+    def test_get_response(self):
+        stream = ChatCompletionStreamAccumulator(iter(_make_chunks()))
+        for _ in stream:
+            pass
+        resp = stream.get_response()
+        self.assertIsInstance(resp, ChatCompletionResponse)
+        self.assertEqual(resp.rcode, 200)
+        self.assertEqual(resp.rheaders, {"X-Request-Id": "1"})
+        self.assertEqual(resp["result"], "Hello, world!")
+        self.assertEqual(resp["id"], "as-1")
+        self.assertIs(resp["is_end"], True)
+        self.assertEqual(resp["usage"], {"prompt_tokens": 3, "completion_tokens": 4, "total_tokens": 7})
+        self.assertEqual(resp["function_call"], {"name": "get_weather", "arguments": "{}"})
+        self.assertEqual(
+            resp["search_info"], {"search_results": [{"index": 1, "url": "https://example.com"}]}
+        )
+        self.assertNotIn("sentence_id", resp)
+        self.assertEqual(stream.metrics.num_chunks, 3)
+        self.assertEqual(stream.metrics.num_completion_tokens, 4)
+
+    def test_empty_fields_do_not_overwrite(self):
+        chunks = _make_chunks()
+        # The metadata in the last chunk is kept even if an empty chunk follows.
+        chunks.append(
+            ChatCompletionResponse(200, {"id": "as-1", "result": "", "usage": {}, "search_info": {}}, {})
+        )
+        stream = ChatCompletionStreamAccumulator(iter(chunks))
+        for _ in stream:
+            pass
+        resp = stream.get_response()
+        self.assertEqual(resp["result"], "Hello, world!")
+        self.assertEqual(resp["usage"]["total_tokens"], 7)
+        self.assertIn("search_results", resp["search_info"])
+
+    def test_add(self):
+        stream = ChatCompletionStreamAccumulator()
+        self.assertEqual(stream.text, "")
+        for chunk in _make_chunks():
+            stream.add(chunk)
+        self.assertEqual(stream.text, "Hello, world!")
+        self.assertEqual(stream.get_response()["usage"]["completion_tokens"], 4)
+
+    def test_iter_rejects_non_sync_stream(self):
+        with self.assertRaises(TypeError):
+            list(ChatCompletionStreamAccumulator())
+        agen = _agen(_make_chunks())
+        with self.assertRaises(TypeError):
+            list(ChatCompletionStreamAccumulator(agen))
+
+    async def test_aiter(self):
+        chunks = _make_chunks()
+        stream = ChatCompletionStreamAccumulator(_agen(chunks))
+        self.assertEqual([chunk async for chunk in stream], chunks)
+        self.assertEqual(stream.text, "Hello, world!")
+        self.assertEqual(stream.get_response()["usage"]["total_tokens"], 7)
+
+    async def test_aiter_rejects_non_async_stream(self):
+        with self.assertRaises(TypeError):
+            async for _ in ChatCompletionStreamAccumulator(iter(_make_chunks())):
+                pass
+        with self.assertRaises(TypeError):
+            async for _ in ChatCompletionStreamAccumulator():
+                pass
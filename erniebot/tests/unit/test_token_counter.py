@@ -0,0 +1,134 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import math
+import os
+import random
+import re
+import tempfile
+import unittest
+
+from erniebot.utils import token_counter
+from erniebot.utils.token_counter import (
+    ApproxTokenCounter,
+    VocabTokenCounter,
+    get_token_counter,
+    set_token_counter,
+)
+from erniebot.utils.token_helper import approx_num_tokens
+
+
+def _legacy_approx_num_tokens(text):
+    # The implementation of `approx_num_tokens` before `ApproxTokenCounter`
+    # was introduced
+    cnt_han = 0
+    cnt_word = 0
+
+    res = []
+    for char in text:
+        if re.match(r"[\u4e00-\u9fff]", char):
+            cnt_han += 1
+            res.append(" ")
+        elif re.match(r"[^\w\s]", char):
+            res.append(" ")
+        else:
+            res.append(char)
+
+    res_text = "".join(res)
+    cnt_word = len(res_text.split())
+
+    return cnt_han + int(math.floor(cnt_word * 1.3))
+
+
+class TestApproxTokenCounter(unittest.TestCase):
+    def test_matches_legacy_algorithm(self):
+        counter = ApproxTokenCounter(cache_size=0)
+        texts = [
+            "",
+            "你好，我是文心一言。",
+            "you are an assistant useful for ocr.",
+            "ERNIE Bot是百度的大语言模型，v4.0版本于2023年发布。",
+            "snake_case and état\tcafé\n naïve — “quotes” 123,456",
+            "日本語のテキストと한국어",
+        ]
+        rng = random.Random(0)
+        alphabet = "ab_1 ,.\t\n中文é—ｱ한!？"
+        texts += ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 64))) for _ in range(500)]
+        for text in texts:
+            self.assertEqual(counter.count(text), _legacy_approx_num_tokens(text), text)
+
+    def test_long_texts_are_memoized(self):
+        counter = ApproxTokenCounter(cache_size=1)
+        text = "文" * ApproxTokenCounter.MIN_CACHED_LENGTH
+        self.assertEqual(counter.count(text), len(text))
+        self.assertEqual(len(counter._cache), 1)
+        self.assertEqual(counter.count(text), len(text))
+        counter.count("言" * ApproxTokenCounter.MIN_CACHED_LENGTH)
+        self.assertEqual(len(counter._cache), 1)
+
+    def test_count_many_and_total(self):
+        counter = ApproxTokenCounter()
+        self.assertEqual(counter.count_many(["你好", "hello world"]), [2, 2])
+        self.assertEqual(counter.count_total(["你好", "hello world"]), 4)
+
+
+class TestVocabTokenCounter(unittest.TestCase):
+    def test_wordpiece_longest_match(self):
+        counter = VocabTokenCounter(["un", "una", "##ff", "##able", "##a", "##b", "你", "好"])
+        # "una" + "##ff" + "##able"
+        self.assertEqual(counter.count("unaffable"), 3)
+        # "un" + "##b" + "##a"
+        self.assertEqual(counter.count("unba"), 3)
+        # Punctuation and Han characters are separate pieces.
+        self.assertEqual(counter.count("你好, una!"), 5)
+        # Characters that are not in the vocabulary count as one token each.
+        self.assertEqual(counter.count("xyz"), 3)
+
+    def test_lowercase_and_accents(self):
+        counter = VocabTokenCounter(["cafe"])
+        self.assertEqual(counter.count("Café"), 1)
+        self.assertEqual(VocabTokenCounter(["cafe"], lowercase=False).count("Café"), 4)
+
+    def test_sentencepiece(self):
+        counter = VocabTokenCounter(
+            ["▁hello", "▁hel", "lo", "world"], continuation_prefix="", word_prefix="▁"
+        )
+        self.assertEqual(counter.count("hello"), 1)
+        # "world" is not word-initial in the vocabulary.
+        self.assertEqual(counter.count("world"), 5)
+        self.assertEqual(counter.count("helworld"), 2)
+
+    def test_from_file(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "vocab.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("▁token\t-1.0\n▁count\t-2.0\ning\t-3.0\n")
+            counter = VocabTokenCounter.from_file(path)
+        self.assertEqual((counter.continuation_prefix, counter.word_prefix), ("", "▁"))
+        # "▁count" + "ing" + "▁token" + "s"
+        self.assertEqual(counter.count("counting tokens"), 4)
+
+
+class TestGlobalTokenCounter(unittest.TestCase):
+    def setUp(self):
+        default_counter = get_token_counter()
+        self.addCleanup(set_token_counter, default_counter)
+
+    def test_approx_num_tokens_uses_global_counter(self):
+        self.assertEqual(approx_num_tokens("hello world"), 2)
+        set_token_counter(VocabTokenCounter(["hello", "world"]))
+        self.assertEqual(approx_num_tokens("hello world"), 2)
+        self.assertEqual(token_counter.count_tokens("hello, world"), 3)
+        set_token_counter(VocabTokenCounter([]))
+        self.assertEqual(approx_num_tokens("hello"), 5)
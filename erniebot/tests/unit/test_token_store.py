@@ -0,0 +1,181 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import multiprocessing
+import os
+import pathlib
+import tempfile
+import threading
+import time
+import unittest
+
+from erniebot.api_types import APIType
+from erniebot.auth import AuthTokenManager
+from erniebot.token_store import FileTokenStore, fcntl
+
+
+class _FakeAuthTokenManager(AuthTokenManager):
+    """Issues tokens named after the process, and logs every request to a
+    file."""
+
+    def __init__(self, store_path: str, log_path: str, delay: float = 0) -> None:
+        self._store_path = store_path
+        super().__init__(APIType.QIANFAN, token_cache_path=store_path)
+        self._log_path = log_path
+        self._delay = delay
+
+    def _request_auth_token(self, init: bool):
+        time.sleep(self._delay)
+        return self._issue_token()
+
+    async def _arequest_auth_token(self, init: bool):
+        await asyncio.sleep(self._delay)
+        return self._issue_token()
+
+    def _get_cache_key(self):
+        # Different tests must not share the in-process cache.
+        return ("ak", "sk", self._store_path)
+
+    def _issue_token(self):
+        token = f"token-{os.getpid()}"
+        with open(self._log_path, "a", encoding="utf-8") as f:
+            f.write(token + "\n")
+        return token, 3600.0
+
+
+def _get_token(store_path, log_path, delay, use_async, queue):
+    manager = _FakeAuthTokenManager(store_path, log_path, delay)
+    if use_async:
+        token = asyncio.run(manager.aget_auth_token())
+    else:
+        token = manager.get_auth_token()
+    queue.put(token)
+
+
+class TestFileTokenStore(unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.store_path = os.path.join(self._tmp_dir.name, "tokens.json")
+        self.log_path = os.path.join(self._tmp_dir.name, "requests.log")
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def _run_processes(self, delays, use_async):
+        ctx = multiprocessing.get_context("fork")
+        queue = ctx.Queue()
+        processes = []
+        for delay in delays:
+            process = ctx.Process(
+                target=_get_token, args=(self.store_path, self.log_path, delay, use_async, queue)
+            )
+            process.start()
+            processes.append(process)
+            # Make sure that the first process takes the lock first.
+            time.sleep(0.2)
+        tokens = [queue.get(timeout=10) for _ in processes]
+        for process in processes:
+            process.join(timeout=10)
+            self.assertEqual(process.exitcode, 0)
+        return tokens
+
+    def _read_requests(self):
+        return pathlib.Path(self.log_path).read_text(encoding="utf-8").split()
+
+    def test_save_and_load(self):
+        store = FileTokenStore(self.store_path)
+        self.assertIsNone(store.load("key"))
+        store.save("key", "token", 3600)
+        token, remaining = store.load("key")
+        self.assertEqual(token, "token")
+        self.assertGreater(remaining, 3500)
+        self.assertIsNone(store.load("other_key"))
+        # Credentials are not written in plain text.
+        self.assertNotIn(
+            "key", pathlib.Path(self.store_path).read_text(encoding="utf-8").replace("token", "")
+        )
+
+    def test_expiring_token_is_not_loaded(self):
+        store = FileTokenStore(self.store_path)
+        store.save("key", "token", FileTokenStore.MIN_REMAINING_LIFETIME_SECS / 2)
+        self.assertIsNone(store.load("key"))
+
+    @unittest.skipIf(fcntl is None, "inter-process locking is not supported")
+    def test_processes_share_token(self):
+        tokens = self._run_processes([1.0, 0.0], use_async=False)
+        self.assertEqual(len(self._read_requests()), 1)
+        self.assertEqual(tokens[0], tokens[1])
+
+    @unittest.skipIf(fcntl is None, "inter-process locking is not supported")
+    def test_processes_share_token_async(self):
+        tokens = self._run_processes([0.0, 0.0], use_async=True)
+        self.assertEqual(len(self._read_requests()), 1)
+        self.assertEqual(tokens[0], tokens[1])
+
+    @unittest.skipIf(fcntl is None, "inter-process locking is not supported")
+    def test_lock_not_held_across_async_request(self):
+        manager = _FakeAuthTokenManager(self.store_path, self.log_path, delay=1.0)
+        store = FileTokenStore(self.store_path)
+        acquired = []
+
+        async def _main():
+            task = asyncio.create_task(manager.aget_auth_token())
+            await asyncio.sleep(0.3)
+            # The token request is in flight, and the lock must be free.
+            thread = threading.Thread(target=lambda: acquired.append(_try_lock(store)))
+            thread.start()
+            thread.join()
+            return await task
+
+        asyncio.run(_main())
+        self.assertEqual(acquired, [True])
+
+    @unittest.skipIf(fcntl is None, "inter-process locking is not supported")
+    def test_lock_released_on_cancellation(self):
+        manager = _FakeAuthTokenManager(self.store_path, self.log_path)
+        store = FileTokenStore(self.store_path)
+        locked = threading.Event()
+
+        def _hold_lock():
+            with store.lock():
+                locked.set()
+                time.sleep(0.5)
+
+        holder = threading.Thread(target=_hold_lock)
+        holder.start()
+        locked.wait()
+
+        async def _main():
+            asyncio.create_task(manager.aget_auth_token())
+            await asyncio.sleep(0.1)
+            # The update is waiting for the lock in an executor thread, and
+            # gets cancelled when the event loop shuts down.
+
+        asyncio.run(_main())
+        holder.join()
+        self.assertTrue(_try_lock(store))
+
+
+def _try_lock(store):
+    fd = os.open(store.path.with_name(store.path.name + ".lock"), os.O_RDWR | os.O_CREAT)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    else:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        return True
+    finally:
+        os.close(fd)